@@ -0,0 +1,68 @@
+"""Bot decisions per second: one bot at a time vs batched, with and without NumPy.
+
+Every bot decides on every tick, which is the worst case for a full room.
+
+    python -m benchmarks.ai_decisions
+"""
+
+import random
+import time
+
+from src.ai import AIEngine, np
+from src.game import GameState
+from src.models import PlayerLocation
+
+
+def build_game(bots: int, engine: AIEngine) -> GameState:
+    game = GameState(ai=engine, rng=random.Random(0))
+    game.game_options["lives"] = 10 ** 6
+    game.game_options["bot_difficulty"] = 2
+    for _ in range(bots):
+        game.add_ai()
+    for p in game.players.values():
+        p.location = PlayerLocation.PLAYING
+    game.start_game()
+    return game
+
+
+def run(bots: int, ticks: int, batched: bool, use_numpy: bool) -> float:
+    """Return decisions per second."""
+    engine = AIEngine(random.Random(1), use_numpy=use_numpy)
+    game = build_game(bots, engine)
+    decisions = 0
+    elapsed = 0.0
+    for _ in range(ticks):
+        due = [p for p in game.players.values() if p.alive]
+        started = time.perf_counter()
+        if batched:
+            directions = engine.decide(game, due)
+        else:
+            directions = [engine.decide(game, [p])[0] for p in due]
+        elapsed += time.perf_counter() - started
+        decisions += len(due)
+        for p, direction in zip(due, directions):
+            p.next_direction = direction
+            p.ai_decision_at = float("inf")  # keep tick() from deciding again
+        game.tick()
+        for p in game.players.values():
+            if p.respawn_at:
+                p.respawn_at = 1
+        if game.level_changing:
+            game.level_change_at = 0
+    return decisions / elapsed
+
+
+def main():
+    modes = [("per-bot", False, False), ("batched", True, False)]
+    if np is not None:
+        modes.append(("batched+numpy", True, True))
+    else:
+        print("NumPy not installed; skipping the vectorized mode")
+    print(f"{'bots':>5} {'mode':>14} {'decisions/s':>12}")
+    for bots in (10, 50, 100):
+        for name, batched, use_numpy in modes:
+            print(f"{bots:>5} {name:>14} {run(bots, 300, batched, use_numpy):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
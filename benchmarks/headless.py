@@ -0,0 +1,200 @@
+"""Run ``GameState.tick()`` as fast as possible, without a server.
+
+The game gets a seeded rng and a simulated clock that advances one tick
+interval per tick, so respawns, level countdowns and bot pacing happen in
+game time and a run is repeatable: the same arguments give the same
+fingerprint. Human players are steered by their own seeded engine outside
+the timed region; bots decide inside ``tick()`` as in a real room.
+
+    python -m benchmarks.headless --players 4 --bots 8 --ticks 5000
+    python -m benchmarks.headless --level 6 --no-collisions --allocations
+    python -m benchmarks.headless --grid 400 300 --bots 100 --ticks 500
+
+Reports ticks per second, per-tick percentiles with the slowest tick (rerun
+with the same seed and ``--ticks`` up to it to inspect it), garbage
+collections, and with ``--allocations`` tracemalloc's peak memory and the
+lines that allocated the most during the run.
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.ai import AIEngine
+from src.constants import TICK_RATE
+from src.game import GameState
+from src.models import PlayerLocation, PlayerState
+from src.recording import fingerprint
+
+
+class SimClock:
+    """A clock for ``GameState`` that only moves when told to."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@dataclass
+class Result:
+    ticks: int
+    seconds: float
+    tick_times: list[float]
+    gc_collections: int
+    fingerprint: str
+    peak_bytes: Optional[int] = None
+    top_allocations: list[str] = field(default_factory=list)
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.seconds if self.seconds else 0.0
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.tick_times)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    @property
+    def slowest_tick(self) -> int:
+        return max(range(len(self.tick_times)), key=self.tick_times.__getitem__)
+
+
+def build_game(
+    players: int = 1,
+    bots: int = 0,
+    level: int = 1,
+    seed: int = 0,
+    options: Optional[dict] = None,
+    grid: Optional[tuple[int, int]] = None,
+) -> tuple[GameState, SimClock]:
+    """A started game with ``players`` humans and ``bots`` bots on ``level``.
+
+    ``grid`` resizes the board first.
+    """
+    clock = SimClock()
+    game = GameState(rng=random.Random(seed), clock=clock)
+    game.game_options["lives"] = 10 ** 9  # keep everyone playing for the whole run
+    game.game_options.update(options or {})
+    if grid is not None:
+        game.set_grid_size(*grid)
+    for i in range(players):
+        p = PlayerState(pid=f"p{i}", name=f"Player {i}", color="#ff00ff",
+                        location=PlayerLocation.PLAYING)
+        game.players[p.pid] = p
+    for _ in range(bots):
+        game.add_ai()
+    for p in game.players.values():
+        p.location = PlayerLocation.PLAYING
+    if level != 1:
+        game.level = level
+        game.load_walls(level)
+    game.start_game()
+    return game, clock
+
+
+def run(
+    ticks: int,
+    players: int = 1,
+    bots: int = 0,
+    level: int = 1,
+    seed: int = 0,
+    options: Optional[dict] = None,
+    allocations: bool = False,
+    top: int = 10,
+    grid: Optional[tuple[int, int]] = None,
+) -> Result:
+    game, clock = build_game(players, bots, level, seed, options, grid)
+    interval = 1.0 / game.game_options["tick_rate"]
+    humans = [p for p in game.players.values() if not p.is_ai]
+    steering = AIEngine(random.Random(seed + 1))
+    tick_times = []
+
+    gc.collect()
+    collections = sum(s["collections"] for s in gc.get_stats())
+    if allocations:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    perf_counter = time.perf_counter
+    for _ in range(ticks):
+        alive = [p for p in humans if p.alive]
+        for p, direction in zip(alive, steering.decide(game, alive)):
+            p.next_direction = direction
+        started = perf_counter()
+        game.tick()
+        tick_times.append(perf_counter() - started)
+        clock.advance(interval)
+
+    result = Result(
+        ticks=ticks,
+        seconds=sum(tick_times),
+        tick_times=tick_times,
+        gc_collections=sum(s["collections"] for s in gc.get_stats()) - collections,
+        fingerprint=fingerprint(game),
+    )
+    if allocations:
+        after = tracemalloc.take_snapshot()
+        result.peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        stats = after.compare_to(before, "lineno")
+        stats.sort(key=lambda s: s.count_diff, reverse=True)
+        result.top_allocations = [str(s) for s in stats[:top]]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=1,
+                        help="human players, steered outside the timed tick")
+    parser.add_argument("--bots", type=int, default=3)
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--difficulty", type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument("--no-collisions", action="store_true")
+    parser.add_argument("--food-count", type=int)
+    parser.add_argument("--food-to-advance", type=int)
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE)
+    parser.add_argument("--grid", type=int, nargs=2, metavar=("W", "H"),
+                        help="board size (default 40 30)")
+    parser.add_argument("--allocations", action="store_true",
+                        help="trace allocations (much slower ticks)")
+    parser.add_argument("--top", type=int, default=10, help="allocation sites to list")
+    args = parser.parse_args()
+
+    options = {
+        "bot_difficulty": args.difficulty,
+        "collisions": not args.no_collisions,
+        "tick_rate": args.tick_rate,
+    }
+    if args.food_count is not None:
+        options["food_count"] = args.food_count
+    if args.food_to_advance is not None:
+        options["food_to_advance"] = args.food_to_advance
+
+    result = run(
+        args.ticks, args.players, args.bots, args.level, args.seed, options,
+        allocations=args.allocations, top=args.top, grid=args.grid,
+    )
+    print(f"ticks         {result.ticks}")
+    print(f"ticks/s       {result.ticks_per_second:,.0f}")
+    print(f"p50 / p99     {result.percentile(50) * 1e6:.1f} / {result.percentile(99) * 1e6:.1f} us")
+    print(f"slowest       {max(result.tick_times) * 1e6:.1f} us at tick {result.slowest_tick}")
+    print(f"gc runs       {result.gc_collections}")
+    print(f"fingerprint   {result.fingerprint}")
+    if result.peak_bytes is not None:
+        print(f"peak traced   {result.peak_bytes / 1024:,.1f} KiB")
+        print("most allocated blocks still live at the end, by line:")
+        for line in result.top_allocations:
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
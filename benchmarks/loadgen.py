@@ -0,0 +1,361 @@
+"""Drive the real ``/ws`` endpoint with many simulated players.
+
+Starts the server (``python -m src.main`` on a free local port) unless
+``--url`` points at one already running, then for every combination of
+``--players`` and ``--tick-rate`` fills rooms of ``--room-size`` clients.
+Each client joins, readies up and sends ``input`` at about ``--input-rate``
+key presses a second; a room's first client also sets the tick rate and adds
+``--bots``. When a game ends everyone readies again, so load never lets up.
+
+    python -m benchmarks.loadgen --players 50,200 --tick-rate 10,20
+    python -m benchmarks.loadgen --url http://127.0.0.1:8765 --server-pid 1234
+
+Latency is tick-to-receive: from the wall-clock time the server began the
+tick (``GET /debug/frames``) to the client receiving its state frame, so the
+server must run on the same machine. Per scenario it reports p50/p99
+latency, interarrival jitter, frames lost to the server's slow-client drops
+(sequence gaps), frames later than one tick, and server and load generator
+CPU. A load generator near 100% CPU is measuring itself, not the server:
+spread the clients over several processes or machines instead.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    from websockets.asyncio.client import connect
+except ImportError:  # websockets < 13
+    from websockets.client import connect
+
+from src.constants import DIRECTIONS, OPPOSITES
+from src.wire import MSG_TYPE_IDS, T_DICT, T_UINT
+
+STATE_TYPE_IDS = (MSG_TYPE_IDS["state"], MSG_TYPE_IDS["state_delta"])
+JSON_SEQ = re.compile(r'^\{"type": "state(?:_delta)?", "seq": (\d+)')
+
+
+def _varint(buf: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def frame_seq(payload) -> Optional[int]:
+    """The ``seq`` of a state frame, read from its first bytes; None for other messages."""
+    if isinstance(payload, str):
+        match = JSON_SEQ.match(payload)
+        return int(match.group(1)) if match else None
+    if not payload or payload[0] not in STATE_TYPE_IDS:
+        return None
+    _, pos = _varint(payload, 1)  # grid width
+    if payload[pos] != T_DICT:
+        return None
+    _, pos = _varint(payload, pos + 1)  # key count
+    key, pos = _varint(payload, pos)
+    if key != 0 or payload[pos] != T_UINT:  # "seq" is always the first key
+        return None
+    return _varint(payload, pos + 1)[0]
+
+
+@dataclass
+class ClientLog:
+    room_id: str
+    frames: list[tuple[int, float]] = field(default_factory=list)  # (seq, received at)
+    errors: int = 0
+
+
+class RoomSetup:
+    """Makes a room's clients ready up only once all of them have joined."""
+
+    def __init__(self, room_id: str, size: int):
+        self.room_id = room_id
+        self.size = size
+        self.joined = 0
+        self.all_joined = asyncio.Event()
+
+    def join(self):
+        self.joined += 1
+        if self.joined >= self.size:
+            self.all_joined.set()
+
+
+async def run_client(url: str, setup: RoomSetup, first: bool, args, log: ClientLog,
+                     stop: asyncio.Event, recording: asyncio.Event, rng: random.Random):
+    uri = url.replace("http", "ws", 1) + f"/ws?room={setup.room_id}"
+    try:
+        async with connect(uri, compression=None, max_size=None) as ws:
+            await ws.send(json.dumps({
+                "type": "join",
+                "name": f"load{rng.randrange(10 ** 6)}",
+                "encoding": args.encoding,
+                "compression": "none",
+            }))
+            while True:
+                msg = json.loads(await ws.recv())
+                if msg["type"] == "welcome":
+                    break
+            if first:
+                await ws.send(json.dumps({
+                    "type": "game_options",
+                    "tick_rate": args.current_tick_rate,
+                    "lives": 9,
+                    "collisions": args.collisions,
+                }))
+                for _ in range(args.bots):
+                    await ws.send(json.dumps({"type": "add_ai"}))
+            setup.join()
+            await setup.all_joined.wait()
+            await ws.send(json.dumps({"type": "ready"}))
+
+            sender = asyncio.create_task(send_inputs(ws, args.input_rate, stop, rng))
+            try:
+                frames = log.frames
+                while not stop.is_set():
+                    try:
+                        payload = await asyncio.wait_for(ws.recv(), 0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    received = time.time()
+                    seq = frame_seq(payload)
+                    if seq is not None:
+                        if recording.is_set():
+                            frames.append((seq, received))
+                    elif isinstance(payload, str) and payload.startswith('{"type": "game_end"'):
+                        await ws.send(json.dumps({"type": "ready"}))
+            finally:
+                sender.cancel()
+    except Exception:
+        log.errors += 1
+
+
+async def send_inputs(ws, rate: float, stop: asyncio.Event, rng: random.Random):
+    """Key presses at random intervals averaging ``rate`` a second, never reversing."""
+    direction = rng.choice(list(DIRECTIONS))
+    while not stop.is_set():
+        await asyncio.sleep(rng.expovariate(rate))
+        turns = [d for d in DIRECTIONS if d not in (direction, OPPOSITES[direction])]
+        direction = rng.choice(turns)
+        await ws.send(json.dumps({"type": "input", "direction": direction}))
+
+
+def http_json(url: str):
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+async def poll_frame_times(url: str, rooms: set[str], tick_times: dict, stop: asyncio.Event):
+    """Collect the server's tick time per (room, seq) before its history wraps."""
+    while True:
+        data = await asyncio.to_thread(http_json, url + "/debug/frames")
+        for room_id, pairs in data.items():
+            if room_id in rooms:
+                for seq, at in pairs:
+                    tick_times[room_id, seq] = at
+        if stop.is_set():
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), 1.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """User plus system CPU seconds of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scenario(url: str, players: int, tick_rate: int, args, scenario: int,
+                       server_pid: Optional[int]) -> dict:
+    args.current_tick_rate = tick_rate
+    rng = random.Random(args.seed + scenario)
+    interval = 1.0 / tick_rate
+    room_count = -(-players // args.room_size)
+    setups = []
+    for i in range(room_count):
+        size = min(args.room_size, players - i * args.room_size)
+        setups.append(RoomSetup(f"load{os.getpid()}-{scenario}-{i}", size))
+    stop = asyncio.Event()
+    recording = asyncio.Event()
+    logs = []
+    tasks = []
+    for setup in setups:
+        for j in range(setup.size):
+            log = ClientLog(setup.room_id)
+            logs.append(log)
+            tasks.append(asyncio.create_task(run_client(
+                url, setup, j == 0, args, log, stop, recording, random.Random(rng.random()))))
+            if args.connect_rate:
+                await asyncio.sleep(1.0 / args.connect_rate)
+
+    await asyncio.sleep(args.warmup)
+    tick_times: dict[tuple[str, int], float] = {}
+    poller_stop = asyncio.Event()
+    rooms = {s.room_id for s in setups}
+    poller = asyncio.create_task(poll_frame_times(url, rooms, tick_times, poller_stop))
+    server_cpu = process_cpu_seconds(server_pid) if server_pid else None
+    own_cpu = time.process_time()
+    started = time.monotonic()
+    recording.set()
+    await asyncio.sleep(args.duration)
+    recording.clear()
+    elapsed = time.monotonic() - started
+    own_cpu = time.process_time() - own_cpu
+    if server_cpu is not None:
+        server_cpu = process_cpu_seconds(server_pid) - server_cpu
+    poller_stop.set()
+    await poller
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    latencies = []
+    jitter = []
+    received = dropped = late = 0
+    for log in logs:
+        received += len(log.frames)
+        prev = None
+        for seq, at in log.frames:
+            sent = tick_times.get((log.room_id, seq))
+            if sent is not None:
+                latency = at - sent
+                latencies.append(latency)
+                if latency > interval:
+                    late += 1
+            if prev is not None:
+                if seq > prev[0] + 1:
+                    dropped += seq - prev[0] - 1
+                elif seq == prev[0] + 1:
+                    jitter.append(abs(at - prev[1] - interval))
+            prev = (seq, at)
+    return {
+        "players": players,
+        "rooms": room_count,
+        "tick_rate": tick_rate,
+        "frames": received,
+        "matched": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "jitter_ms": statistics.fmean(jitter) * 1000 if jitter else float("nan"),
+        "dropped": dropped,
+        "late": late,
+        "errors": sum(log.errors for log in logs),
+        "server_cpu": server_cpu / elapsed * 100 if server_cpu is not None else None,
+        "loadgen_cpu": own_cpu / elapsed * 100,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port), WS_PER_MESSAGE_DEFLATE="0")
+    server = subprocess.Popen([sys.executable, "-m", "src.main"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            http_json(f"http://127.0.0.1:{port}/rooms")
+            return server
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.1)
+    server.kill()
+    raise SystemExit("server did not start")
+
+
+def parse_ints(text: str) -> list[int]:
+    return [int(part) for part in text.split(",")]
+
+
+async def main_async(args):
+    server = None
+    url = args.url.rstrip("/") if args.url else None
+    server_pid = args.server_pid
+    if url is None:
+        port = free_port()
+        server = start_server(port)
+        url = f"http://127.0.0.1:{port}"
+        server_pid = server.pid
+    try:
+        print(f"{'players':>7} {'rooms':>5} {'rate':>4} {'frames':>8} {'p50 ms':>7} "
+              f"{'p99 ms':>7} {'jitter':>7} {'dropped':>7} {'late':>6} {'errors':>6} "
+              f"{'server%':>7} {'loadgen%':>8}")
+        scenario = 0
+        for tick_rate in parse_ints(args.tick_rate):
+            for players in parse_ints(args.players):
+                r = await run_scenario(url, players, tick_rate, args, scenario, server_pid)
+                scenario += 1
+                if r["server_cpu"] is not None:
+                    server_cpu = f"{r['server_cpu']:7.1f}"
+                else:
+                    server_cpu = f"{'-':>7}"
+                print(f"{r['players']:>7} {r['rooms']:>5} {r['tick_rate']:>4} {r['frames']:>8} "
+                      f"{r['p50_ms']:7.2f} {r['p99_ms']:7.2f} {r['jitter_ms']:7.2f} "
+                      f"{r['dropped']:>7} {r['late']:>6} {r['errors']:>6} {server_cpu} "
+                      f"{r['loadgen_cpu']:8.1f}", flush=True)
+                if r["matched"] < r["frames"]:
+                    print(f"        {r['frames'] - r['matched']} frames had no server tick time "
+                          "(is the server on this machine?)")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url",
+                        help="server to drive, e.g. http://127.0.0.1:8765 (default: start one)")
+    parser.add_argument("--server-pid", type=int, help="pid of the --url server, for its CPU use")
+    parser.add_argument("--players", default="20,100", help="comma-separated client counts to try")
+    parser.add_argument("--tick-rate", default="10", help="comma-separated tick rates to try")
+    parser.add_argument("--room-size", type=int, default=8, help="clients per room")
+    parser.add_argument("--bots", type=int, default=0, help="bots added to each room")
+    parser.add_argument("--encoding", choices=("json", "binary"), default="binary")
+    parser.add_argument("--collisions", action="store_true",
+                        help="let snakes collide (games end sooner)")
+    parser.add_argument("--input-rate", type=float, default=3.0,
+                        help="key presses per client per second")
+    parser.add_argument("--connect-rate", type=float, default=200.0,
+                        help="new connections per second (0: all at once)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds before measuring")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="seconds measured per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Tick cost with long snakes.
+
+Snakes follow a Hamiltonian cycle of the level 1 interior, so they never
+hit a wall or themselves however long they are. Collisions are off so
+several snakes can share the cycle.
+
+    python -m benchmarks.long_snake
+"""
+
+import random
+import time
+
+from src.constants import GRID_W, GRID_H, DIRECTIONS
+from src.game import GameState
+from src.models import PlayerLocation, PlayerState
+
+STEP_TO_DIRECTION = {v: k for k, v in DIRECTIONS.items()}
+
+
+def hamiltonian_cycle() -> list[tuple[int, int]]:
+    """A cycle through every interior cell of the bordered board."""
+    cycle = [(x, 1) for x in range(1, GRID_W - 1)]
+    for row, y in enumerate(range(2, GRID_H - 1)):
+        xs = range(GRID_W - 2, 1, -1) if row % 2 == 0 else range(2, GRID_W - 1)
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((1, y) for y in range(GRID_H - 2, 1, -1))
+    return cycle
+
+
+def build_game(players: int, length: int) -> tuple[GameState, list[tuple[int, int]]]:
+    cycle = hamiltonian_cycle()
+    game = GameState(rng=random.Random(0))
+    game.game_options["collisions"] = False
+    game.game_options["food_count"] = 0
+    game.game_options["food_to_advance"] = 10 ** 9
+    game.started = True
+    spacing = len(cycle) // players
+    for i in range(players):
+        p = PlayerState(pid=f"p{i}", name=f"p{i}", color="#ff00ff", location=PlayerLocation.PLAYING)
+        game.players[p.pid] = p
+        head = (i * spacing + length) % len(cycle)
+        game.set_body(p, [game.grid.cell(*cycle[(head - k) % len(cycle)]) for k in range(length)])
+        (hx, hy), (nx, ny) = cycle[head], cycle[(head + 1) % len(cycle)]
+        p.direction = STEP_TO_DIRECTION[(nx - hx, ny - hy)]
+    return game, cycle
+
+
+def steer(game: GameState, cycle: list[tuple[int, int]], position: dict):
+    for p in game.players.values():
+        hx, hy = game.grid.xy(p.segments[0])
+        nx, ny = cycle[(position[hx, hy] + 1) % len(cycle)]
+        p.next_direction = STEP_TO_DIRECTION[(nx - hx, ny - hy)]
+
+
+def run(players: int, length: int, ticks: int) -> float:
+    """Return microseconds per tick."""
+    game, cycle = build_game(players, length)
+    position = {cell: i for i, cell in enumerate(cycle)}
+    elapsed = 0.0
+    for _ in range(ticks):
+        steer(game, cycle, position)
+        started = time.perf_counter()
+        game.tick()
+        elapsed += time.perf_counter() - started
+    return elapsed / ticks * 1e6
+
+
+def main():
+    print(f"{'players':>8} {'length':>7} {'us/tick':>10}")
+    for players, length in [(1, 10), (1, 500), (1, 1000), (4, 250), (8, 125), (8, 1000)]:
+        print(f"{players:>8} {length:>7} {run(players, length, 2000):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Re-run a recorded match as fast as possible and time its ticks.
+
+Matches are recorded when the server runs with ``RECORD_DIR`` set. The
+replay applies the recorded inputs to a game seeded like the original, so
+it plays out the same way, and checks the fingerprints written every
+``RECORD_FLUSH_TICKS`` ticks along the way.
+
+    python -m benchmarks.replay recordings/main-20261017-101500-1a2b3c4d.rec.gz
+    python -m benchmarks.replay FILE --ticks 1200
+
+Reports ticks per second, per-tick percentiles and the slowest tick; rerun
+with ``--ticks`` up to it to stop the game right there.
+"""
+
+import argparse
+import time
+
+from src.recording import fingerprint
+from src.replay import Replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--ticks", type=int, help="stop after this many ticks")
+    args = parser.parse_args()
+
+    replay = Replay(args.path)
+    perf_counter = time.perf_counter
+    tick_times = []
+    while args.ticks is None or replay.ticks < args.ticks:
+        started = perf_counter()
+        if not replay.step():
+            break
+        tick_times.append(perf_counter() - started)
+
+    header = replay.header
+    players = len(header["players"])
+    cut_short = "" if replay.ended or args.ticks else " (recording cut short)"
+    print(f"room          {header['room']}, seed {header['seed']}, {players} players")
+    print(f"ticks         {replay.ticks}{cut_short}")
+    if tick_times:
+        ordered = sorted(tick_times)
+        slowest = max(range(len(tick_times)), key=tick_times.__getitem__)
+        print(f"ticks/s       {len(tick_times) / sum(tick_times):,.0f}")
+        print(f"p50 / p99     {ordered[len(ordered) // 2] * 1e6:.1f} / "
+              f"{ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6:.1f} us")
+        print(f"slowest       {tick_times[slowest] * 1e6:.1f} us at tick {slowest + 1}")
+    if replay.diverged_at is None:
+        print(f"fingerprints  {replay.checked} checked, all match")
+    else:
+        print(f"fingerprints  diverged by tick {replay.diverged_at}")
+    print(f"fingerprint   {fingerprint(replay.game)}")
+
+
+if __name__ == "__main__":
+    main()
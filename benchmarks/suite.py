@@ -0,0 +1,363 @@
+"""Benchmark suite for the server's hot paths, with a stored baseline.
+
+Measures, with fixed seeds so only timings vary between runs:
+
+- ``tick``: ``GameState.tick`` for 1-16 players on levels 1-8, with bots,
+  and with long snakes
+- ``serialize``: ``build_state_msg`` (JSON and binary), per-tick deltas and
+  ``build_lobby_msg``: bytes and encode time, with and without custom heads
+- ``spawn``: ``find_safe_spot`` and ``spawn_food`` on boards 50-95% full of
+  snake, including how often a spawn finds a spot with a runway
+- ``broadcast``: ``ConnectionManager.broadcast_state`` to 10-1000 in-process
+  fake sockets, enqueue only and until every socket has sent
+
+    python -m benchmarks.suite                   # run and compare with the baseline
+    python -m benchmarks.suite --only spawn,tick
+    python -m benchmarks.suite --save            # store this run as the baseline
+
+Times are medians of separately timed calls or ticks, best of ``--repeat``
+runs. Compared with the baseline, a time more than ``--threshold`` (default
+25%) worse, or a size or ratio more than 1% worse, is a regression and makes
+the exit status 1. Sizes and ratios are exact; times only compare on an
+otherwise idle machine, the one that saved the baseline.
+"""
+
+import argparse
+import asyncio
+import base64
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Iterator
+
+from src.ai import AIEngine
+from src.assets import HeadAssetStore
+from src.connection_manager import ConnectionManager, StateEncoder, build_lobby_msg, build_state_msg
+from src.constants import DIRECTIONS, TOTAL_LEVELS
+from src.game import GameState
+from src.models import PlayerLocation, PlayerState
+from src.wire import Frame
+
+from benchmarks import headless, long_snake
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# unit -> which way is better; times are noisy, the rest is deterministic
+UNITS = {"us": "lower", "bytes": "lower", "ratio": "higher"}
+EXACT_THRESHOLD = 0.01
+# Sizes and ratios come from this many ticks or calls in every mode, so --quick compares
+# with a full baseline
+SAMPLES = 200
+
+Metric = tuple[str, float, str]
+
+
+def best_of(repeat: int, fn: Callable[[], float]) -> float:
+    results = []
+    for _ in range(repeat):
+        gc.collect()
+        results.append(fn())
+    return min(results)
+
+
+def median_us(times: list[float]) -> float:
+    return statistics.median(times) * 1e6
+
+
+def per_call(calls: int, fn: Callable[[], object]) -> Callable[[], float]:
+    """A measurement of the median microseconds of ``calls`` separately timed calls.
+
+    Medians of single calls shrug off the bursts of a busy machine that skew
+    the mean of one long loop.
+    """
+    def measure():
+        perf_counter = time.perf_counter
+        times = []
+        for _ in range(calls):
+            started = perf_counter()
+            fn()
+            times.append(perf_counter() - started)
+        return median_us(times)
+    return measure
+
+
+def played_game(players: int, ticks: int, level: int = 1, seed: int = 0,
+                custom_heads: bool = False) -> GameState:
+    """A game ``ticks`` ticks in, with ``players`` humans steered like bots."""
+    game, clock = headless.build_game(players, 0, level, seed, {"food_to_advance": 10 ** 9})
+    if custom_heads:
+        store = HeadAssetStore()
+        for i, p in enumerate(game.players.values()):
+            image = random.Random(i).randbytes(2048)
+            data_url = "data:image/png;base64," + base64.b64encode(image).decode()
+            p.custom_head_id = store.register(data_url)
+    steering = AIEngine(random.Random(seed + 1))
+    interval = 1.0 / game.game_options["tick_rate"]
+    for _ in range(ticks):
+        alive = [p for p in game.players.values() if p.alive]
+        for p, direction in zip(alive, steering.decide(game, alive)):
+            p.next_direction = direction
+        game.tick()
+        clock.advance(interval)
+    return game
+
+
+def bench_tick(repeat: int, quick: bool) -> Iterator[Metric]:
+    ticks = 200 if quick else 600
+    for level in range(1, TOTAL_LEVELS + 1):
+        for players in (1, 8, 16):
+            def run(players=players, level=level):
+                result = headless.run(ticks, players, 0, level,
+                                      options={"food_to_advance": 10 ** 9})
+                return median_us(result.tick_times)
+            yield f"tick/level{level}/players{players}", best_of(repeat, run), "us"
+    for bots in (4, 16):
+        def run(bots=bots):
+            result = headless.run(ticks, 0, bots, options={"food_to_advance": 10 ** 9})
+            return median_us(result.tick_times)
+        yield f"tick/level1/bots{bots}", best_of(repeat, run), "us"
+    for players, length in ((1, 500), (8, 125), (8, 1000)):
+        def run(players=players, length=length):
+            game, cycle = long_snake.build_game(players, length)
+            position = {cell: i for i, cell in enumerate(cycle)}
+            times = []
+            for _ in range(ticks):
+                long_snake.steer(game, cycle, position)
+                started = time.perf_counter()
+                game.tick()
+                times.append(time.perf_counter() - started)
+            return median_us(times)
+        yield f"tick/long/players{players}/length{length}", best_of(repeat, run), "us"
+
+
+def bench_serialize(repeat: int, quick: bool) -> Iterator[Metric]:
+    rounds = 100 if quick else 400
+    for players in (2, 8, 16):
+        for custom_heads in (False, True):
+            game = played_game(players, 150, custom_heads=custom_heads)
+            name = f"serialize/players{players}" + ("/custom_heads" if custom_heads else "")
+            frame = build_state_msg(game, 1)
+
+            state_json = per_call(rounds, lambda game=game: build_state_msg(game, 1).text)
+            state_binary = per_call(rounds, lambda game=game: build_state_msg(game, 1).binary)
+            lobby = per_call(rounds, lambda game=game: build_lobby_msg(game))
+            yield f"{name}/state_json", len(frame.text), "bytes"
+            yield f"{name}/state_json", best_of(repeat, state_json), "us"
+            yield f"{name}/state_binary", len(frame.binary), "bytes"
+            yield f"{name}/state_binary", best_of(repeat, state_binary), "us"
+            yield f"{name}/lobby", len(build_lobby_msg(game)), "bytes"
+            yield f"{name}/lobby", best_of(repeat, lobby), "us"
+
+        # Deltas need consecutive ticks, so they come from one recorded run
+        game, clock = headless.build_game(players, 0, 1, 0, {"food_to_advance": 10 ** 9})
+        steering = AIEngine(random.Random(1))
+        encoder = StateEncoder()
+        sizes = []
+        times = []
+        for _ in range(SAMPLES):
+            alive = [p for p in game.players.values() if p.alive]
+            for p, direction in zip(alive, steering.decide(game, alive)):
+                p.next_direction = direction
+            game.tick()
+            clock.advance(1.0 / game.game_options["tick_rate"])
+            started = time.perf_counter()
+            frame = encoder.encode(game)
+            payload = frame.text
+            times.append(time.perf_counter() - started)
+            if frame.data["type"] == "state_delta":
+                sizes.append(len(payload))
+        yield f"serialize/players{players}/delta_json", sum(sizes) / len(sizes), "bytes"
+        yield f"serialize/players{players}/delta_json", median_us(times), "us"
+
+
+def crowded_game(fill: float, seed: int = 0) -> GameState:
+    """Level 1 with ``fill`` of the interior covered by 8 snakes end to end."""
+    cycle = long_snake.hamiltonian_cycle()
+    game = GameState(rng=random.Random(seed))
+    game.game_options["food_count"] = 0
+    length = int(len(cycle) * fill) // 8
+    for i in range(8):
+        p = PlayerState(pid=f"p{i}", name=f"p{i}", color="#ff00ff", location=PlayerLocation.PLAYING)
+        game.players[p.pid] = p
+        start = i * len(cycle) // 8
+        game.set_body(p, [game.grid.cell(*cycle[(start + k) % len(cycle)]) for k in range(length)])
+    return game
+
+
+def has_runway(game: GameState, segments: list[int], direction: str, runway: int = 10) -> bool:
+    """Is the spawn a full 3-cell body with ``runway`` free cells ahead?"""
+    if len(segments) < 3:
+        return False
+    x, y = game.grid.xy(segments[0])
+    dx, dy = DIRECTIONS[direction]
+    return not any(game.grid.is_blocked(x + dx * step, y + dy * step)
+                   for step in range(1, runway + 1))
+
+
+def bench_spawn(repeat: int, quick: bool) -> Iterator[Metric]:
+    calls = 200 if quick else 1000
+    for fill in (0.5, 0.8, 0.95):
+        name = f"spawn/fill{int(fill * 100)}"
+        game = crowded_game(fill)
+        game.game_options["food_count"] = 5
+
+        def food(game=game):
+            game.clear_food()
+            game.spawn_food()
+
+        game.rng.seed(0)
+        runways = sum(has_runway(game, *game.find_safe_spot()) for _ in range(SAMPLES))
+        placed = 0
+        for _ in range(SAMPLES):
+            game.clear_food()
+            game.spawn_food()
+            placed += len(game.food)
+        yield f"{name}/find_safe_spot", best_of(repeat, per_call(calls, game.find_safe_spot)), "us"
+        yield f"{name}/find_safe_spot_runway", runways / SAMPLES, "ratio"
+        yield f"{name}/spawn_food", best_of(repeat, per_call(calls, food)), "us"
+        yield f"{name}/spawn_food_placed", placed / (SAMPLES * 5), "ratio"
+
+
+class FakeSocket:
+    """Accepts sends instantly, like a client on a perfect network."""
+
+    async def send_text(self, data: str):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def _broadcast(sockets: int, rounds: int, frames: list) -> tuple[float, float]:
+    """Return the median (enqueue, delivered) microseconds per broadcast."""
+    manager = ConnectionManager()
+    for i in range(sockets):
+        # Half the clients negotiated the binary encoding
+        manager.connect(FakeSocket(), f"p{i}", binary=i % 2 == 1)
+    connections = list(manager.connections.values())
+    await asyncio.sleep(0)  # let every writer task start and wait
+    enqueue = []
+    delivered = []
+    for i in range(rounds):
+        source = frames[i % len(frames)]
+        frame = Frame(source.data, source.width)
+        started = time.perf_counter()
+        manager.prepare(frame)
+        await manager.broadcast_state(frame)
+        queued = time.perf_counter()
+        while any(conn.queue for conn in connections):
+            await asyncio.sleep(0)
+        enqueue.append(queued - started)
+        delivered.append(time.perf_counter() - started)
+    for ws in list(manager.connections):
+        manager.disconnect(ws)
+    return median_us(enqueue), median_us(delivered)
+
+
+def bench_broadcast(repeat: int, quick: bool) -> Iterator[Metric]:
+    rounds = 20 if quick else 100
+    game, clock = headless.build_game(8, 0, 1, 0, {"food_to_advance": 10 ** 9})
+    steering = AIEngine(random.Random(1))
+    encoder = StateEncoder()
+    frames = []
+    for _ in range(50):
+        alive = [p for p in game.players.values() if p.alive]
+        for p, direction in zip(alive, steering.decide(game, alive)):
+            p.next_direction = direction
+        game.tick()
+        clock.advance(1.0 / game.game_options["tick_rate"])
+        frames.append(encoder.encode(game))
+    for sockets in (10, 100, 1000):
+        runs = [asyncio.run(_broadcast(sockets, rounds, frames)) for _ in range(repeat)]
+        yield f"broadcast/sockets{sockets}/enqueue", min(r[0] for r in runs), "us"
+        yield f"broadcast/sockets{sockets}/delivered", min(r[1] for r in runs), "us"
+
+
+CASES = {
+    "tick": bench_tick,
+    "serialize": bench_serialize,
+    "spawn": bench_spawn,
+    "broadcast": bench_broadcast,
+}
+
+
+def load_baseline(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)["metrics"]
+    except FileNotFoundError:
+        return {}
+
+
+def compare(value: float, unit: str, base: dict, threshold: float) -> tuple[str, bool]:
+    """Return (change column, is regression) against a baseline entry."""
+    if not base or base["unit"] != unit:
+        return "new", False
+    old = base["value"]
+    if old == 0:
+        return ("=" if value == 0 else "n/a"), False
+    change = (value - old) / old
+    worse = change if UNITS[unit] == "lower" else -change
+    limit = threshold if unit == "us" else EXACT_THRESHOLD
+    return f"{change:+.1%}", worse > limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", help="comma-separated cases: " + ", ".join(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true",
+                        help="fewer ticks and rounds per measurement")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before a time regresses")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write this run to the baseline file")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(CASES)
+    unknown = [name for name in selected if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case: {', '.join(unknown)}")
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+    print(f"{'metric':<52} {'value':>12} {'unit':<6} {'baseline':>12} {'change':>8}")
+    for case in selected:
+        for name, value, unit in CASES[case](args.repeat, args.quick):
+            key = f"{name} [{unit}]"
+            base = baseline.get(key)
+            results[key] = {"value": round(value, 4), "unit": unit}
+            change, regressed = compare(value, unit, base, args.threshold)
+            old = f"{base['value']:12.2f}" if base else f"{'-':>12}"
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<52} {value:12.2f} {unit:<6} {old} {change:>8}{flag}")
+            if regressed:
+                regressions.append(name)
+
+    if args.save:
+        # Keep baseline entries for cases that weren't run this time
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "metrics": dict(sorted(merged.items())),
+            }, f, indent=1)
+            f.write("\n")
+        print(f"saved {len(results)} metrics to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) against the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
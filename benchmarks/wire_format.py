@@ -0,0 +1,72 @@
+"""Bytes per frame and encode time, JSON vs binary.
+
+Bots play a real game; every tick's state frame (keyframe or delta) is
+encoded both ways from the same message dict.
+
+    python -m benchmarks.wire_format
+"""
+
+import json
+import random
+import time
+
+from src.connection_manager import StateEncoder
+from src.game import GameState
+from src.models import PlayerLocation
+from src.wire import encode_frame
+
+
+def play(bots: int, ticks: int) -> list:
+    """Return the state frames of ``ticks`` ticks with ``bots`` bots."""
+    game = GameState(rng=random.Random(0))
+    game.game_options["lives"] = 10 ** 6
+    for _ in range(bots):
+        game.add_ai()
+    for p in game.players.values():
+        p.location = PlayerLocation.PLAYING
+    game.start_game()
+    encoder = StateEncoder()
+    frames = []
+    for _ in range(ticks):
+        game.tick()
+        # Skip the real-time waits for respawns, AI pacing and level countdowns
+        for p in game.players.values():
+            if p.respawn_at:
+                p.respawn_at = 1
+            p.ai_decision_at = 0
+        if game.level_changing:
+            game.level_change_at = 0
+        frames.append(encoder.encode(game))
+    return frames
+
+
+def measure(frames: list, encode) -> tuple[float, float]:
+    """Return (average bytes, average microseconds) per frame."""
+    total_bytes = 0
+    started = time.perf_counter()
+    for frame in frames:
+        total_bytes += len(encode(frame))
+    elapsed = time.perf_counter() - started
+    return total_bytes / len(frames), elapsed / len(frames) * 1e6
+
+
+def main():
+    encoders = {
+        "json": lambda f: json.dumps(f.data).encode(),
+        "binary": lambda f: encode_frame(f.data, f.width),
+    }
+    print(f"{'bots':>5} {'frames':>7} {'format':>7} {'kind':>9} {'bytes':>8} {'us':>8}")
+    for bots in (2, 8, 16):
+        frames = play(bots, 1000)
+        kinds = {
+            "keyframe": [f for f in frames if f.data["type"] == "state"],
+            "delta": [f for f in frames if f.data["type"] == "state_delta"],
+        }
+        for name, encode in encoders.items():
+            for kind, subset in kinds.items():
+                size, us = measure(subset, encode)
+                print(f"{bots:>5} {len(subset):>7} {name:>7} {kind:>9} {size:>8.0f} {us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Batched decision step for AI snakes."""
+
+import random
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional; the pure Python path makes the same decisions
+    np = None
+
+from .constants import AI_LOOKAHEAD_CELLS, DIRECTIONS, OPPOSITES
+from .models import PlayerState
+from .pathfinding import open_area
+
+# Bot difficulty levels: 0=Easy, 1=Medium, 2=Hard
+# intelligence: chance to move toward food (vs random safe direction)
+# mistake_rate: chance to pick ANY direction including unsafe/fatal ones
+BOT_DIFFICULTY = {
+    0: {"name": "Easy", "intelligence": 0.40, "mistake_rate": 0.20},
+    1: {"name": "Medium", "intelligence": 0.65, "mistake_rate": 0.10},
+    2: {"name": "Hard", "intelligence": 0.80, "mistake_rate": 0.03},
+}
+
+DIRECTION_NAMES = tuple(DIRECTIONS)
+REVERSE_INDEX = {d: DIRECTION_NAMES.index(OPPOSITES[d]) for d in DIRECTION_NAMES}
+
+
+class AIEngine:
+    """Decides the next direction for every bot that is due, in one pass.
+
+    Which of each bot's moves are safe is worked out for all bots at once,
+    optionally vectorized over the occupancy grid with NumPy (``use_numpy``;
+    on the default board the plain loop is faster, see
+    ``benchmarks/ai_decisions.py``). Random rolls come from ``rng`` in a fixed
+    order per bot, so a seeded engine makes the same decisions either way.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None, use_numpy: bool = False):
+        self.rng = rng if rng is not None else random.Random()
+        self.use_numpy = use_numpy and np is not None
+        self.decisions = 0
+
+    def decide(self, game, bots: list[PlayerState]) -> list[str]:
+        """Return the chosen direction for each bot, in order."""
+        if not bots:
+            return []
+        self.decisions += len(bots)
+        if not game.food:
+            return [p.direction for p in bots]
+
+        difficulty = BOT_DIFFICULTY.get(game.game_options.get("bot_difficulty", 1),
+                                        BOT_DIFFICULTY[1])
+        intelligence = difficulty["intelligence"]
+        mistake_rate = difficulty["mistake_rate"]
+        if self.use_numpy:
+            moves = self._safe_moves_numpy(game, bots)
+        else:
+            moves = self._safe_moves(game, bots)
+
+        rng = self.rng
+        grid = game.grid
+        collisions = game.game_options["collisions"]
+        dist = None
+        choices = []
+        for p, safe in zip(bots, moves):
+            if safe is None:
+                choices.append(p.direction)
+            # Roll for mistake - chance to pick ANY direction including unsafe/fatal ones
+            elif rng.random() < mistake_rate:
+                choices.append(DIRECTION_NAMES[int(rng.random() * 4)])
+            elif not safe:
+                choices.append(p.direction)  # No safe moves, accept fate
+            elif rng.random() < intelligence:
+                # Intelligent: take the shortest path to the nearest food, unless
+                # that move leads into a pocket too small for the body
+                if dist is None:
+                    dist = game.food_distances()
+                need = min(len(p.segments) + 1, AI_LOOKAHEAD_CELLS)
+                body = None if collisions else p.segments
+                # Closest first; the random fraction breaks ties between equal distances
+                safe.sort(key=lambda dc: dist[dc[1]] + rng.random())
+                best_area, choice = -1, safe[0][0]
+                for d, cell in safe:
+                    area = open_area(grid, cell, need, body)
+                    if area >= need:
+                        choice = d
+                        break
+                    if area > best_area:
+                        best_area, choice = area, d
+                choices.append(choice)
+            else:
+                # Non-intelligent: pick random safe direction
+                choices.append(safe[int(rng.random() * len(safe))][0])
+        return choices
+
+    def _safe_moves(self, game, bots: list[PlayerState]) -> list[Optional[list[tuple[str, int]]]]:
+        """Per bot, the (direction, cell) moves that don't hit a wall or snake.
+
+        No reversing; a bot's own tail cell counts as free because it moves
+        away this tick. None for bots without a body.
+        """
+        grid = game.grid
+        width, height = grid.width, grid.height
+        walls, snakes = grid.walls, grid.snakes
+        collisions = game.game_options["collisions"]
+        candidates = [(d, dx, dy, grid.steps[d], OPPOSITES[d])
+                      for d, (dx, dy) in DIRECTIONS.items()]
+        result = []
+        for p in bots:
+            body = p.segments
+            if not body:
+                result.append(None)
+                continue
+            head, tail = body[0], body[-1]
+            hy, hx = divmod(head, width)
+            safe = []
+            for d, dx, dy, step, opposite in candidates:
+                if opposite == p.direction:
+                    continue
+                x, y = hx + dx, hy + dy
+                if x <= 0 or x >= width - 1 or y <= 0 or y >= height - 1:
+                    continue
+                cell = head + step
+                if walls[cell]:
+                    continue
+                occupied = snakes[cell]
+                if occupied:
+                    if cell == tail:
+                        occupied -= 1
+                    if occupied and (collisions or body.contains_before_tail(cell)):
+                        continue
+                safe.append((d, cell))
+            result.append(safe)
+        return result
+
+    def _safe_moves_numpy(self, game,
+                          bots: list[PlayerState]) -> list[Optional[list[tuple[str, int]]]]:
+        """``_safe_moves`` for all bots at once as (bots x 4) array operations."""
+        grid = game.grid
+        width, height = grid.width, grid.height
+        alive = [p for p in bots if p.segments]
+        if not alive:
+            return [None] * len(bots)
+        heads = np.array([p.segments[0] for p in alive])
+        tails = np.array([p.segments[-1] for p in alive])
+        facing = np.array([REVERSE_INDEX[p.direction] for p in alive])
+        dx = np.array([DIRECTIONS[d][0] for d in DIRECTION_NAMES])
+        dy = np.array([DIRECTIONS[d][1] for d in DIRECTION_NAMES])
+
+        x = (heads % width)[:, None] + dx
+        y = (heads // width)[:, None] + dy
+        inside = (x > 0) & (x < width - 1) & (y > 0) & (y < height - 1)
+        cells = np.where(inside, y * width + x, 0)
+        walls = np.frombuffer(grid.walls, np.uint8)
+        snakes = np.frombuffer(grid.snakes, np.uint8)
+        occupied = snakes[cells].astype(np.int16) - (cells == tails[:, None])
+
+        ok = inside & (walls[cells] == 0) & (np.arange(4) != facing[:, None])
+        if game.game_options["collisions"]:
+            ok &= occupied <= 0
+        else:
+            # Only a bot's own body blocks it; check the few occupied candidates one by one
+            for i, j in zip(*np.nonzero(ok & (occupied > 0))):
+                if alive[i].segments.contains_before_tail(int(cells[i, j])):
+                    ok[i, j] = False
+
+        safe_by_bot = {}
+        for p, row, row_cells in zip(alive, ok.tolist(), cells.tolist()):
+            safe_by_bot[p.pid] = [(DIRECTION_NAMES[j], row_cells[j]) for j in range(4) if row[j]]
+        return [safe_by_bot.get(p.pid) if p.segments else None for p in bots]
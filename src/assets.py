@@ -0,0 +1,49 @@
+"""Content-addressed storage for player-uploaded custom heads."""
+
+import base64
+import binascii
+import hashlib
+from typing import Optional
+
+
+class HeadAssetStore:
+    """Holds decoded custom head images keyed by a short content hash.
+
+    Images are registered once when a player joins and then served from a
+    cacheable HTTP route, so per-tick state messages only carry the hash.
+    Identical uploads share one entry and are reference counted.
+    """
+
+    def __init__(self):
+        self._assets: dict[str, tuple[str, bytes]] = {}
+        self._refs: dict[str, int] = {}
+
+    def register(self, data_url: str) -> Optional[str]:
+        """Register a validated data URL and return its asset id (None if undecodable)."""
+        header, _, payload = data_url.partition(",")
+        media_type = header[len("data:"):].split(";", 1)[0]
+        try:
+            raw = base64.b64decode(payload, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        asset_id = hashlib.sha256(raw).hexdigest()[:16]
+        if asset_id not in self._assets:
+            self._assets[asset_id] = (media_type, raw)
+        self._refs[asset_id] = self._refs.get(asset_id, 0) + 1
+        return asset_id
+
+    def release(self, asset_id: Optional[str]):
+        """Drop one reference; the image is forgotten once nobody uses it."""
+        if asset_id is None or asset_id not in self._refs:
+            return
+        self._refs[asset_id] -= 1
+        if self._refs[asset_id] <= 0:
+            del self._refs[asset_id]
+            self._assets.pop(asset_id, None)
+
+    def get(self, asset_id: str) -> Optional[tuple[str, bytes]]:
+        """Return (media_type, image bytes) for an asset id."""
+        return self._assets.get(asset_id)
+
+    def __len__(self) -> int:
+        return len(self._assets)
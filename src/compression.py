@@ -0,0 +1,57 @@
+"""Optional application-level deflate for outbound WebSocket messages."""
+
+import os
+import zlib
+from typing import Iterable, Optional
+
+from .constants import COMPRESS_MIN_BYTES, COMPRESS_LEVEL
+
+# First byte of a compressed message: what the inflated payload is
+COMPRESSED_TEXT = 0xFE
+COMPRESSED_BINARY = 0xFF
+
+
+class Deflater:
+    """Compresses large messages with raw deflate, one message at a time.
+
+    A compressed message is sent as a binary frame: a marker byte saying
+    whether the original was JSON text or a binary frame, then the deflate
+    stream. Only messages of ``min_bytes`` or more are compressed, optionally
+    only for the message ``types`` listed; results that don't come out
+    smaller are discarded and the original is sent.
+    """
+
+    def __init__(self, min_bytes: int = COMPRESS_MIN_BYTES, level: int = COMPRESS_LEVEL,
+                 types: Optional[Iterable[str]] = None):
+        self.min_bytes = min_bytes
+        self.level = level
+        self.types = frozenset(types) if types else None
+
+    @classmethod
+    def from_env(cls) -> Optional["Deflater"]:
+        """``WS_COMPRESSION=deflate`` enables it; the other ``WS_COMPRESS_*`` variables tune it."""
+        if os.getenv("WS_COMPRESSION", "off").lower() != "deflate":
+            return None
+        types = [t.strip() for t in os.getenv("WS_COMPRESS_TYPES", "").split(",") if t.strip()]
+        return cls(
+            min_bytes=int(os.getenv("WS_COMPRESS_MIN_BYTES", str(COMPRESS_MIN_BYTES))),
+            level=int(os.getenv("WS_COMPRESS_LEVEL", str(COMPRESS_LEVEL))),
+            types=types,
+        )
+
+    def wants(self, msg_type: str, size: int) -> bool:
+        return size >= self.min_bytes and (self.types is None or msg_type in self.types)
+
+    def compress(self, payload: bytes, text: bool) -> Optional[bytes]:
+        """Return the compressed message, or None if it isn't smaller."""
+        deflate = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        marker = bytes((COMPRESSED_TEXT if text else COMPRESSED_BINARY,))
+        packed = marker + deflate.compress(payload) + deflate.flush()
+        return packed if len(packed) < len(payload) else None
+
+    def describe(self) -> dict:
+        return {
+            "min_bytes": self.min_bytes,
+            "level": self.level,
+            "types": sorted(self.types) if self.types else None,
+        }
@@ -1,45 +1,411 @@
 """WebSocket connection management and state serialization."""
 
+import asyncio
 import json
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Optional, Union
 
 from fastapi import WebSocket
 
-from .constants import GRID_W, GRID_H
+from . import metrics
+from .compression import Deflater
+from .constants import (
+    GRID_W, GRID_H, KEYFRAME_INTERVAL, SEND_QUEUE_LIMIT, SLOW_CLIENT_TIMEOUT, TOTAL_LEVELS,
+)
 from .game import GameState
+from .levels import LEVELS, CompiledLevel, get_level
 from .models import PlayerLocation
+from .wire import Frame
 
+# What a connection queues: (payload, message type, size before compression)
+Outbound = tuple[Union[str, bytes], str, int]
+
+
+def message_type(text: str) -> str:
+    """The ``type`` of a JSON message built by ``json.dumps({"type": ...})``."""
+    if text.startswith('{"type": "'):
+        end = text.find('"', 10)
+        if end > 0:
+            return text[10:end]
+    return "other"
+
+
+class MessageCounters:
+    """Bytes sent per message type, before and after compression.
+
+    ``raw_bytes`` is what the messages would have cost uncompressed (in the
+    encoding each client uses), ``wire_bytes`` what was actually sent, and
+    ``compress_ms`` the CPU spent deflating that type.
+    """
 
-class ConnectionManager:
     def __init__(self):
-        self.connections: dict[WebSocket, str] = {}
+        self.types: dict[str, dict] = {}
+
+    def _entry(self, msg_type: str) -> dict:
+        entry = self.types.get(msg_type)
+        if entry is None:
+            entry = self.types[msg_type] = {
+                "messages": 0, "compressed": 0, "raw_bytes": 0, "wire_bytes": 0,
+                "compress_calls": 0, "compress_ms": 0.0,
+            }
+        return entry
+
+    def record_send(self, msg_type: str, raw_bytes: int, wire_bytes: int):
+        entry = self._entry(msg_type)
+        entry["messages"] += 1
+        entry["raw_bytes"] += raw_bytes
+        entry["wire_bytes"] += wire_bytes
+        if wire_bytes != raw_bytes:
+            entry["compressed"] += 1
+
+    def record_compress(self, msg_type: str, seconds: float):
+        entry = self._entry(msg_type)
+        entry["compress_calls"] += 1
+        entry["compress_ms"] += seconds * 1000
+
+    def snapshot(self) -> dict:
+        data = {}
+        for msg_type, entry in sorted(self.types.items()):
+            item = dict(entry, compress_ms=round(entry["compress_ms"], 3))
+            raw = entry["raw_bytes"]
+            item["ratio"] = round(entry["wire_bytes"] / raw, 4) if raw else 1.0
+            data[msg_type] = item
+        return data
+
+
+class ClientConnection:
+    """Outbound side of one WebSocket: a bounded queue drained by a writer task.
+
+    State frames are droppable: when the queue is full the oldest queued state
+    frame is discarded (the client resyncs from the sequence gap). Other
+    messages are always delivered. A socket that stays full for longer than
+    ``slow_timeout`` seconds is closed, even if its writer is stuck in a send.
+    Clients that negotiated ``binary`` get the binary form of frames that have
+    one, and ``compress`` clients get large messages deflated.
+    """
+
+    def __init__(self, ws: WebSocket, player_id: str, binary: bool = False, compress: bool = False,
+                 counters: Optional[MessageCounters] = None,
+                 max_queue: int = SEND_QUEUE_LIMIT, slow_timeout: float = SLOW_CLIENT_TIMEOUT):
+        self.ws = ws
+        self.player_id = player_id
+        self.binary = binary
+        self.compress = compress
+        self.counters = counters
+        self.max_queue = max_queue
+        self.slow_timeout = slow_timeout
+        self.queue: deque[tuple[Outbound, bool]] = deque()
+        self.closed = False
+        self.backlogged_since: Optional[float] = None
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.send_ms_last = 0.0
+        self.send_ms_avg = 0.0
+        self.send_ms_max = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._writer())
+
+    def stop(self):
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+
+    def enqueue(self, message: Outbound, droppable: bool = False):
+        if self.closed:
+            return
+        if len(self.queue) >= self.max_queue:
+            now = time.monotonic()
+            if self.backlogged_since is None:
+                self.backlogged_since = now
+            elif now - self.backlogged_since > self.slow_timeout:
+                self._abort()
+                return
+            if droppable:
+                for i, (_, queued_droppable) in enumerate(self.queue):
+                    if queued_droppable:
+                        del self.queue[i]
+                        self.dropped += 1
+                        metrics.dropped_frames.inc()
+                        break
+                else:
+                    self.dropped += 1
+                    metrics.dropped_frames.inc()
+                    return
+        self.queue.append((message, droppable))
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self._wakeup.set()
+
+    def _abort(self):
+        """Give up on a socket that stayed backed up for too long.
+
+        The writer may be stuck in a send that never returns, so it is
+        cancelled rather than asked to close the socket; the receive loop sees
+        the close and cleans up.
+        """
+        metrics.slow_clients.inc()
+        self.stop()
+        self.queue.clear()
+        self._closer = asyncio.create_task(self._close())
 
-    async def connect(self, ws: WebSocket, player_id: str):
-        await ws.accept()
-        self.connections[ws] = player_id
+    async def _close(self):
+        try:
+            # The close handshake can stall on the same socket; don't wait on it forever
+            await asyncio.wait_for(self.ws.close(code=1013), self.slow_timeout)
+        except Exception:
+            pass
+
+    async def _writer(self):
+        try:
+            while True:
+                if not self.queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                (payload, msg_type, raw_bytes), _ = self.queue.popleft()
+                started = time.perf_counter()
+                if type(payload) is bytes:
+                    await self.ws.send_bytes(payload)
+                else:
+                    await self.ws.send_text(payload)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if self.counters is not None:
+                    self.counters.record_send(msg_type, raw_bytes, len(payload))
+                self.sent += 1
+                self.send_ms_last = elapsed_ms
+                self.send_ms_avg += (elapsed_ms - self.send_ms_avg) * 0.1
+                self.send_ms_max = max(self.send_ms_max, elapsed_ms)
+                if len(self.queue) < self.max_queue:
+                    self.backlogged_since = None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            metrics.send_failures.inc()
+        finally:
+            self.closed = True
+
+    def stats(self) -> dict:
+        return {
+            "player_id": self.player_id,
+            "encoding": "binary" if self.binary else "json",
+            "compress": self.compress,
+            "queue_depth": len(self.queue),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "send_ms_last": round(self.send_ms_last, 3),
+            "send_ms_avg": round(self.send_ms_avg, 3),
+            "send_ms_max": round(self.send_ms_max, 3),
+            "backlogged": self.backlogged_since is not None,
+        }
+
+
+class ConnectionManager:
+    """Fans messages out to every joined socket through per-connection queues.
+
+    Each message is serialized (and compressed) once per encoding and the same
+    payload is queued for every connection that uses it, so one slow client
+    never delays the others or the game loop.
+    """
+
+    def __init__(self, deflater: Optional[Deflater] = None):
+        self.connections: dict[WebSocket, ClientConnection] = {}
+        self.deflater = deflater
+        self.counters = MessageCounters()
+
+    def connect(self, ws: WebSocket, player_id: str, binary: bool = False,
+                compress: bool = False) -> ClientConnection:
+        """Register an accepted socket and start its writer task."""
+        compress = compress and self.deflater is not None
+        conn = self.connections.get(ws)
+        if conn is None:
+            conn = ClientConnection(ws, player_id, binary, compress, self.counters)
+            self.connections[ws] = conn
+            conn.start()
+        conn.player_id = player_id
+        conn.binary = binary
+        conn.compress = compress
+        return conn
 
     def disconnect(self, ws: WebSocket):
-        self.connections.pop(ws, None)
+        conn = self.connections.pop(ws, None)
+        if conn is not None:
+            conn.stop()
+
+    def prepare(self, frame: Frame):
+        """Encode a frame in every format the connected clients use."""
+        binary = text = False
+        for conn in self.connections.values():
+            if conn.binary:
+                binary = True
+            else:
+                text = True
+        frame.prepare(text, binary)
+
+    def _encode(self, message: Union[str, Frame], binary: bool, compress: bool) -> Outbound:
+        if type(message) is Frame:
+            msg_type = message.data["type"]
+            payload = message.binary if binary else message.text
+        else:
+            msg_type = message_type(message)
+            payload = message
+        # JSON text is ASCII, so its length is its size in bytes
+        raw_bytes = len(payload)
+        if compress and self.deflater.wants(msg_type, raw_bytes):
+            text = type(payload) is str
+            started = time.perf_counter()
+            packed = self.deflater.compress(payload.encode() if text else payload, text)
+            self.counters.record_compress(msg_type, time.perf_counter() - started)
+            if packed is not None:
+                payload = packed
+        return payload, msg_type, raw_bytes
 
-    async def broadcast(self, message: str):
+    async def broadcast(self, message: Union[str, Frame], droppable: bool = False):
         disconnected = []
-        for ws in self.connections:
-            try:
-                await ws.send_text(message)
-            except Exception:
+        encoded: dict[tuple[bool, bool], Outbound] = {}
+        for ws, conn in self.connections.items():
+            if conn.closed:
+                disconnected.append(ws)
+                continue
+            key = (conn.binary, conn.compress)
+            outbound = encoded.get(key)
+            if outbound is None:
+                outbound = encoded[key] = self._encode(message, conn.binary, conn.compress)
+            conn.enqueue(outbound, droppable)
+            if conn.closed:
+                disconnected.append(ws)
+        for ws in disconnected:
+            self.disconnect(ws)
+
+    async def broadcast_state(self, message: Union[str, Frame]):
+        """Broadcast a per-tick state frame, which slow sockets may drop."""
+        await self.broadcast(message, droppable=True)
+
+    def prepare_each(self, frames: dict[str, Frame]):
+        """``prepare`` for per-player frames: each in the formats its players' clients use."""
+        formats: dict[int, list] = {}
+        for conn in self.connections.values():
+            frame = frames.get(conn.player_id)
+            if frame is not None:
+                wanted = formats.setdefault(id(frame), [frame, False, False])
+                wanted[2 if conn.binary else 1] = True
+        for frame, text, binary in formats.values():
+            frame.prepare(text, binary)
+
+    async def send_states(self, frames: dict[str, Frame]):
+        """Queue each socket its player's state frame; sockets without one get nothing.
+
+        Players often share a frame, and it is encoded (and compressed) once
+        per format like a broadcast.
+        """
+        disconnected = []
+        encoded: dict[tuple[int, bool, bool], Outbound] = {}
+        for ws, conn in self.connections.items():
+            if conn.closed:
+                disconnected.append(ws)
+                continue
+            frame = frames.get(conn.player_id)
+            if frame is None:
+                continue
+            key = (id(frame), conn.binary, conn.compress)
+            outbound = encoded.get(key)
+            if outbound is None:
+                outbound = encoded[key] = self._encode(frame, conn.binary, conn.compress)
+            conn.enqueue(outbound, droppable=True)
+            if conn.closed:
                 disconnected.append(ws)
         for ws in disconnected:
-            self.connections.pop(ws, None)
+            self.disconnect(ws)
 
-    async def send_personal(self, ws: WebSocket, message: str):
-        await ws.send_text(message)
+    async def send_personal(self, ws: WebSocket, message: Union[str, Frame]):
+        conn = self.connections.get(ws)
+        if conn is None:
+            await ws.send_text(message.text if type(message) is Frame else message)
+        else:
+            conn.enqueue(self._encode(message, conn.binary, conn.compress))
+            if conn.closed:
+                self.disconnect(ws)
 
+    def stats(self) -> list[dict]:
+        return [conn.stats() for conn in self.connections.values()]
 
-def walls_to_list(walls) -> list[list[int]]:
-    return [[x, y] for x, y in sorted(walls)]
+    def message_stats(self) -> dict:
+        return {
+            "compression": self.deflater.describe() if self.deflater is not None else None,
+            "types": self.counters.snapshot(),
+        }
 
 
-def build_state_msg(game: GameState) -> str:
-    players_data = {}
+LEVEL_MSG_TYPES = ("game_start", "game_in_progress", "level_change")
+
+
+def _serialize_level_msg(msg_type: str, level: CompiledLevel) -> Frame:
+    data = {"type": msg_type, "level": level.number, "walls": level.wall_list}
+    if msg_type != "level_change":
+        data["grid"] = [level.width, level.height]
+    msg = Frame(data, level.width)
+    msg.prepare()
+    return msg
+
+
+# Serialized once, at import for the default board and on first use for
+# other sizes; the walls never change at runtime
+_LEVEL_MSGS = {
+    (msg_type, number): _serialize_level_msg(msg_type, level)
+    for number, level in LEVELS.items() for msg_type in LEVEL_MSG_TYPES
+}
+
+
+@lru_cache(maxsize=2 * TOTAL_LEVELS * len(LEVEL_MSG_TYPES))
+def _sized_level_msg(msg_type: str, level: int, width: int, height: int) -> Frame:
+    return _serialize_level_msg(msg_type, get_level(level, width, height))
+
+
+def build_level_msg(msg_type: str, level: int, width: int = GRID_W, height: int = GRID_H) -> Frame:
+    """``game_start``, ``game_in_progress`` or ``level_change`` for a level.
+
+    The message is for a ``width x height`` board.
+    """
+    if (width, height) == (GRID_W, GRID_H):
+        return _LEVEL_MSGS[msg_type, level]
+    return _sized_level_msg(msg_type, level, width, height)
+
+
+def player_fields(p) -> dict:
+    """Per-player state fields except the snake body.
+
+    ``input_seq`` is only for players with a client to read it, not bots.
+    """
+    fields = {
+        "name": p.name,
+        "color": p.color,
+        "head_avatar": p.head_avatar,
+        "custom_head_id": p.custom_head_id,
+        "score": p.score,
+        "lives": p.lives,
+        "alive": p.alive,
+        "game_over": p.game_over,
+        "direction": p.direction,
+        "is_ai": p.is_ai,
+    }
+    if not p.is_ai:
+        fields["input_seq"] = p.input_seq
+    return fields
+
+
+def visible_players(game: GameState, view=None) -> tuple[dict, int]:
+    """Players shown in state messages, plus the spectator count.
+
+    With a ``view`` (see ``interest.View``), only the players it shows.
+    """
+    if view is not None:
+        return view.players(game)
+    players = {}
     spectator_count = 0
     for pid, p in game.players.items():
         # Count spectators
@@ -47,32 +413,171 @@ def build_state_msg(game: GameState) -> str:
             spectator_count += 1
         # Include PLAYING players and eliminated players (game_over) so they stay in the legend
         if p.location == PlayerLocation.PLAYING or p.game_over:
-            players_data[pid] = {
-                "name": p.name,
-                "color": p.color,
-                "head_avatar": p.head_avatar,
-                "custom_head": getattr(p, "custom_head", None),
-                "segments": p.segments,
-                "score": p.score,
-                "lives": p.lives,
-                "alive": p.alive,
-                "game_over": p.game_over,
-                "direction": p.direction,
-                "is_ai": getattr(p, "is_ai", False),
-            }
-    return json.dumps({
+            players[pid] = p
+    return players, spectator_count
+
+
+def build_state_msg(game: GameState, seq: int = 0, view=None) -> Frame:
+    players, spectator_count = visible_players(game, view)
+    to_json = game.grid.to_json
+    players_data = {}
+    for pid, p in players.items():
+        data = player_fields(p)
+        data["segments"] = to_json(p.segments)
+        players_data[pid] = data
+    data = {
         "type": "state",
+        "seq": seq,
+        "tick": game.ticks,
         "players": players_data,
-        "food": game.food,
+        "food": to_json(game.food if view is None else view.food(game)),
         "level": game.level,
         "food_eaten": game.food_eaten,
-        "food_target": game.game_options["food_to_advance"],
+        "food_target": game.food_to_advance,
         "level_changing": game.level_changing,
         "level_change_at": game.level_change_at,
         "eaten_events": game.eaten_events,
         "paused_players": list(game.paused_players),
         "spectator_count": spectator_count,
-    })
+    }
+    if view is not None:
+        data["view"] = view.bounds
+    return Frame(data, game.grid.width)
+
+
+class StateEncoder:
+    """Encodes per-tick state as a keyframe or a diff against the previous tick.
+
+    Every message carries a sequence number and the game's tick number. A
+    ``state_delta`` only applies on top of the message with ``seq - 1``;
+    clients that miss one send ``resync`` and get a fresh keyframe. Keyframes
+    go out every ``keyframe_interval`` ticks and whenever the level changes.
+
+    With a ``view`` the encoder only covers the snakes and food the view
+    shows; ``seq`` is where its numbering continues from.
+    """
+
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL, view=None, seq: int = 0):
+        self.keyframe_interval = keyframe_interval
+        self.view = view
+        self.seq = seq
+        self._since_keyframe = 0
+        self._level = None
+        self._fields: dict[str, dict] = {}
+        # pid -> (length, head, tail, cell before tail), enough to spot a one-step move
+        self._bodies: dict[str, tuple] = {}
+        self._food: set = set()
+        self._scalars: dict = {}
+
+    def reset(self):
+        """Forget the previous tick so the next encode is a keyframe."""
+        self._level = None
+
+    def keyframe(self, game: GameState) -> Frame:
+        """Full snapshot at the current sequence number, for joins and resyncs."""
+        return build_state_msg(game, self.seq, self.view)
+
+    def encode(self, game: GameState) -> Frame:
+        """Advance the sequence and encode the current tick."""
+        self.seq += 1
+        self._since_keyframe += 1
+        players, spectator_count = visible_players(game, self.view)
+        food = game.food if self.view is None else self.view.food(game)
+        scalars = {
+            "tick": game.ticks,
+            "level": game.level,
+            "food_eaten": game.food_eaten,
+            "food_target": game.food_to_advance,
+            "level_changing": game.level_changing,
+            "level_change_at": game.level_change_at,
+            "paused_players": sorted(game.paused_players),
+            "spectator_count": spectator_count,
+        }
+        keyframe = self._level != game.level or self._since_keyframe >= self.keyframe_interval
+
+        if keyframe:
+            msg = build_state_msg(game, self.seq, self.view)
+            self._since_keyframe = 0
+            self._fields = {pid: player_fields(p) for pid, p in players.items()}
+        else:
+            msg = Frame(self._diff(game, players, food, scalars), game.grid.width)
+
+        self._level = game.level
+        self._bodies = {pid: _body_marks(p.segments) for pid, p in players.items()}
+        self._food = set(food)
+        self._scalars = scalars
+        return msg
+
+    def _diff(self, game: GameState, players: dict, food: list[int], scalars: dict) -> dict:
+        delta = {"type": "state_delta", "seq": self.seq}
+        for key, value in scalars.items():
+            if self._scalars.get(key) != value:
+                delta[key] = value
+
+        grid = game.grid
+        changed = {}
+        joined = {}
+        fields_now = {}
+        for pid, p in players.items():
+            fields = player_fields(p)
+            fields_now[pid] = fields
+            prev_fields = self._fields.get(pid)
+            if prev_fields is None:
+                data = dict(fields)
+                data["segments"] = grid.to_json(p.segments)
+                joined[pid] = data
+                continue
+            change = {k: v for k, v in fields.items() if prev_fields[k] != v}
+            change.update(_body_change(self._bodies[pid], p.segments, grid))
+            if change:
+                changed[pid] = change
+        left = [pid for pid in self._fields if pid not in players]
+        self._fields = fields_now
+
+        if changed:
+            delta["players"] = changed
+        if joined:
+            delta["joined"] = joined
+        if left:
+            delta["left"] = left
+
+        food_now = set(food)
+        food_add = [f for f in food if f not in self._food]
+        food_remove = [f for f in self._food if f not in food_now]
+        if food_add:
+            delta["food_add"] = grid.to_json(food_add)
+        if food_remove:
+            delta["food_remove"] = grid.to_json(food_remove)
+        if game.eaten_events:
+            delta["eaten_events"] = game.eaten_events
+        return delta
+
+
+def _body_marks(segments) -> tuple:
+    n = len(segments)
+    if n == 0:
+        return (0, None, None, None)
+    return (n, segments[0], segments[-1], segments[-2] if n > 1 else None)
+
+
+def _body_change(marks: tuple, segments, grid) -> dict:
+    """Describe how a snake body changed since ``marks`` were taken.
+
+    A normal move pushes one head cell and pops zero or one tail cell; that is
+    sent as ``head``/``pop``. Anything else (respawn, death) sends the full body.
+    """
+    prev_len, prev_head, prev_tail, prev_before_tail = marks
+    n = len(segments)
+    if n == prev_len and (n == 0 or segments[0] == prev_head):
+        return {}
+    if prev_len and n >= 2 and segments[1] == prev_head:
+        if n == prev_len and segments[-1] == prev_before_tail:
+            return {"head": list(grid.xy(segments[0])), "pop": 1}
+        if n == prev_len + 1 and segments[-1] == prev_tail:
+            return {"head": list(grid.xy(segments[0])), "pop": 0}
+    if prev_len == 1 and n == 1:
+        return {"head": list(grid.xy(segments[0])), "pop": 1}
+    return {"segments": grid.to_json(segments)}
 
 
 def build_lobby_msg(game: GameState) -> str:
@@ -83,7 +588,7 @@ def build_lobby_msg(game: GameState) -> str:
             "name": p.name,
             "color": p.color,
             "head_avatar": p.head_avatar,
-            "custom_head": getattr(p, "custom_head", None),
+            "custom_head_id": p.custom_head_id,
             "ready": pid in game.ready_players,
             "is_ai": getattr(p, "is_ai", False),
             "location": p.location.value if hasattr(p, "location") else "lobby",
@@ -1,6 +1,10 @@
 """Game constants."""
 
-GRID_W, GRID_H = 40, 30
+GRID_W, GRID_H = 40, 30  # default board; games can pick anything up to MAX_GRID_W x MAX_GRID_H
+MAX_GRID_W, MAX_GRID_H = 400, 300
+VIEWPORT_W, VIEWPORT_H = GRID_W, GRID_H  # cells a client shows at once; bigger boards scroll
+CHUNK_SIZE = 10  # cells per side of a spatial index chunk
+MINIMAP_INTERVAL = 5  # ticks between minimap updates on boards bigger than the viewport
 TICK_RATE = 10
 MIN_TICK_RATE = 5
 MAX_TICK_RATE = 20
@@ -10,6 +14,24 @@ RESPAWN_DELAY = 3.0
 LEVEL_COUNTDOWN = 3.0
 TOTAL_LEVELS = 8
 MAX_LIVES = 3
+KEYFRAME_INTERVAL = 50  # ticks between full state snapshots
+MAX_CATCHUP_TICKS = 2  # missed ticks run back to back before the rest are skipped
+DEFAULT_ROOM = "main"  # room used by clients that don't ask for one
+ROOM_IDLE_TIMEOUT = 60.0  # seconds an unjoined room is kept before it is cleaned up
+SEND_QUEUE_LIMIT = 16  # queued outbound messages per socket before state frames are dropped
+SLOW_CLIENT_TIMEOUT = 5.0  # seconds a socket may stay backed up before it is disconnected
+RESUME_GRACE = 10.0  # seconds a dropped player is held for their client to reconnect and resume
+# recent state frames kept to catch up a resumed client; longer gaps get a keyframe
+RESUME_HISTORY = 8
+INPUT_QUEUE_LIMIT = 3  # moves a player can queue ahead of the ticks that apply them
+SPAWN_PROBES = 32  # random free cells tried for a spawn before scanning them all
+AI_LOOKAHEAD_CELLS = 128  # most free cells a bot flood-fills to check a move isn't a dead end
+FRAME_TIME_HISTORY = 600  # recent state frames whose tick time /debug/frames reports
+COMPRESS_MIN_BYTES = 512  # smallest outbound message worth deflating
+COMPRESS_LEVEL = 1  # zlib level; state frames compress well even at the cheapest level
+RECORD_FLUSH_TICKS = 50  # ticks of a match recording batched per write, each with a fingerprint
+RECORD_COMPRESS_LEVEL = 6  # gzip level of recording batches, compressed on the writer thread
+REPLAY_MAX_GAP = 1.0  # longest a replay to spectators waits between ticks, e.g. across a pause
 
 DIRECTIONS = {
     "up": (0, -1),
@@ -2,42 +2,56 @@
 
 import random
 import time
-from typing import Optional
+from typing import Callable, Optional
 
 from .constants import (
     GRID_W, GRID_H, FOOD_COUNT, FOOD_TO_ADVANCE,
     RESPAWN_DELAY, LEVEL_COUNTDOWN, TOTAL_LEVELS, MAX_LIVES,
-    DIRECTIONS, OPPOSITES, NEON_COLORS, HEAD_AVATARS,
-    TICK_RATE,
+    OPPOSITES, NEON_COLORS, HEAD_AVATARS,
+    TICK_RATE, SPAWN_PROBES, VIEWPORT_W, VIEWPORT_H, INPUT_QUEUE_LIMIT,
 )
-from .levels import build_level_walls
-from .models import PlayerState, PlayerLocation
+from .ai import AIEngine, DIRECTION_NAMES
+from .grid import ChunkIndex, OccupancyGrid
+from .levels import get_level
+from .models import PlayerState, PlayerLocation, SnakeBody
+from .pathfinding import distance_field, update_distance_field
 
 AI_NAMES = ["Botty", "Snaker", "Viper", "Python", "Cobra", "Mamba", "Rattler", "Noodle"]
 
-# Bot difficulty levels: 0=Easy, 1=Medium, 2=Hard
-# intelligence: chance to move toward food (vs random safe direction)
-# mistake_rate: chance to pick ANY direction including unsafe/fatal ones
-BOT_DIFFICULTY = {
-    0: {"name": "Easy", "intelligence": 0.40, "mistake_rate": 0.20},
-    1: {"name": "Medium", "intelligence": 0.65, "mistake_rate": 0.10},
-    2: {"name": "Hard", "intelligence": 0.80, "mistake_rate": 0.03},
-}
-
 
 class GameState:
-    def __init__(self):
+    def __init__(
+        self,
+        ai: Optional[AIEngine] = None,
+        rng: Optional[random.Random] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        # All randomness (spawns, food, bot pacing) and the time used for
+        # respawns, countdowns and bot pacing; pass a seeded rng and a
+        # simulated clock for repeatable games
+        self.rng = rng if rng is not None else random.Random()
+        self.clock = clock if clock is not None else time.time
         self.level = 1
-        self.walls = build_level_walls(1)
-        self.food: list[tuple[int, int]] = []
+        self.grid = OccupancyGrid(GRID_W, GRID_H)
+        # Snakes and food by board region; only on boards bigger than a viewport
+        self.chunks: Optional[ChunkIndex] = None
+        self.board_scale = 1  # food on the board and food to advance are per default-sized area
+        self.load_walls(1)
+        self.food: list[int] = []  # cell ids
         self.players: dict[str, PlayerState] = {}
         self.food_eaten = 0
         self.level_changing = False
         self.level_change_at: Optional[float] = None
         self.eaten_events: list[tuple[int, int, str, str]] = []
+        # Ticks run since the match started, sent with every state message
+        self.ticks = 0
+        # Seconds each move applied in the last tick waited in its player's queue
+        self.input_latencies: list[float] = []
         self.started = False
         self.ready_players: set[str] = set()
         self.paused_players: set[str] = set()
+        # Disconnected players waiting to resume; their snakes stay where they are
+        self.held_players: set[str] = set()
         self.game_options: dict = {
             "food_to_advance": FOOD_TO_ADVANCE,
             "food_count": FOOD_COUNT,
@@ -45,10 +59,21 @@ class GameState:
             "lives": MAX_LIVES,
             "bot_difficulty": 1,  # 0=Easy, 1=Medium, 2=Hard
             "tick_rate": TICK_RATE,
+            "grid_size": [GRID_W, GRID_H],
         }
+        # Seconds spent in each phase of the last tick
+        self.phase_times: dict[str, float] = {"ai": 0.0, "move": 0.0}
+        # Decides for all bots due in a tick; shares the game's rng unless given its own
+        self.ai = ai if ai is not None else AIEngine(self.rng)
+        # Walking distance to the nearest food per cell: rebuilt when the walls
+        # change, updated for the food eaten and spawned since it was last used
+        self._food_field: Optional[list[int]] = None
+        self._food_field_key: Optional[tuple] = None
+        self._food_field_food: set[int] = set()
 
     def start_game(self):
         self.started = True
+        self.ticks = 0
         self.ready_players.clear()
         lives = self.game_options.get("lives", MAX_LIVES)
         for p in self.players.values():
@@ -56,6 +81,140 @@ class GameState:
             self.spawn_player(p)
         self.spawn_food()
 
+    def reset(self):
+        """Return to the lobby: level 1, no food, every player back to full lives."""
+        self.started = False
+        self.paused_players.clear()
+        self.level = 1
+        self.load_walls(1)
+        self.clear_food()
+        self.food_eaten = 0
+        self.level_changing = False
+        self.level_change_at = None
+        self.eaten_events.clear()
+        self.ready_players.clear()
+        lives = self.game_options.get("lives", MAX_LIVES)
+        for p in self.players.values():
+            p.score = 0
+            p.lives = lives
+            p.alive = True
+            p.game_over = False
+            p.segments = SnakeBody()
+            p.respawn_at = None
+            p.ai_decision_at = 0.0
+            self.drop_inputs(p)
+        self.grid.clear_snakes()
+        if self.chunks is not None:
+            self.chunks.clear_snakes()
+
+    def set_grid_size(self, width: int, height: int):
+        """Play the next game on a ``width x height`` board; only between games."""
+        self.game_options["grid_size"] = [width, height]
+        self.grid = OccupancyGrid(width, height)
+        big = width > VIEWPORT_W or height > VIEWPORT_H
+        self.chunks = ChunkIndex(width, height) if big else None
+        self.board_scale = max(1, (width * height) // (GRID_W * GRID_H))
+        # Cell ids mean different cells on the new board
+        self._food_field = self._food_field_key = None
+        self.load_walls(self.level)
+
+    def load_walls(self, level: int):
+        compiled = get_level(level, self.grid.width, self.grid.height)
+        self.walls = compiled.bitmap
+        self.runways = compiled.runways
+        self.grid.set_walls(self.walls)
+
+    @property
+    def food_to_advance(self) -> int:
+        """Food the players must eat between them to reach the next level."""
+        return self.game_options["food_to_advance"] * self.board_scale
+
+    def set_body(self, player: PlayerState, segments: list[int]):
+        """Replace a player's body, keeping the occupancy grid in step."""
+        self.grid.remove_body(player.segments)
+        if self.chunks is not None:
+            self.chunks.remove_body(player.pid, player.segments)
+            self.chunks.add_body(player.pid, segments)
+        player.segments = SnakeBody(segments)
+        self.grid.add_body(segments)
+
+    def remove_player(self, pid: str) -> Optional[PlayerState]:
+        """Remove a player and their body from the board."""
+        player = self.players.pop(pid, None)
+        if player is not None:
+            self.grid.remove_body(player.segments)
+            if self.chunks is not None:
+                self.chunks.remove_body(pid, player.segments)
+            self.ready_players.discard(pid)
+            self.paused_players.discard(pid)
+            self.held_players.discard(pid)
+        return player
+
+    def move_to_lobby(self, pid: str):
+        """Take one player out of the match and back to the lobby, with full lives and no score."""
+        player = self.players[pid]
+        player.location = PlayerLocation.LOBBY
+        player.score = 0
+        player.lives = self.game_options.get("lives", MAX_LIVES)
+        player.alive = True
+        player.game_over = False
+        self.set_body(player, [])
+        player.respawn_at = None
+        self.drop_inputs(player)
+        self.ready_players.discard(pid)
+
+    def queue_input(self, pid: str, direction: str, seq: Optional[int] = None) -> bool:
+        """Queue a move for a player's next free tick; False if it was dropped.
+
+        A move is checked against the last one queued, since that is the
+        direction the snake will be going when it applies: repeats and
+        reversals are dropped, and so is anything past ``INPUT_QUEUE_LIMIT``.
+
+        ``seq`` is the client's number for the move. ``input_seq`` reaches it
+        once the move is applied, or, for a dropped move, once every move
+        queued before it is, so a predicting client knows which of its moves
+        the state it is looking at already includes.
+        """
+        p = self.players[pid]
+        inputs = p.inputs
+        ahead = inputs[-1][0] if inputs else p.direction
+        if (direction == ahead or len(inputs) >= INPUT_QUEUE_LIMIT
+                or (OPPOSITES.get(direction) == ahead and len(p.segments) > 1)):
+            if seq is not None:
+                if inputs:
+                    last_direction, received, _ = inputs[-1]
+                    inputs[-1] = (last_direction, received, seq)
+                else:
+                    p.input_seq = seq
+            return False
+        inputs.append((direction, self.clock(), seq))
+        return True
+
+    def drop_inputs(self, player: PlayerState):
+        """Forget a player's queued moves, counting them as dealt with."""
+        inputs = player.inputs
+        if inputs:
+            seq = inputs[-1][2]
+            if seq is not None:
+                player.input_seq = seq
+            inputs.clear()
+
+    def final_scores(self) -> list[dict]:
+        """Scoreboard for the game_end message, highest score first."""
+        scores = [
+            {"name": p.name, "color": p.color, "score": p.score, "is_ai": p.is_ai}
+            for p in self.players.values()
+        ]
+        scores.sort(key=lambda x: x["score"], reverse=True)
+        return scores
+
+    def any_paused_human_players(self) -> bool:
+        """Check if any human (non-AI) players are paused."""
+        for pid in self.paused_players:
+            if pid in self.players and not self.players[pid].is_ai:
+                return True
+        return False
+
     @property
     def has_active_players(self) -> bool:
         """Returns True if any human player is currently playing."""
@@ -72,96 +231,108 @@ class GameState:
         """Returns all spectators."""
         return [p for p in self.players.values() if p.location == PlayerLocation.SPECTATING]
 
-    def find_safe_spot(self, length=3, runway=10) -> Optional[list[tuple[int, int]]]:
-        occupied = set()
-        for p in self.players.values():
-            if p.alive:
-                occupied.update(p.segments)
-        occupied.update(self.food)
-        blocked = self.walls | occupied
-
-        attempts = 0
-        while attempts < 200:
-            x = random.randint(3, GRID_W - 4)
-            y = random.randint(3, GRID_H - 4)
-            d = random.choice(["left", "right", "up", "down"])
-            dx, dy = DIRECTIONS[d]
-            segs = [(x - dx * i, y - dy * i) for i in range(length)]
-            valid = True
-            for sx, sy in segs:
-                if (sx, sy) in blocked or sx <= 0 or sx >= GRID_W - 1 or sy <= 0 or sy >= GRID_H - 1:
-                    valid = False
-                    break
-            if valid:
-                for step in range(1, runway + 1):
-                    rx, ry = x + dx * step, y + dy * step
-                    if (rx, ry) in blocked or rx <= 0 or rx >= GRID_W - 1 or ry <= 0 or ry >= GRID_H - 1:
-                        valid = False
-                        break
-            if valid:
-                return segs, d
-            attempts += 1
-
-        for min_run in (5, 3, 0):
-            for _ in range(100):
-                x = random.randint(3, GRID_W - 4)
-                y = random.randint(3, GRID_H - 4)
-                d = random.choice(["left", "right", "up", "down"])
-                dx, dy = DIRECTIONS[d]
-                segs = [(x - dx * i, y - dy * i) for i in range(length)]
-                ok = True
-                for sx, sy in segs:
-                    if (sx, sy) in blocked or sx <= 0 or sx >= GRID_W - 1 or sy <= 0 or sy >= GRID_H - 1:
-                        ok = False
+    def find_safe_spot(self, length=3, runway=10) -> Optional[tuple[list[int], str]]:
+        """A free body of ``length`` cells with ``runway`` clear cells ahead of its head.
+
+        Tries ``SPAWN_PROBES`` random free cells and directions, then every
+        free cell for the longest clear run. With no room for a whole body,
+        a single free cell is used; None only when the board is full.
+        """
+        grid = self.grid
+        free = grid.free
+        if not free:
+            return None
+        rng = self.rng
+        behind = length - 1
+
+        for _ in range(SPAWN_PROBES):
+            cell = free.choice(rng)
+            d = DIRECTION_NAMES[int(rng.random() * 4)]
+            if (self._clear_run(cell, OPPOSITES[d], behind) == behind
+                    and self._clear_run(cell, d, runway) == runway):
+                return self._spawn_body(cell, d, length), d
+
+        # Spots are rare: scan every free cell, from a random start so ties don't favour one corner
+        cells = free.cells
+        start = int(rng.random() * len(cells))
+        best_run, best = -1, None
+        for i in range(len(cells)):
+            cell = cells[(start + i) % len(cells)]
+            for d in DIRECTION_NAMES:
+                if self._clear_run(cell, OPPOSITES[d], behind) < behind:
+                    continue
+                run = self._clear_run(cell, d, runway)
+                if run > best_run:
+                    best_run, best = run, (cell, d)
+                    if run == runway:
                         break
-                if ok:
-                    clear = 0
-                    for step in range(1, runway + 1):
-                        rx, ry = x + dx * step, y + dy * step
-                        if (rx, ry) in blocked or rx <= 0 or rx >= GRID_W - 1 or ry <= 0 or ry >= GRID_H - 1:
-                            break
-                        clear += 1
-                    if clear >= min_run:
-                        return segs, d
-        return [(GRID_W // 2, GRID_H // 2)], "right"
+            if best_run == runway:
+                break
+        if best is not None:
+            cell, d = best
+            return self._spawn_body(cell, d, length), d
+
+        cell = free.choice(rng)
+        return [cell], max(DIRECTION_NAMES, key=lambda d: self._clear_run(cell, d, runway))
+
+    def _clear_run(self, cell: int, direction: str, limit: int) -> int:
+        """Free cells straight ahead of ``cell``, counted up to ``limit``.
+
+        The level's runway bounds the walk by the walls; only snakes and food
+        inside it are looked up.
+        """
+        free = self.grid.free
+        step = self.grid.steps[direction]
+        n = min(self.runways[direction][cell], limit)
+        for i in range(1, n + 1):
+            if cell + step * i not in free:
+                return i - 1
+        return n
+
+    def _spawn_body(self, head: int, direction: str, length: int) -> list[int]:
+        step = self.grid.steps[direction]
+        return [head - step * i for i in range(length)]
 
     def spawn_player(self, player: PlayerState):
         result = self.find_safe_spot()
         if isinstance(result, tuple) and len(result) == 2:
-            player.segments, player.direction = result
+            segments, player.direction = result
+            self.set_body(player, segments)
         else:
-            player.segments = [(GRID_W // 2, GRID_H // 2)]
+            self.set_body(player, [self.grid.cell(self.grid.width // 2, self.grid.height // 2)])
             player.direction = "right"
         player.next_direction = player.direction
+        self.drop_inputs(player)
         player.alive = True
         player.respawn_at = None
 
     def spawn_food(self):
-        occupied = set()
-        for p in self.players.values():
-            if p.alive:
-                occupied.update(p.segments)
-        occupied.update(self.walls)
-        occupied.update(self.food)
-
-        target = self.game_options["food_count"]
-        while len(self.food) < target:
-            attempts = 0
-            while attempts < 500:
-                x = random.randint(1, GRID_W - 2)
-                y = random.randint(1, GRID_H - 2)
-                if (x, y) not in occupied:
-                    self.food.append((x, y))
-                    occupied.add((x, y))
-                    break
-                attempts += 1
-            else:
-                break
+        """Top the food up to ``food_count`` per default-sized area.
+
+        Food goes on random free cells while any are left.
+        """
+        free = self.grid.free
+        target = self.game_options["food_count"] * self.board_scale
+        while len(self.food) < target and free:
+            self.add_food(free.choice(self.rng))
+
+    def add_food(self, cell: int):
+        self.food.append(cell)
+        self.grid.add_food(cell)
+        if self.chunks is not None:
+            self.chunks.add_food(cell)
+
+    def clear_food(self):
+        for cell in self.food:
+            self.grid.remove_food(cell)
+            if self.chunks is not None:
+                self.chunks.remove_food(cell)
+        self.food.clear()
 
     def change_level(self, new_level: int):
         self.level = new_level
-        self.walls = build_level_walls(new_level)
-        self.food.clear()
+        self.load_walls(new_level)
+        self.clear_food()
         self.food_eaten = 0
         self.level_changing = False
         self.level_change_at = None
@@ -174,71 +345,91 @@ class GameState:
                 p.respawn_at = None
         self.spawn_food()
 
-    def tick(self):
+    def tick(self, now: Optional[float] = None):
+        """Advance one tick at ``now``, by default the game's clock."""
         if not self.started:
             return
 
-        now = time.time()
+        if now is None:
+            now = self.clock()
+        self.ticks += 1
         self.eaten_events.clear()
-
-        # AI decision making (inefficient pathfinding)
-        for p in self.players.values():
-            if p.is_ai and p.alive and now >= p.ai_decision_at:
-                p.next_direction = self.get_ai_direction(p)
+        self.input_latencies.clear()
+        started = time.perf_counter()
+
+        # AI decision making: every bot that is due, in one batch
+        due = [p for p in self.players.values() if p.is_ai and p.alive and now >= p.ai_decision_at]
+        if due:
+            rng = self.rng
+            for p, direction in zip(due, self.ai.decide(self, due)):
+                p.next_direction = direction
                 # AI re-decides every 2-5 ticks for inefficiency
-                p.ai_decision_at = now + (0.2 + random.random() * 0.3)
+                p.ai_decision_at = now + (0.2 + rng.random() * 0.3)
+
+        ai_done = time.perf_counter()
+        self.phase_times["ai"] = ai_done - started
+        try:
+            self._advance(now)
+        finally:
+            self.phase_times["move"] = time.perf_counter() - ai_done
 
+    def _advance(self, now: float):
+        """Movement, collisions, food and level progression for one tick."""
         if self.level_changing:
             if now >= self.level_change_at:
                 new_level = (self.level % TOTAL_LEVELS) + 1
                 self.change_level(new_level)
             return
 
-        for p in self.players.values():
-            if not p.alive and not p.game_over and p.respawn_at and now >= p.respawn_at:
+        held = self.held_players
+        for pid, p in self.players.items():
+            if (not p.alive and not p.game_over and p.respawn_at and now >= p.respawn_at
+                    and pid not in held):
                 self.spawn_player(p)
 
+        latencies = self.input_latencies
         for p in self.players.values():
             if p.alive:
+                if p.inputs:
+                    p.next_direction, received, seq = p.inputs.popleft()
+                    latencies.append(now - received)
+                    if seq is not None:
+                        p.input_seq = seq
                 if OPPOSITES.get(p.next_direction) != p.direction or len(p.segments) == 1:
                     p.direction = p.next_direction
 
+        grid = self.grid
+        chunks = self.chunks
+        steps = grid.steps
         new_heads = {}
         for pid, p in self.players.items():
-            if not p.alive or not p.segments:
+            if not p.alive or not p.segments or pid in held:
                 continue
-            dx, dy = DIRECTIONS[p.direction]
-            hx, hy = p.segments[0]
-            new_heads[pid] = (hx + dx, hy + dy)
+            new_heads[pid] = p.segments[0] + steps[p.direction]
 
         kills = set()
         for pid, head in new_heads.items():
             p = self.players[pid]
-            if head in self.walls:
-                kills.add(pid)
-                continue
-            if head in p.segments[:-1]:
+            if grid.is_wall(head) or self.hits_snake(p, head):
                 kills.add(pid)
-                continue
-            if self.game_options["collisions"]:
-                for other_pid, other_p in self.players.items():
-                    if other_pid == pid or not other_p.alive:
-                        continue
-                    if head in other_p.segments:
-                        kills.add(pid)
-                        break
 
         if self.game_options["collisions"]:
-            for pid1, head1 in new_heads.items():
-                for pid2, head2 in new_heads.items():
-                    if pid1 < pid2 and head1 == head2:
-                        kills.add(pid1)
-                        kills.add(pid2)
-
-        for pid in kills:
+            # Head-on: every snake moving into the same cell dies
+            heads_at: dict[int, list[str]] = {}
+            for pid, head in new_heads.items():
+                heads_at.setdefault(head, []).append(pid)
+            for pids in heads_at.values():
+                if len(pids) > 1:
+                    kills.update(pids)
+
+        # In move order, not set order, so the free-cell index (and with it
+        # every later spawn) doesn't depend on string hashing
+        for pid in new_heads:
+            if pid not in kills:
+                continue
             p = self.players[pid]
             p.alive = False
-            p.segments = []
+            self.set_body(p, [])
             p.lives -= 1
             if p.lives > 0:
                 p.respawn_at = now + RESPAWN_DELAY
@@ -253,85 +444,68 @@ class GameState:
             if pid in kills:
                 continue
             p = self.players[pid]
-            p.segments.insert(0, head)
-            if head in self.food:
+            p.segments.push_head(head)
+            grid.add(head)
+            if chunks is not None:
+                chunks.add(pid, head)
+            if grid.food[head]:
                 self.food.remove(head)
+                grid.remove_food(head)
+                if chunks is not None:
+                    chunks.remove_food(head)
                 p.score += 1
                 self.food_eaten += 1
-                self.eaten_events.append((head[0], head[1], p.color, pid))
+                hx, hy = grid.xy(head)
+                self.eaten_events.append((hx, hy, p.color, pid))
             else:
-                p.segments.pop()
+                tail = p.segments.pop_tail()
+                grid.remove(tail)
+                if chunks is not None:
+                    chunks.remove(pid, tail)
 
         self.spawn_food()
 
-        if self.food_eaten >= self.game_options["food_to_advance"]:
+        if self.food_eaten >= self.food_to_advance:
             self.level_changing = True
             self.level_change_at = now + LEVEL_COUNTDOWN
 
-    def get_ai_direction(self, ai_player: PlayerState) -> str:
-        """AI that moves towards food while avoiding walls. Intelligence based on difficulty."""
-        if not ai_player.segments or not self.food:
-            return ai_player.direction
-
-        head = ai_player.segments[0]
-        current_dir = ai_player.direction
-
-        # Get difficulty settings from game options
-        difficulty_level = self.game_options.get("bot_difficulty", 1)
-        difficulty = BOT_DIFFICULTY.get(difficulty_level, BOT_DIFFICULTY[1])
-        intelligence = difficulty["intelligence"]
-        mistake_rate = difficulty["mistake_rate"]
-
-        # Find nearest food
-        nearest_food = min(self.food, key=lambda f: abs(f[0] - head[0]) + abs(f[1] - head[1]))
-        target_x, target_y = nearest_food
-
-        # Get all safe directions
-        safe_dirs = []
-        for d_name, (dx, dy) in DIRECTIONS.items():
-            # Don't reverse immediately
-            if OPPOSITES.get(d_name) == current_dir:
-                continue
-            new_x, new_y = head[0] + dx, head[1] + dy
-            # Check bounds and walls
-            if (new_x, new_y) in self.walls or new_x <= 0 or new_x >= GRID_W - 1 or new_y <= 0 or new_y >= GRID_H - 1:
-                continue
-            # Check collision with self (excluding tail which will move)
-            if (new_x, new_y) in ai_player.segments[:-1]:
-                continue
-            # Check collision with other snakes if collisions enabled
-            if self.game_options["collisions"]:
-                for other_p in self.players.values():
-                    if other_p.pid != ai_player.pid and other_p.alive:
-                        if (new_x, new_y) in other_p.segments:
-                            break
-                else:
-                    safe_dirs.append((d_name, new_x, new_y))
-            else:
-                safe_dirs.append((d_name, new_x, new_y))
-
-        # Roll for mistake - chance to pick ANY direction including unsafe/fatal ones
-        if random.random() < mistake_rate:
-            # Mistake! Pick from all directions (including reversing)
-            all_dirs = list(DIRECTIONS.keys())
-            return random.choice(all_dirs)
-
-        if not safe_dirs:
-            return current_dir  # No safe moves, accept fate
-
-        # Roll for intelligent action
-        if random.random() < intelligence:
-            # Intelligent: pick direction that reduces distance to food
-            def dist_to_food(x, y):
-                return abs(x - target_x) + abs(y - target_y)
-
-            current_dist = dist_to_food(head[0], head[1])
-            better_dirs = [(d, x, y) for d, x, y in safe_dirs if dist_to_food(x, y) < current_dist]
-            if better_dirs:
-                return random.choice(better_dirs)[0]
+    def hits_snake(self, player: PlayerState, cell: int) -> bool:
+        """Would ``player``'s head moving into ``cell`` hit a snake body?
+
+        The player's own tail is ignored since it moves away this tick. Other
+        snakes only count when collisions are enabled.
+        """
+        occupied = self.grid.snakes_at(cell)
+        if occupied == 0:
+            return False
+        if player.segments and player.segments[-1] == cell:
+            occupied -= 1
+        if self.game_options["collisions"]:
+            return occupied > 0
+        return occupied > 0 and player.segments.contains_before_tail(cell)
 
-        # Non-intelligent: pick random safe direction
-        return random.choice(safe_dirs)[0]
+    def get_ai_direction(self, ai_player: PlayerState) -> str:
+        """Direction one bot would pick now; ``tick`` decides all due bots in one batch."""
+        return self.ai.decide(self, [ai_player])[0]
+
+    def food_distances(self) -> list[int]:
+        """Per-cell walking distance to the nearest food.
+
+        Every bot shares it until the food or level changes. Large boards
+        have hundreds of food, some eaten nearly every tick, so the field is
+        updated for what changed rather than searched afresh.
+        """
+        grid = self.grid
+        key = (self.level, grid.width, grid.height)
+        food = set(self.food)
+        if key != self._food_field_key:
+            self._food_field = distance_field(grid, food)
+            self._food_field_key = key
+        elif food != self._food_field_food:
+            old = self._food_field_food
+            update_distance_field(grid, self._food_field, food - old, old - food)
+        self._food_field_food = food
+        return self._food_field
 
     def add_ai(self) -> str:
         """Add a new AI player and return its ID."""
@@ -353,8 +527,7 @@ class GameState:
     def remove_ai(self, ai_id: str) -> bool:
         """Remove an AI player. Returns True if successful."""
         if ai_id in self.players and self.players[ai_id].is_ai:
-            del self.players[ai_id]
-            self.ready_players.discard(ai_id)
+            self.remove_player(ai_id)
             return True
         return False
 
@@ -0,0 +1,226 @@
+"""Board occupancy shared by collision checks, AI and spawning.
+
+Cells are integer ids ``y * width + x``. Game logic works on ids only;
+``xy``/``to_json`` convert back to coordinates at the JSON boundary.
+"""
+
+import random
+from array import array
+from typing import Iterable
+
+from .constants import CHUNK_SIZE, DIRECTIONS
+
+
+class CellIndex:
+    """A set of cell ids with O(1) add, discard, membership and random choice.
+
+    The ids live in a plain list; each id's position in it is kept so a
+    discard can move the last id into the hole.
+    """
+
+    __slots__ = ("cells", "_pos")
+
+    def __init__(self, size: int):
+        self.cells: list[int] = []
+        self._pos = [-1] * size
+
+    def add(self, cell: int):
+        if self._pos[cell] < 0:
+            self._pos[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell: int):
+        i = self._pos[cell]
+        if i < 0:
+            return
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[i] = last
+            self._pos[last] = i
+        self._pos[cell] = -1
+
+    def choice(self, rng: random.Random) -> int:
+        return self.cells[int(rng.random() * len(self.cells))]
+
+    def __contains__(self, cell: int) -> bool:
+        return self._pos[cell] >= 0
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+
+class OccupancyGrid:
+    """Flat per-cell occupancy for a ``width x height`` board.
+
+    ``snakes`` counts the snake segments on each cell, ``food`` marks food and
+    ``walls`` is the level's wall bitmap. GameState updates ``snakes`` on every
+    head push, tail pop, spawn and death, so lookups are O(1) no matter how
+    many snakes there are or how long they get. ``free`` indexes the cells
+    with none of the three, for spawning and food placement.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.snakes = bytearray(width * height)
+        self.food = bytearray(width * height)
+        self.walls = bytes(width * height)
+        self.free = CellIndex(width * height)
+        # Cell id offset for one step in each direction
+        self.steps = {d: dx + dy * width for d, (dx, dy) in DIRECTIONS.items()}
+
+    def cell(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def xy(self, cell: int) -> tuple[int, int]:
+        y, x = divmod(cell, self.width)
+        return x, y
+
+    def to_json(self, cells: Iterable[int]) -> list[list[int]]:
+        """Cell ids as ``[[x, y], ...]`` for the wire."""
+        w = self.width
+        return [[c % w, c // w] for c in cells]
+
+    def set_walls(self, walls: bytes):
+        self.walls = walls
+        self._rebuild_free()
+
+    def clear_snakes(self):
+        self.snakes = bytearray(self.width * self.height)
+        self._rebuild_free()
+
+    def _rebuild_free(self):
+        self.free = CellIndex(self.width * self.height)
+        walls, snakes, food = self.walls, self.snakes, self.food
+        for c in range(self.width * self.height):
+            if not (walls[c] or snakes[c] or food[c]):
+                self.free.add(c)
+
+    def _release(self, cell: int):
+        if not (self.walls[cell] or self.snakes[cell] or self.food[cell]):
+            self.free.add(cell)
+
+    def add(self, cell: int):
+        self.snakes[cell] += 1
+        self.free.discard(cell)
+
+    def remove(self, cell: int):
+        snakes = self.snakes
+        snakes[cell] -= 1
+        if not (snakes[cell] or self.walls[cell] or self.food[cell]):
+            self.free.add(cell)
+
+    def add_body(self, cells: Iterable[int]):
+        snakes = self.snakes
+        free = self.free
+        for c in cells:
+            snakes[c] += 1
+            free.discard(c)
+
+    def remove_body(self, cells: Iterable[int]):
+        snakes = self.snakes
+        for c in cells:
+            snakes[c] -= 1
+            if not snakes[c]:
+                self._release(c)
+
+    def add_food(self, cell: int):
+        self.food[cell] = 1
+        self.free.discard(cell)
+
+    def remove_food(self, cell: int):
+        self.food[cell] = 0
+        self._release(cell)
+
+    def snakes_at(self, cell: int) -> int:
+        return self.snakes[cell]
+
+    def is_wall(self, cell: int) -> bool:
+        return self.walls[cell] != 0
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        """True for walls, snakes and anything off the board."""
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return True
+        i = y * self.width + x
+        return self.walls[i] != 0 or self.snakes[i] != 0
+
+
+class ChunkIndex:
+    """Which snakes and food lie in each ``size x size`` chunk of the board.
+
+    ``snakes[chunk]`` counts each player's segments in the chunk, so a body
+    spanning several chunks is found from any of them; ``food[chunk]`` holds
+    the chunk's food cells. GameState keeps it in step with the occupancy
+    grid on boards bigger than one viewport, where clients only get what is
+    near them.
+    """
+
+    __slots__ = ("width", "size", "cols", "rows", "snakes", "food", "_chunk_of")
+
+    def __init__(self, width: int, height: int, size: int = CHUNK_SIZE):
+        self.width = width
+        self.size = size
+        self.cols = -(-width // size)
+        self.rows = -(-height // size)
+        self.snakes: list[dict[str, int]] = [{} for _ in range(self.cols * self.rows)]
+        self.food: list[set[int]] = [set() for _ in range(self.cols * self.rows)]
+        row = [x // size for x in range(width)]
+        self._chunk_of = array("H")
+        for y in range(height):
+            offset = (y // size) * self.cols
+            self._chunk_of.extend([offset + cx for cx in row])
+
+    def chunk(self, cell: int) -> int:
+        return self._chunk_of[cell]
+
+    def add(self, pid: str, cell: int):
+        counts = self.snakes[self._chunk_of[cell]]
+        counts[pid] = counts.get(pid, 0) + 1
+
+    def remove(self, pid: str, cell: int):
+        counts = self.snakes[self._chunk_of[cell]]
+        n = counts[pid] - 1
+        if n:
+            counts[pid] = n
+        else:
+            del counts[pid]
+
+    def add_body(self, pid: str, cells: Iterable[int]):
+        for c in cells:
+            self.add(pid, c)
+
+    def remove_body(self, pid: str, cells: Iterable[int]):
+        for c in cells:
+            self.remove(pid, c)
+
+    def add_food(self, cell: int):
+        self.food[self._chunk_of[cell]].add(cell)
+
+    def remove_food(self, cell: int):
+        self.food[self._chunk_of[cell]].discard(cell)
+
+    def clear_snakes(self):
+        for counts in self.snakes:
+            counts.clear()
+
+    def window(self, x0: int, y0: int, x1: int, y1: int) -> list[int]:
+        """Chunk ids of the chunks ``x0 <= cx < x1``, ``y0 <= cy < y1``.
+
+        For ``snakes_in`` and ``food_in``.
+        """
+        cols = self.cols
+        return [cy * cols + cx for cy in range(y0, y1) for cx in range(x0, x1)]
+
+    def snakes_in(self, chunks: list[int]) -> set[str]:
+        """Players with a segment in any of ``chunks``."""
+        found = set()
+        snakes = self.snakes
+        for chunk in chunks:
+            if snakes[chunk]:
+                found.update(snakes[chunk])
+        return found
+
+    def food_in(self, chunks: list[int]) -> list[int]:
+        food = self.food
+        return [cell for chunk in chunks for cell in food[chunk]]
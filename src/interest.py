@@ -0,0 +1,173 @@
+"""Interest management for boards bigger than one viewport.
+
+Each client gets state for a window of chunks around its snake's head (or
+wherever it last looked) instead of the whole board, plus every
+``MINIMAP_INTERVAL`` ticks a minimap of where everyone is. Windows are
+chunk-aligned, so players near each other share a window and its frames: a
+tick encodes each window in use once, however many clients look at it.
+"""
+
+from typing import Iterable
+
+from .connection_manager import StateEncoder, build_state_msg, visible_players
+from .constants import VIEWPORT_W, VIEWPORT_H
+from .game import GameState
+from .grid import ChunkIndex
+from .wire import Frame
+
+Window = tuple[int, int, int, int]  # chunks x0 <= cx < x1, y0 <= cy < y1
+
+
+class View:
+    """A window of the board as ``StateEncoder`` and ``build_state_msg`` use it.
+
+    ``bounds`` is the window in cells, ``[x0, y0, x1, y1)``, for the client.
+    """
+
+    __slots__ = ("window", "bounds", "chunks", "streams")
+
+    def __init__(self, window: Window, streams: "ViewStreams", chunks: ChunkIndex,
+                 width: int, height: int):
+        self.window = window
+        self.streams = streams
+        x0, y0, x1, y1 = window
+        size = chunks.size
+        self.bounds = [x0 * size, y0 * size, min(x1 * size, width), min(y1 * size, height)]
+        self.chunks = chunks.window(*window)
+
+    def players(self, game: GameState) -> tuple[dict, int]:
+        """``visible_players`` for the window.
+
+        That is the snakes with a segment in it and the players looking at
+        it. Viewers are in even without a body, so every client always has its
+        own player's lives and score.
+        """
+        shown = self.streams.shown
+        inside = game.chunks.snakes_in(self.chunks)
+        inside.update(self.streams.viewers.get(self.window, ()))
+        players = {pid: shown[pid] for pid in sorted(inside) if pid in shown}
+        return players, self.streams.spectator_count
+
+    def food(self, game: GameState) -> list[int]:
+        return game.chunks.food_in(self.chunks)
+
+
+def _span(pos: int, view: int, count: int, size: int) -> tuple[int, int]:
+    # Enough chunks to cover ``view`` cells centred on ``pos`` wherever it sits in its chunk
+    n = min(count, -(-view // size) + 1)
+    start = min(max((pos - view // 2) // size, 0), count - n)
+    return start, start + n
+
+
+def view_window(chunks: ChunkIndex, cell: int, width: int, height: int) -> Window:
+    """The chunks a client needs to fill a viewport centred on ``cell``, kept inside the board."""
+    y, x = divmod(cell, width)
+    x0, x1 = _span(x, VIEWPORT_W, chunks.cols, chunks.size)
+    y0, y1 = _span(y, VIEWPORT_H, chunks.rows, chunks.size)
+    return x0, y0, x1, y1
+
+
+def build_minimap_msg(game: GameState) -> Frame:
+    """Every shown player's head, length and legend fields, for the minimap and the scoreboard."""
+    players, _ = visible_players(game)
+    grid = game.grid
+    data = {}
+    for pid, p in players.items():
+        body = p.segments
+        data[pid] = {
+            "head": list(grid.xy(body[0])) if body else None,
+            "length": len(body),
+            "score": p.score,
+            "lives": p.lives,
+            "alive": p.alive,
+            "game_over": p.game_over,
+        }
+    return Frame({"type": "minimap", "players": data}, grid.width)
+
+
+class ViewStreams:
+    """A room's state streams on a board bigger than the viewport, one per window in use.
+
+    Every window's encoder is numbered in step with ``seq``, so all clients
+    see the same sequence number for a tick. A client whose window changed
+    gets a keyframe of the new one, since its deltas build on frames the
+    client never had.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.encoders: dict[Window, StateEncoder] = {}
+        # Player id -> the window of the last frame they were sent, and the reverse
+        self.windows: dict[str, Window] = {}
+        self.viewers: dict[Window, set[str]] = {}
+        # ``visible_players`` of the whole game, worked out once per tick for every view
+        self.shown: dict = {}
+        self.spectator_count = 0
+
+    def reset(self):
+        """Start over for a new game; the next frame of every window is a keyframe."""
+        self.encoders.clear()
+        self.windows.clear()
+        self.viewers.clear()
+
+    def _look(self, game: GameState, windows: dict[str, Window]):
+        self.windows = windows
+        self.viewers = {}
+        for pid, window in windows.items():
+            self.viewers.setdefault(window, set()).add(pid)
+        self.shown, self.spectator_count = visible_players(game)
+
+    def window_for(self, game: GameState, pid: str) -> Window:
+        """Around the player's head.
+
+        Without one, where they last looked, or the middle of the board.
+        """
+        grid = game.grid
+        p = game.players.get(pid)
+        if p is not None and p.segments:
+            return view_window(game.chunks, p.segments[0], grid.width, grid.height)
+        window = self.windows.get(pid)
+        if window is None:
+            middle = grid.cell(grid.width // 2, grid.height // 2)
+            window = view_window(game.chunks, middle, grid.width, grid.height)
+        return window
+
+    def _view(self, game: GameState, window: Window) -> View:
+        return View(window, self, game.chunks, game.grid.width, game.grid.height)
+
+    def keyframe(self, game: GameState, pid: str) -> Frame:
+        """A full snapshot of the player's window at the current ``seq``, for joins and resyncs."""
+        window = self.window_for(game, pid)
+        self._look(game, dict(self.windows, **{pid: window}))
+        return build_state_msg(game, self.seq, self._view(game, window))
+
+    def encode(self, game: GameState, pids: Iterable[str]) -> dict[str, Frame]:
+        """Advance ``seq`` and encode the current tick for each player, by player id."""
+        self.seq += 1
+        previous = self.windows
+        wanted = {pid: self.window_for(game, pid) for pid in pids}
+        self._look(game, wanted)
+        encoders: dict[Window, StateEncoder] = {}
+        frames: dict[Window, Frame] = {}
+        for window in wanted.values():
+            if window in frames:
+                continue
+            encoder = self.encoders.get(window)
+            if encoder is None:
+                # Its first frame is a keyframe
+                encoder = StateEncoder(view=self._view(game, window), seq=self.seq - 1)
+            encoders[window] = encoder
+            frames[window] = encoder.encode(game)
+        # Windows nobody looks at any more start over if someone comes back
+        self.encoders = encoders
+
+        keyframes: dict[Window, Frame] = {}
+        out = {}
+        for pid, window in wanted.items():
+            frame = frames[window]
+            if previous.get(pid) != window and frame.data["type"] != "state":
+                frame = keyframes.get(window)
+                if frame is None:
+                    frame = keyframes[window] = encoders[window].keyframe(game)
+            out[pid] = frame
+        return out
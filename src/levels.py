@@ -1,20 +1,49 @@
-"""Level wall definitions."""
+"""Level wall definitions.
 
-from .constants import GRID_W, GRID_H
+Levels are drawn for the default ``GRID_W x GRID_H`` board. Bigger boards
+repeat the level's inside walls across the board, so obstacle density and
+corridor widths stay the same however large the arena.
 
+Every level is compiled once at import into an immutable ``CompiledLevel``
+for the default board, and on first use for other board sizes; the game and
+the wire messages read from ``get_level`` instead of rebuilding the walls.
+"""
 
-def build_border_walls() -> set[tuple[int, int]]:
+from functools import lru_cache
+
+from .constants import GRID_W, GRID_H, TOTAL_LEVELS, DIRECTIONS
+
+
+def build_border_walls(width: int = GRID_W, height: int = GRID_H) -> set[tuple[int, int]]:
     walls = set()
-    for x in range(GRID_W):
+    for x in range(width):
         walls.add((x, 0))
-        walls.add((x, GRID_H - 1))
-    for y in range(GRID_H):
+        walls.add((x, height - 1))
+    for y in range(height):
         walls.add((0, y))
-        walls.add((GRID_W - 1, y))
+        walls.add((width - 1, y))
     return walls
 
 
-def build_level_walls(level: int) -> set[tuple[int, int]]:
+def build_level_walls(level: int, width: int = GRID_W,
+                      height: int = GRID_H) -> set[tuple[int, int]]:
+    """A level's walls on a ``width x height`` board."""
+    walls = _design_walls(level)
+    if (width, height) == (GRID_W, GRID_H):
+        return walls
+    # Tile the inside of the design over the inside of the bigger board
+    tile_w, tile_h = GRID_W - 2, GRID_H - 2
+    inside = [(x, y) for x, y in walls if 0 < x < GRID_W - 1 and 0 < y < GRID_H - 1]
+    tiled = build_border_walls(width, height)
+    for ty in range(0, height - 2, tile_h):
+        for tx in range(0, width - 2, tile_w):
+            for x, y in inside:
+                if x + tx < width - 1 and y + ty < height - 1:
+                    tiled.add((x + tx, y + ty))
+    return tiled
+
+
+def _design_walls(level: int) -> set[tuple[int, int]]:
     walls = build_border_walls()
 
     if level == 1:
@@ -101,3 +130,86 @@ def build_level_walls(level: int) -> set[tuple[int, int]]:
                     walls.add((x, y1))
 
     return walls
+
+
+def build_runways(bitmap: bytes, width: int, height: int) -> dict[str, bytes]:
+    """Per direction, how many open cells lie straight ahead of each cell before a wall.
+
+    Runs are capped at 255.
+    """
+    longest = max(width, height)
+    countdown = bytes(min(255, v) for v in range(longest - 1, -1, -1))
+    runways = {}
+    for d, (dx, dy) in DIRECTIONS.items():
+        run = bytearray(width * height)
+        # A row or column at a time; against the direction, reverse it on the way in and out
+        if dx:
+            for y in range(height):
+                row = bitmap[y * width:(y + 1) * width]
+                if dx > 0:
+                    ahead = _runs_ahead(row, countdown)
+                else:
+                    ahead = _runs_ahead(row[::-1], countdown)[::-1]
+                run[y * width:(y + 1) * width] = ahead
+        else:
+            for x in range(width):
+                column = bitmap[x::width]
+                if dy > 0:
+                    run[x::width] = _runs_ahead(column, countdown)
+                else:
+                    run[x::width] = _runs_ahead(column[::-1], countdown)[::-1]
+        runways[d] = bytes(run)
+    return runways
+
+
+def _runs_ahead(line: bytes, countdown: bytes) -> bytes:
+    """For each position in a line of wall flags, the open positions after it up to the next wall.
+
+    Positions from one wall up to the next count down to 0, so the line is
+    built from tails of ``countdown``.
+    """
+    out = bytearray()
+    start = 0
+    wall = line.find(1)
+    while wall >= 0:
+        out += countdown[len(countdown) - (wall - start):]
+        start = wall
+        wall = line.find(1, wall + 1)
+    out += countdown[len(countdown) - (len(line) - start):]
+    return bytes(out)
+
+
+class CompiledLevel:
+    """A level's walls as cell ids, a bitmap and sorted ``[x, y]`` pairs, and its runways."""
+
+    __slots__ = ("number", "width", "height", "walls", "bitmap", "wall_list", "runways")
+
+    def __init__(self, number: int, width: int = GRID_W, height: int = GRID_H):
+        walls = build_level_walls(number, width, height)
+        self.number = number
+        self.width = width
+        self.height = height
+        self.walls = frozenset(y * width + x for x, y in walls)
+        bitmap = bytearray(width * height)
+        for cell in self.walls:
+            bitmap[cell] = 1
+        self.bitmap = bytes(bitmap)
+        self.wall_list = tuple((x, y) for x, y in sorted(walls))
+        self.runways = build_runways(self.bitmap, width, height)
+
+    def __repr__(self):
+        return f"CompiledLevel({self.number}, {self.width}x{self.height}, walls={len(self.walls)})"
+
+
+LEVELS = {n: CompiledLevel(n) for n in range(1, TOTAL_LEVELS + 1)}
+
+
+@lru_cache(maxsize=2 * TOTAL_LEVELS)
+def _compile(level: int, width: int, height: int) -> CompiledLevel:
+    return CompiledLevel(level, width, height)
+
+
+def get_level(level: int, width: int = GRID_W, height: int = GRID_H) -> CompiledLevel:
+    if (width, height) == (GRID_W, GRID_H):
+        return LEVELS[level]
+    return _compile(level, width, height)
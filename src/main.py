@@ -1,37 +1,57 @@
-"""FastAPI application — HTTP route, WebSocket endpoint, game loop."""
+"""FastAPI application — HTTP routes and the WebSocket endpoint."""
 
 import asyncio
+import itertools
 import json
 import os
 
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 
-from .constants import GRID_W, GRID_H, TICK_RATE, TOTAL_LEVELS, DIRECTIONS, NEON_COLORS, HEAD_AVATARS, MAX_LIVES, MIN_TICK_RATE, MAX_TICK_RATE
+from .constants import (
+    DEFAULT_ROOM, ROOM_IDLE_TIMEOUT, DIRECTIONS, NEON_COLORS, HEAD_AVATARS, MIN_TICK_RATE,
+    MAX_TICK_RATE, GRID_W, GRID_H, MAX_GRID_W, MAX_GRID_H,
+)
 from .models import PlayerLocation
 import re
 
-
-# Custom heads storage (player_id -> base64 data URL)
-custom_heads = {}
-from .game import GameState
-from .levels import build_level_walls
+from . import metrics
+from .assets import HeadAssetStore
+from .compression import Deflater
 from .models import PlayerState
-from .connection_manager import ConnectionManager, walls_to_list, build_state_msg, build_lobby_msg
+from .rooms import ROOM_ID_PATTERN, Room, RoomRegistry
+from .sessions import Session
+from .connection_manager import ConnectionManager, build_lobby_msg
+from .recording import RECORDING_NAME_PATTERN, list_recordings
+from .replay import REPLAY_VIEWER, Replay, play
+
+# Close codes of clients that meant to leave; after any other, the player is held for a resume
+CLEAN_CLOSE_CODES = (1000, 1001)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    asyncio.create_task(game_loop())
+    lag_probe = asyncio.create_task(metrics.probe_loop_lag())
     yield
+    lag_probe.cancel()
+    rooms.stop_all()
 
 
 app = FastAPI(lifespan=lifespan)
-game = GameState()
-manager = ConnectionManager()
+# Matches are recorded to RECORD_DIR when it is set
+record_dir = os.getenv("RECORD_DIR") or None
+if record_dir is not None:
+    os.makedirs(record_dir, exist_ok=True)
+rooms = RoomRegistry(idle_timeout=ROOM_IDLE_TIMEOUT, deflater=Deflater.from_env(),
+                     record_dir=record_dir)
+# Custom head images, content-addressed (asset id -> decoded image)
+head_assets = HeadAssetStore()
+# Never reused: a held player outlives its socket, whose id() a new socket can get
+player_ids = itertools.count(1)
 
 # Mount static files directory
 static_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
@@ -45,10 +65,90 @@ async def serve_index():
     return FileResponse(HTML_PATH, media_type="text/html")
 
 
+@app.get("/assets/heads/{asset_id}")
+async def serve_custom_head(asset_id: str):
+    asset = head_assets.get(asset_id)
+    if asset is None:
+        return Response(status_code=404)
+    media_type, data = asset
+    # Asset ids are content hashes, so the response never changes
+    return Response(content=data, media_type=media_type, headers={
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{asset_id}"',
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'",
+    })
+
+
+@app.get("/rooms")
+async def list_rooms():
+    return {"rooms": rooms.summaries()}
+
+
+@app.post("/rooms")
+async def create_room(room_id: Optional[str] = None):
+    """Create a room; the router passes ``room_id`` so the id hashes to this worker."""
+    if room_id is not None and not ROOM_ID_PATTERN.match(room_id):
+        return Response(status_code=400)
+    room = rooms.create(room_id)
+    return room.summary()
+
+
+@app.get("/recordings")
+async def serve_recordings():
+    """Recorded matches, for ``/ws?replay=<name>``."""
+    return {"recordings": list_recordings(record_dir) if record_dir is not None else []}
+
+
+@app.get("/debug/connections")
+async def debug_connections():
+    """Per-socket outbound queue depth, drops and send latency, by room."""
+    return {room_id: room.manager.stats() for room_id, room in rooms.rooms.items()}
+
+
+@app.get("/debug/messages")
+async def debug_messages():
+    """Messages, raw and on-the-wire bytes and compression time per message type, by room."""
+    return {room_id: room.manager.message_stats() for room_id, room in rooms.rooms.items()}
+
+
+@app.get("/debug/tick")
+async def debug_tick():
+    """Per-phase tick timings against the tick budget, overruns and skipped ticks, by room."""
+    return {room_id: room.tick_stats.snapshot(room.scheduler)
+            for room_id, room in rooms.rooms.items()}
+
+
+@app.get("/debug/frames")
+async def debug_frames():
+    """Wall-clock time each recent state frame's tick began, as [seq, time] pairs, by room."""
+    return {room_id: list(room.frame_times) for room_id, room in rooms.rooms.items()}
+
+
+@app.get("/metrics")
+async def serve_metrics():
+    """Prometheus text exposition of tick times, sockets, players, messages and failures."""
+    return PlainTextResponse(metrics.render(rooms), media_type="text/plain; version=0.0.4")
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
-    player_id = f"p{id(ws)}"
+    replay_name = ws.query_params.get("replay")
+    if replay_name is not None:
+        await replay_endpoint(ws, replay_name)
+        return
+    player_id = f"p{next(player_ids)}"
+    room_id = ws.query_params.get("room") or DEFAULT_ROOM
+    if not ROOM_ID_PATTERN.match(room_id):
+        await ws.close(code=1008)
+        return
+    room = rooms.get_or_create(room_id)
+    game, manager = room.game, room.manager
+    room.enter()
     await ws.accept()
+    session: Optional[Session] = None
+    reason = "client"
+    close_code = None
     try:
         while True:
             raw = await ws.receive_text()
@@ -62,43 +162,110 @@ async def websocket_endpoint(ws: WebSocket):
                 # Handle custom head or emoji avatar
                 custom_head = msg.get("custom_head")
                 head_avatar = msg.get("head_avatar", "angel")
-
-                if custom_head:
-                    # Validate custom head format
-                    if validate_custom_head(custom_head):
-                        custom_heads[player_id] = custom_head
-                        head_avatar = None  # Clear emoji avatar
-                    else:
-                        custom_head = None
-                        if head_avatar not in HEAD_AVATARS:
-                            head_avatar = "angel"
-                else:
-                    if head_avatar not in HEAD_AVATARS:
-                        head_avatar = "angel"
-
-                p = PlayerState(pid=player_id, name=name, color=color, head_avatar=head_avatar, custom_head=custom_head)
+                custom_head_id = None
+
+                if custom_head and validate_custom_head(custom_head):
+                    # Register once; state messages only carry the asset id
+                    custom_head_id = head_assets.register(custom_head)
+                if custom_head_id:
+                    head_avatar = None  # Clear emoji avatar
+                elif head_avatar not in HEAD_AVATARS:
+                    head_avatar = "angel"
+
+                old_p = game.remove_player(player_id)
+                if old_p is not None:
+                    room.record("leave", player_id)
+                    head_assets.release(old_p.custom_head_id)
+                    room.wake()  # they may have been the one pausing the game
+                p = PlayerState(pid=player_id, name=name, color=color, head_avatar=head_avatar,
+                                custom_head_id=custom_head_id)
                 game.players[player_id] = p
-                manager.connections[ws] = player_id
-                await ws.send_text(json.dumps({
+                room.record("join", player_id, name, color, head_avatar, custom_head_id)
+                if session is None:
+                    session = room.open_session(player_id, ws)
+                # Clients that can decode binary frames get state and level messages that way
+                binary = msg.get("encoding") == "binary"
+                compress = msg.get("compression") == "deflate"
+                conn = manager.connect(ws, player_id, binary, compress=compress)
+                await manager.send_personal(ws, json.dumps({
                     "type": "welcome",
                     "player_id": player_id,
+                    "room_id": room.room_id,
+                    "encoding": "binary" if binary else "json",
+                    "compression": "deflate" if conn.compress else "none",
+                    "session": session.token,
                 }))
 
                 # If game is in progress, send game state for spectating
                 if game.started:
-                    await ws.send_text(json.dumps({
-                        "type": "game_in_progress",
-                        "level": game.level,
-                        "walls": walls_to_list(game.walls),
-                        "grid": [GRID_W, GRID_H],
-                    }))
+                    await manager.send_personal(ws, room.level_msg("game_in_progress"))
                     # Send lobby state so late joiners can see who's playing
-                    await ws.send_text(build_lobby_msg(game))
-                    # Send current state immediately
-                    await ws.send_text(build_state_msg(game))
+                    await manager.send_personal(ws, build_lobby_msg(game))
+                    # Send current state immediately; deltas follow from the next tick
+                    await manager.send_personal(ws, room.keyframe(player_id))
+                    if room.minimap is not None:
+                        await manager.send_personal(ws, room.minimap)
                 else:
                     # Only broadcast to lobby if game hasn't started
                     await manager.broadcast(build_lobby_msg(game))
+            elif msg["type"] == "resume":
+                # A new socket taking over a player whose connection dropped
+                token = msg.get("session")
+                resumed = None
+                if session is None and isinstance(token, str):
+                    resumed = room.sessions.get(token)
+                if (resumed is None or resumed.player_id not in game.players
+                        or not room.owns(resumed)):
+                    await manager.send_personal(ws, json.dumps({"type": "resume_failed"}))
+                else:
+                    previous = resumed.ws
+                    room.resume(resumed, ws)
+                    session = resumed
+                    player_id = session.player_id
+                    if previous is not None:
+                        # The old socket hasn't noticed it is gone; its handler leaves the
+                        # player alone
+                        manager.disconnect(previous)
+                        try:
+                            await previous.close(code=4000)
+                        except Exception:
+                            pass
+                    binary = msg.get("encoding") == "binary"
+                    compress = msg.get("compression") == "deflate"
+                    conn = manager.connect(ws, player_id, binary, compress=compress)
+                    await manager.send_personal(ws, json.dumps({
+                        "type": "welcome",
+                        "player_id": player_id,
+                        "room_id": room.room_id,
+                        "encoding": "binary" if binary else "json",
+                        "compression": "deflate" if conn.compress else "none",
+                        "session": session.token,
+                        "resumed": True,
+                    }))
+                    last_seq = msg.get("last_seq")
+                    if not isinstance(last_seq, int):
+                        last_seq = None  # the client had no game state
+                    if game.started:
+                        if last_seq is None:
+                            playing = game.players[player_id].location == PlayerLocation.PLAYING
+                            msg_type = "game_start" if playing else "game_in_progress"
+                            await manager.send_personal(ws, room.level_msg(msg_type))
+                        elif msg.get("level") != game.level:
+                            await manager.send_personal(ws, room.level_msg("level_change"))
+                        for frame in room.catch_up(player_id, last_seq):
+                            await manager.send_personal(ws, frame)
+                        if room.minimap is not None:
+                            await manager.send_personal(ws, room.minimap)
+                        if game.paused_players:
+                            await manager.send_personal(ws, json.dumps({
+                                "type": "pause_state",
+                                "paused_players": list(game.paused_players),
+                            }))
+                    else:
+                        if last_seq is not None:
+                            # The game ended while the client was away
+                            await manager.send_personal(ws, json.dumps({"type": "return_to_lobby"}))
+                        await manager.send_personal(ws, build_lobby_msg(game))
             elif msg["type"] == "ready":
                 # Ignore ready messages during a game - must wait for game to end
                 if player_id in game.players and not game.started:
@@ -119,13 +286,8 @@ async def websocket_endpoint(ws: WebSocket):
                         for pid, p in game.players.items():
                             if getattr(p, 'is_ai', False):
                                 p.location = PlayerLocation.PLAYING
-                        game.start_game()
-                        await manager.broadcast(json.dumps({
-                            "type": "game_start",
-                            "level": game.level,
-                            "walls": walls_to_list(game.walls),
-                            "grid": [GRID_W, GRID_H],
-                        }))
+                        room.start_game()
+                        await manager.broadcast(room.level_msg("game_start"))
             elif msg["type"] == "game_options":
                 if player_id in game.players and not game.started:
                     fta = msg.get("food_to_advance")
@@ -146,6 +308,12 @@ async def websocket_endpoint(ws: WebSocket):
                     tick_rate = msg.get("tick_rate")
                     if isinstance(tick_rate, int) and MIN_TICK_RATE <= tick_rate <= MAX_TICK_RATE:
                         game.game_options["tick_rate"] = tick_rate
+                    grid_size = msg.get("grid_size")
+                    if (isinstance(grid_size, list) and len(grid_size) == 2
+                            and all(isinstance(n, int) for n in grid_size)
+                            and GRID_W <= grid_size[0] <= MAX_GRID_W
+                            and GRID_H <= grid_size[1] <= MAX_GRID_H):
+                        game.set_grid_size(*grid_size)
                     await manager.broadcast(build_lobby_msg(game))
             elif msg["type"] == "add_ai":
                 if player_id in game.players and not game.started:
@@ -164,33 +332,40 @@ async def websocket_endpoint(ws: WebSocket):
                         game.paused_players.discard(player_id)
                     else:
                         game.paused_players.add(player_id)
+                    room.record("pause", player_id)
+                    room.wake()
                     # Broadcast new pause state to all players
                     await manager.broadcast(json.dumps({
                         "type": "pause_state",
                         "paused_players": list(game.paused_players),
                     }))
+            elif msg["type"] == "list_rooms":
+                await manager.send_personal(ws, json.dumps({
+                    "type": "room_list",
+                    "rooms": rooms.summaries(),
+                }))
+            elif msg["type"] == "resync":
+                # Client missed a state_delta; send a full snapshot to rebase on
+                if game.started:
+                    await manager.send_personal(ws, room.keyframe(player_id))
             elif msg["type"] == "input":
                 if player_id in game.players and game.started and player_id not in game.paused_players:
                     d = msg.get("direction")
-                    if d in DIRECTIONS:
-                        game.players[player_id].next_direction = d
+                    # Predicting clients number their moves; see queue_input
+                    seq = msg.get("seq")
+                    if type(seq) is not int or seq < 0:
+                        seq = None
+                    # A dropped move is recorded too if numbered, since it still moves input_seq on
+                    if d in DIRECTIONS and (game.queue_input(player_id, d, seq) or seq is not None):
+                        room.record("input", player_id, d, seq)
             elif msg["type"] == "return_to_lobby":
                 if player_id in game.players:
-                    player = game.players[player_id]
-
                     # Move only this player to lobby
-                    player.location = PlayerLocation.LOBBY
-                    player.score = 0
-                    lives = game.game_options.get("lives", MAX_LIVES)
-                    player.lives = lives
-                    player.alive = True
-                    player.game_over = False
-                    player.segments = []
-                    player.respawn_at = None
-                    game.ready_players.discard(player_id)
+                    game.move_to_lobby(player_id)
+                    room.record("lobby", player_id)
 
                     # Send personal message to move this client to lobby
-                    await ws.send_text(json.dumps({"type": "move_to_lobby"}))
+                    await manager.send_personal(ws, json.dumps({"type": "move_to_lobby"}))
 
                     # Broadcast player location change
                     await manager.broadcast(json.dumps({
@@ -200,99 +375,102 @@ async def websocket_endpoint(ws: WebSocket):
                     }))
 
                     # Send lobby state to this player so they can see who's playing
-                    await ws.send_text(build_lobby_msg(game))
+                    await manager.send_personal(ws, build_lobby_msg(game))
 
                     # Only reset game if NO active players remain
                     if game.started and not game.has_active_players:
-                        # Capture final scores before reset
-                        final_scores = [
-                            {"name": p.name, "color": p.color, "score": p.score, "is_ai": getattr(p, "is_ai", False)}
-                            for p in game.players.values()
-                        ]
-                        final_scores.sort(key=lambda x: x["score"], reverse=True)
-
-                        game.started = False
-                        game.paused_players.clear()
-                        game.level = 1
-                        game.walls = build_level_walls(1)
-                        game.food.clear()
-                        game.food_eaten = 0
-                        game.level_changing = False
-                        game.level_change_at = None
-                        game.eaten_events.clear()
-                        game.ready_players.clear()
-                        for p in game.players.values():
-                            p.score = 0
-                            p.lives = lives
-                            p.alive = True
-                            p.game_over = False
-                            p.segments = []
-                            p.respawn_at = None
-                            if hasattr(p, 'ai_decision_at'):
-                                p.ai_decision_at = 0.0
-                        await manager.broadcast(json.dumps({"type": "game_end", "final_scores": final_scores}))
-                        await manager.broadcast(build_lobby_msg(game))
+                        await room.end_game()
+    except WebSocketDisconnect as exc:
+        close_code = exc.code
+    except Exception:
+        reason = "error"
+    finally:
+        metrics.disconnects.inc(reason)
+        manager.disconnect(ws)
+        # Unless a resume on another socket has already taken the player over
+        if session is None or session.ws is ws:
+            if (session is not None and reason == "client" and close_code not in CLEAN_CLOSE_CODES
+                    and player_id in game.players):
+                # Maybe just a network blip: keep the player for the client to resume
+                room.hold(session, lambda: expire_player(room, player_id))
+            else:
+                if session is not None:
+                    room.close_session(session)
+                await release_player(room, player_id)
+        room.leave()
+        rooms.discard_if_empty(room)
+
+
+async def replay_endpoint(ws: WebSocket, name: str):
+    """Play a recorded match to one socket, which watches it like a spectator."""
+    if record_dir is None or not RECORDING_NAME_PATTERN.match(name):
+        await ws.close(code=1008)
+        return
+    try:
+        speed = min(max(float(ws.query_params.get("speed", "1")), 0.25), 16.0)
+    except ValueError:
+        speed = 1.0
+    await ws.accept()
+    try:
+        replay = Replay(os.path.join(record_dir, name))
+    except (OSError, ValueError):
+        await ws.close(code=1011)
+        return
+    manager = ConnectionManager(rooms.deflater)
+    playback: Optional[asyncio.Task] = None
+    reason = "client"
+    try:
+        while True:
+            msg = json.loads(await ws.receive_text())
+            # The client joins as usual; only its encoding matters
+            if msg["type"] == "join" and playback is None:
+                binary = msg.get("encoding") == "binary"
+                compress = msg.get("compression") == "deflate"
+                conn = manager.connect(ws, REPLAY_VIEWER, binary, compress=compress)
+                await manager.send_personal(ws, json.dumps({
+                    "type": "welcome",
+                    "player_id": None,
+                    "replay": name,
+                    "encoding": "binary" if binary else "json",
+                    "compression": "deflate" if conn.compress else "none",
+                }))
+                playback = asyncio.create_task(play(replay, manager, speed))
     except WebSocketDisconnect:
         pass
     except Exception:
-        pass
+        reason = "error"
     finally:
-        manager.connections.pop(ws, None)
-        game.ready_players.discard(player_id)
-        game.players.pop(player_id, None)
-        custom_heads.pop(player_id, None)  # Clean up custom head
-        # Reset game state when last player disconnects
-        if not game.players:
-            game.started = False
-            game.paused_players.clear()
-            game.level = 1
-            game.walls = build_level_walls(1)
-            game.food.clear()
-            game.food_eaten = 0
-            game.level_changing = False
-            game.level_change_at = None
-            game.eaten_events.clear()
-            game.ready_players.clear()
-        # If no active players remain, end the game
-        elif game.started and not game.has_active_players:
-            # Capture final scores before reset
-            final_scores = [
-                {"name": p.name, "color": p.color, "score": p.score, "is_ai": getattr(p, "is_ai", False)}
-                for p in game.players.values()
-            ]
-            final_scores.sort(key=lambda x: x["score"], reverse=True)
-
-            game.started = False
-            game.paused_players.clear()
-            game.level = 1
-            game.walls = build_level_walls(1)
-            game.food.clear()
-            game.food_eaten = 0
-            game.level_changing = False
-            game.level_change_at = None
-            game.eaten_events.clear()
-            game.ready_players.clear()
-            lives = game.game_options.get("lives", MAX_LIVES)
-            for p in game.players.values():
-                p.score = 0
-                p.lives = lives
-                p.alive = True
-                p.game_over = False
-                p.segments = []
-                p.respawn_at = None
-                if hasattr(p, 'ai_decision_at'):
-                    p.ai_decision_at = 0.0
-            await manager.broadcast(json.dumps({"type": "game_end", "final_scores": final_scores}))
-        if not game.started:
-            await manager.broadcast(build_lobby_msg(game))
-
-
-def any_paused_human_players(game_state: GameState) -> bool:
-    """Check if any human (non-AI) players are paused."""
-    for pid in game_state.paused_players:
-        if pid in game_state.players and not getattr(game_state.players[pid], 'is_ai', False):
-            return True
-    return False
+        metrics.disconnects.inc(reason)
+        if playback is not None:
+            playback.cancel()
+        manager.disconnect(ws)
+
+
+async def release_player(room: Room, player_id: str):
+    """Take a departed player out of the room's game.
+
+    The game is ended or reset if they were the last.
+    """
+    game = room.game
+    left = game.remove_player(player_id)
+    if left is not None:
+        room.record("leave", player_id)
+        head_assets.release(left.custom_head_id)  # Clean up custom head
+        room.wake()  # a paused player leaving unpauses, an empty room stops
+    # Reset game state when last player disconnects
+    if not game.players:
+        game.reset()
+    # If no active players remain, end the game
+    elif game.started and not game.has_active_players:
+        await room.end_game()
+    elif not game.started:
+        await room.manager.broadcast(build_lobby_msg(game))
+
+
+async def expire_player(room: Room, player_id: str):
+    """A held player's resume window ran out."""
+    await release_player(room, player_id)
+    rooms.discard_if_empty(room)
 
 
 def validate_custom_head(data_url: str) -> bool:
@@ -319,67 +497,11 @@ def validate_custom_head(data_url: str) -> bool:
     return True
 
 
-async def game_loop():
-    prev_level = game.level
-    while True:
-        current_tick_rate = game.game_options.get("tick_rate", TICK_RATE)
-        if not game.started or any_paused_human_players(game):
-            await asyncio.sleep(1 / current_tick_rate)
-            continue
-
-        game.tick()
-
-        if game.level != prev_level:
-            level_msg = json.dumps({
-                "type": "level_change",
-                "level": game.level,
-                "walls": walls_to_list(game.walls),
-            })
-            await manager.broadcast(level_msg)
-            prev_level = game.level
-
-        state_msg = build_state_msg(game)
-        await manager.broadcast(state_msg)
-
-        # Auto-end game when no active human players remain
-        if game.started and not game.has_active_players:
-            # Capture final scores before reset
-            final_scores = [
-                {"name": p.name, "color": p.color, "score": p.score, "is_ai": getattr(p, "is_ai", False)}
-                for p in game.players.values()
-            ]
-            final_scores.sort(key=lambda x: x["score"], reverse=True)
-
-            game.started = False
-            game.paused_players.clear()
-            game.level = 1
-            game.walls = build_level_walls(1)
-            game.food.clear()
-            game.food_eaten = 0
-            game.level_changing = False
-            game.level_change_at = None
-            game.eaten_events.clear()
-            game.ready_players.clear()
-            lives = game.game_options.get("lives", MAX_LIVES)
-            for p in game.players.values():
-                p.score = 0
-                p.lives = lives
-                p.alive = True
-                p.game_over = False
-                p.segments = []
-                p.respawn_at = None
-                if hasattr(p, 'ai_decision_at'):
-                    p.ai_decision_at = 0.0
-            await manager.broadcast(json.dumps({"type": "game_end", "final_scores": final_scores}))
-            await manager.broadcast(build_lobby_msg(game))
-            prev_level = game.level
-
-        await asyncio.sleep(1 / current_tick_rate)
-
-
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", "8765"))
     host = os.getenv("HOST", "0.0.0.0")
     print(f"Snake server starting on http://{host}:{port}")
-    uvicorn.run(app, host=host, port=port)
+    # Transport-level permessage-deflate; turn it off when WS_COMPRESSION already deflates
+    ws_deflate = os.getenv("WS_PER_MESSAGE_DEFLATE", "1") != "0"
+    uvicorn.run(app, host=host, port=port, ws_per_message_deflate=ws_deflate)
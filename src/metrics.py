@@ -0,0 +1,204 @@
+"""Process-wide metrics in the Prometheus text format, served at ``/metrics``.
+
+Hot paths only bump counters and histogram buckets defined here. Gauges
+(sockets, players, rooms) and per-message totals are read from the rooms
+when scraped, so an unscraped server pays nothing for them.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+from .models import PlayerLocation
+
+TICK_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+INPUT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LAG_PROBE_INTERVAL = 0.5  # seconds between event loop lag probes
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    """A monotonic total, optionally split by label values."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        # An unlabelled counter reports 0 before its first increment
+        self.values: dict[tuple, float] = {} if labels else {(): 0}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Histogram:
+    """Fixed buckets; ``observe`` is one bisect and three additions."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.label_names = labels
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = _labels(self.label_names + ("le",), labels + (bound,))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            suffix = _labels(self.label_names, labels)
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+def _gauge(name: str, help_text: str, samples: Iterable[tuple[str, float]]) -> Iterable[str]:
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} gauge"
+    for labels, value in samples:
+        yield f"{name}{labels} {value}"
+
+
+tick_seconds = Histogram("snake_tick_seconds", "Time per game tick by phase.", TICK_BUCKETS,
+                         ("phase",))
+tick_overruns = Counter("snake_tick_overruns_total",
+                        "Ticks that took longer than the tick interval.")
+input_latency = Histogram("snake_input_latency_seconds",
+                          "Time from a move arriving to the tick that applied it.", INPUT_BUCKETS)
+ai_decisions = Counter("snake_ai_decisions_total", "Bot direction decisions made.")
+send_failures = Counter("snake_send_failures_total",
+                        "Sends that raised on a socket, which then stops receiving.")
+dropped_frames = Counter("snake_dropped_frames_total",
+                         "State frames dropped from full send queues.")
+slow_clients = Counter("snake_slow_client_closes_total",
+                       "Sockets closed for staying backed up too long.")
+disconnects = Counter("snake_disconnects_total",
+                      "Closed WebSockets, by whether the client left or handling failed.",
+                      ("reason",))
+resumes = Counter("snake_resumes_total",
+                  "Dropped players resumed by a new socket, by how it caught up.", ("catch_up",))
+held_expired = Counter("snake_held_expired_total",
+                       "Dropped players removed when their resume window ran out.")
+recording_errors = Counter("snake_recording_errors_total",
+                           "Match recording batches that failed to write.")
+loop_lag = Histogram("snake_event_loop_lag_seconds", "How late the event loop ran a timer.",
+                     LAG_BUCKETS)
+
+MESSAGE_TOTALS = ("messages", "raw_bytes", "wire_bytes")
+# Message totals of rooms that no longer exist, so counts never go down
+retired_messages: dict[str, dict] = {}
+
+
+def retire_messages(types: dict[str, dict]):
+    """Keep a closing room's ``MessageCounters.types`` in the process totals."""
+    for msg_type, entry in types.items():
+        total = retired_messages.setdefault(msg_type, dict.fromkeys(MESSAGE_TOTALS, 0))
+        for key in MESSAGE_TOTALS:
+            total[key] += entry[key]
+
+
+async def probe_loop_lag(interval: float = LAG_PROBE_INTERVAL):
+    """Sleep ``interval`` over and over and record how late each wake-up is."""
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        loop_lag.observe(max(0.0, time.monotonic() - started - interval))
+
+
+def render(rooms) -> str:
+    """The exposition text for a ``RoomRegistry``."""
+    live = list(rooms.rooms.values())
+    sockets = sum(room.occupants for room in live)
+    joined = sum(len(room.manager.connections) for room in live)
+    players = {location: 0 for location in PlayerLocation}
+    bots = 0
+    for room in live:
+        for p in room.game.players.values():
+            if p.is_ai:
+                bots += 1
+            else:
+                players[p.location] += 1
+
+    messages: dict[str, dict] = {}
+    for types in [retired_messages] + [room.manager.counters.types for room in live]:
+        for msg_type, entry in types.items():
+            total = messages.setdefault(msg_type, dict.fromkeys(MESSAGE_TOTALS, 0))
+            for key in MESSAGE_TOTALS:
+                total[key] += entry[key]
+
+    lines = []
+    lines += _gauge("snake_rooms", "Rooms in this process.", [("", len(live))])
+    lines += _gauge("snake_rooms_ticking", "Rooms with a game running.",
+                    [("", sum(1 for room in live if room.ticking))])
+    lines += _gauge("snake_sockets", "Open WebSockets, joined or not.", [("", sockets)])
+    lines += _gauge("snake_sockets_joined", "WebSockets that have joined a room.", [("", joined)])
+    lines += _gauge("snake_players", "Human players by location.",
+                    [(f'{{location="{loc.value}"}}', n) for loc, n in players.items()])
+    lines += _gauge("snake_bots", "Bots in all rooms.", [("", bots)])
+    for name, key, help_text in (
+        ("snake_messages_sent_total", "messages", "Messages sent by type."),
+        ("snake_message_raw_bytes_total", "raw_bytes", "Bytes sent by type before compression."),
+        ("snake_message_wire_bytes_total", "wire_bytes",
+         "Bytes sent by type as written to the socket."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for msg_type, total in sorted(messages.items()):
+            lines.append(f'{name}{{type="{msg_type}"}} {total[key]}')
+    for metric in (tick_seconds, tick_overruns, input_latency, ai_decisions, send_failures,
+                   dropped_frames, slow_clients, disconnects, resumes, held_expired,
+                   recording_errors, loop_lag):
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def merge(texts: dict[str, str]) -> str:
+    """Combine several processes' exposition text, labelling every sample with its source.
+
+    Samples are regrouped under one HELP/TYPE header per metric, as the
+    format requires.
+    """
+    families: dict[str, list] = {}
+    for source, text in texts.items():
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                name = line.split(" ", 3)[2]
+                family = families.setdefault(name, [line, None, []])
+            elif line.startswith("# TYPE "):
+                family[1] = line
+            elif line and family is not None:
+                name, _, rest = line.partition(" ")
+                if "{" in name:
+                    name = name.replace("{", f'{{worker="{source}",', 1)
+                else:
+                    name += f'{{worker="{source}"}}'
+                family[2].append(f"{name} {rest}")
+    lines = []
+    for help_line, type_line, samples in families.values():
+        lines += [help_line, type_line] + samples
+    return "\n".join(lines) + "\n"
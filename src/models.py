@@ -1,8 +1,8 @@
 """Data models."""
 
-from dataclasses import dataclass, field
+from collections import deque
 from enum import Enum
-from typing import Optional
+from typing import Iterable, Optional
 
 from .constants import MAX_LIVES
 
@@ -13,24 +13,114 @@ class PlayerLocation(Enum):
     SPECTATING = "spectating"
 
 
-@dataclass
+class SnakeBody:
+    """Snake cell ids, head first, with O(1) head push, tail pop and membership.
+
+    Cells live in a deque; a cell -> count map answers ``cell in body`` without
+    scanning. ``OccupancyGrid.to_json`` converts it for the wire.
+    """
+
+    __slots__ = ("_cells", "_counts")
+
+    def __init__(self, cells: Iterable[int] = ()):
+        self._cells = deque(cells)
+        self._counts: dict[int, int] = {}
+        for cell in self._cells:
+            self._counts[cell] = self._counts.get(cell, 0) + 1
+
+    def push_head(self, cell: int):
+        self._cells.appendleft(cell)
+        self._counts[cell] = self._counts.get(cell, 0) + 1
+
+    def pop_tail(self) -> int:
+        cell = self._cells.pop()
+        n = self._counts[cell] - 1
+        if n:
+            self._counts[cell] = n
+        else:
+            del self._counts[cell]
+        return cell
+
+    def contains_before_tail(self, cell: int) -> bool:
+        """Membership ignoring the tail cell, which moves away this tick."""
+        n = self._counts.get(cell, 0)
+        if n and self._cells[-1] == cell:
+            n -= 1
+        return n > 0
+
+    def to_list(self) -> list[int]:
+        return list(self._cells)
+
+    def __contains__(self, cell) -> bool:
+        return cell in self._counts
+
+    def __getitem__(self, index: int) -> int:
+        # Indexing is O(1) near either end, which is all the hot paths use
+        return self._cells[index]
+
+    def __iter__(self):
+        return iter(self._cells)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __repr__(self) -> str:
+        return f"SnakeBody({list(self._cells)!r})"
+
+
 class PlayerState:
-    pid: str
-    name: str
-    color: str
-    head_avatar: str = "angel"
-    custom_head: Optional[str] = None
-    segments: list = field(default_factory=list)
-    direction: str = "right"
-    next_direction: str = "right"
-    score: int = 0
-    lives: int = MAX_LIVES
-    alive: bool = True
-    game_over: bool = False
-    respawn_at: Optional[float] = None
-    is_ai: bool = False
-    ai_decision_at: float = 0.0
-    location: PlayerLocation = PlayerLocation.LOBBY
+    """One player's state. Slotted, since rooms hold many and touch them every tick."""
+
+    __slots__ = (
+        "pid", "name", "color", "head_avatar", "custom_head_id", "segments",
+        "direction", "next_direction", "score", "lives", "alive", "game_over",
+        "respawn_at", "is_ai", "ai_decision_at", "location", "inputs", "input_seq",
+    )
+
+    def __init__(
+        self,
+        pid: str,
+        name: str,
+        color: str,
+        head_avatar: Optional[str] = "angel",
+        custom_head_id: Optional[str] = None,  # HeadAssetStore id
+        segments: Optional[SnakeBody] = None,
+        direction: str = "right",
+        next_direction: str = "right",
+        score: int = 0,
+        lives: int = MAX_LIVES,
+        alive: bool = True,
+        game_over: bool = False,
+        respawn_at: Optional[float] = None,
+        is_ai: bool = False,
+        ai_decision_at: float = 0.0,
+        location: PlayerLocation = PlayerLocation.LOBBY,
+    ):
+        self.pid = pid
+        self.name = name
+        self.color = color
+        self.head_avatar = head_avatar
+        self.custom_head_id = custom_head_id
+        self.segments = segments if segments is not None else SnakeBody()
+        self.direction = direction
+        self.next_direction = next_direction
+        self.score = score
+        self.lives = lives
+        self.alive = alive
+        self.game_over = game_over
+        self.respawn_at = respawn_at
+        self.is_ai = is_ai
+        self.ai_decision_at = ai_decision_at
+        self.location = location
+        # Queued human moves, oldest first, as (direction, time received, client seq);
+        # one is applied per tick
+        self.inputs: deque[tuple[str, float, Optional[int]]] = deque()
+        # The client's seq of the last move the game has dealt with (applied or dropped)
+        self.input_seq = 0
 
     def head(self):
         return self.segments[0] if self.segments else None
+
+    def __repr__(self) -> str:
+        return (f"PlayerState(pid={self.pid!r}, name={self.name!r}, "
+                f"location={self.location.value!r})")
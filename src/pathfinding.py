@@ -0,0 +1,133 @@
+"""Grid search helpers for AI snakes.
+
+Both searches step between cell ids with ``OccupancyGrid.steps`` and rely on
+the border walls every level has to keep them on the board.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from .grid import OccupancyGrid
+from .models import SnakeBody
+
+UNREACHABLE = 1 << 30  # sorts after every real distance
+
+
+@lru_cache(maxsize=32)
+def open_neighbors(walls: bytes, width: int) -> tuple:
+    """For each cell id, the ids of its non-wall neighbours (cached per wall map)."""
+    steps = (-width, width, -1, 1)
+    size = len(walls)
+    return tuple(
+        () if walls[cell]
+        else tuple(cell + s for s in steps if 0 <= cell + s < size and not walls[cell + s])
+        for cell in range(size)
+    )
+
+
+def distance_field(grid: OccupancyGrid, sources: Iterable[int]) -> list[int]:
+    """Shortest walking distance around walls from every cell to the nearest source.
+
+    A multi-source BFS; cells that can't reach any source are ``UNREACHABLE``.
+    Snakes are ignored so the field stays valid until the sources or walls
+    change.
+    """
+    neighbors = open_neighbors(grid.walls, grid.width)
+    dist = [UNREACHABLE] * len(neighbors)
+    frontier = []
+    for cell in sources:
+        if dist[cell] == UNREACHABLE:
+            dist[cell] = 0
+            frontier.append(cell)
+    d = 0
+    while frontier:
+        d += 1
+        nxt = []
+        for cell in frontier:
+            for n in neighbors[cell]:
+                if dist[n] == UNREACHABLE:
+                    dist[n] = d
+                    nxt.append(n)
+        frontier = nxt
+    return dist
+
+
+def update_distance_field(grid: OccupancyGrid, dist: list[int], added: Iterable[int],
+                          removed: Iterable[int]):
+    """Bring a ``distance_field`` up to date in place after sources were added and removed.
+
+    Only cells whose nearest source changed are visited: the cells a removed
+    source was nearest to are cleared and filled in again from around them,
+    and added sources spread until they reach cells that are as close to
+    another one. Each food eaten or spawned costs about its own share of the
+    board rather than the whole board.
+    """
+    neighbors = open_neighbors(grid.walls, grid.width)
+    # Everything whose shortest path ran through a removed source: distances
+    # rising one step at a time away from it
+    cleared = []
+    for source in removed:
+        if dist[source] != 0:
+            continue
+        dist[source] = UNREACHABLE
+        cleared.append(source)
+        stack = [(source, 0)]
+        while stack:
+            cell, d = stack.pop()
+            for n in neighbors[cell]:
+                if dist[n] == d + 1:
+                    dist[n] = UNREACHABLE
+                    cleared.append(n)
+                    stack.append((n, d + 1))
+
+    # Fill in from the cells bordering the cleared ones and from the new
+    # sources, nearest first
+    buckets: dict[int, list[int]] = {}
+    for cell in cleared:
+        best = UNREACHABLE
+        for n in neighbors[cell]:
+            if dist[n] + 1 < best:
+                best = dist[n] + 1
+        if best < UNREACHABLE:
+            dist[cell] = best
+            buckets.setdefault(best, []).append(cell)
+    for source in added:
+        if dist[source] != 0:
+            dist[source] = 0
+            buckets.setdefault(0, []).append(source)
+    d = min(buckets, default=None)
+    while buckets:
+        for cell in buckets.pop(d, ()):
+            if dist[cell] != d:
+                continue  # reached sooner from somewhere else
+            for n in neighbors[cell]:
+                if d + 1 < dist[n]:
+                    dist[n] = d + 1
+                    buckets.setdefault(d + 1, []).append(n)
+        d += 1
+
+
+def open_area(grid: OccupancyGrid, start: int, limit: int, body: Optional[SnakeBody] = None) -> int:
+    """Free cells reachable from ``start``, counted up to ``limit``.
+
+    ``start`` itself counts as free. Snakes block unless ``body`` is given,
+    in which case only that body does (for games without collisions).
+    """
+    walls = grid.walls
+    snakes = grid.snakes
+    steps = tuple(grid.steps.values())
+    seen = {start}
+    stack = [start]
+    while stack:
+        cell = stack.pop()
+        for step in steps:
+            n = cell + step
+            if n in seen or walls[n]:
+                continue
+            if (n in body) if body is not None else snakes[n]:
+                continue
+            seen.add(n)
+            if len(seen) >= limit:
+                return limit
+            stack.append(n)
+    return len(seen)
@@ -0,0 +1,197 @@
+"""Match recordings: everything needed to re-run a match tick for tick.
+
+A recording is a header (seed, options, board size, the roster and who is
+held or paused at the start) and then one line per tick: the clock value
+the tick ran at and the events applied since the tick before (inputs,
+joins, leaves, pauses...).
+``GameState`` draws everything random from its rng and reads the clock once
+per tick, so replaying the events into a game seeded the same way gives
+the same match. Every ``RECORD_FLUSH_TICKS`` ticks a fingerprint of the
+game is written too, so a replay can tell where it diverged.
+
+Lines are JSON. The recorder batches them and a single writer thread
+appends each batch to the file as one gzip member, so the tick loop only
+pays for ``json.dumps``. ``gzip.open`` reads the members back as one
+stream.
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from . import metrics
+from .constants import RECORD_COMPRESS_LEVEL, RECORD_FLUSH_TICKS
+from .game import GameState
+from .models import PlayerLocation, PlayerState
+
+RECORDING_VERSION = 4
+RECORDING_SUFFIX = ".rec.gz"
+# <room id>-<date>-<time>-<seed>.rec.gz
+RECORDING_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}-\d{8}-\d{6}-[0-9a-f]{8}\.rec\.gz$")
+
+# One thread for every room, so each file's batches land in order
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder")
+
+
+def fingerprint(game: GameState) -> str:
+    """Short checksum of bodies, food, scores and level, for comparing runs."""
+    parts = [str(game.level), ",".join(map(str, game.food))]
+    for pid in sorted(game.players):
+        p = game.players[pid]
+        parts.append(f"{pid}:{p.score}:{p.lives}:{p.direction}:{','.join(map(str, p.segments))}")
+    return f"{zlib.crc32('|'.join(parts).encode()):08x}"
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _append(path: str, text: str):
+    try:
+        with open(path, "ab") as f:
+            f.write(gzip.compress(text.encode(), RECORD_COMPRESS_LEVEL))
+    except OSError:
+        metrics.recording_errors.inc()
+
+
+class MatchRecorder:
+    """Records one match, from ``start_game`` to the end, into ``path``.
+
+    The room calls ``event`` as it changes the game between ticks and
+    ``tick`` after each tick; ``close`` writes what is left.
+    """
+
+    def __init__(self, path: str, game: GameState, seed: int, room_id: str,
+                 flush_ticks: int = RECORD_FLUSH_TICKS):
+        self.path = path
+        self.flush_ticks = flush_ticks
+        self.ticks = 0
+        self._events: list = []
+        self._lines = [_dumps({
+            "version": RECORDING_VERSION,
+            "room": room_id,
+            "started_at": time.time(),
+            "seed": seed,
+            "options": game.game_options,
+            "players": [
+                {
+                    "pid": p.pid, "name": p.name, "color": p.color,
+                    "head_avatar": p.head_avatar, "custom_head_id": p.custom_head_id,
+                    "is_ai": p.is_ai, "location": p.location.value,
+                }
+                for p in game.players.values()
+            ],
+            # Held and paused snakes sit out ticks, so a replay has to start with them too
+            "held_players": sorted(game.held_players),
+            "paused_players": sorted(game.paused_players),
+        })]
+
+    @classmethod
+    def start(cls, directory: str, room_id: str, game: GameState, seed: int) -> "MatchRecorder":
+        """A recorder for a match about to start, in a new file under ``directory``."""
+        name = f"{room_id}-{time.strftime('%Y%m%d-%H%M%S')}-{seed:08x}{RECORDING_SUFFIX}"
+        return cls(os.path.join(directory, name), game, seed, room_id)
+
+    def event(self, kind: str, *args):
+        self._events.append([kind, *args])
+
+    def tick(self, now: float, game: GameState):
+        if self._events:
+            self._lines.append(_dumps([now, *self._events]))
+            self._events = []
+        else:
+            self._lines.append(_dumps([now]))
+        self.ticks += 1
+        if self.ticks % self.flush_ticks == 0:
+            self._lines.append(_dumps({"tick": self.ticks, "fingerprint": fingerprint(game)}))
+            self.flush()
+
+    def flush(self):
+        """Hand the batched lines to the writer thread."""
+        if self._lines:
+            _writer.submit(_append, self.path, "\n".join(self._lines) + "\n")
+            self._lines = []
+
+    def close(self, game: GameState):
+        """End the recording; changes made since the last tick go in the end line."""
+        end = {"end": self.ticks}
+        if self._events:
+            end["events"] = self._events
+            self._events = []
+        if game.started:
+            end["fingerprint"] = fingerprint(game)
+        self._lines.append(_dumps(end))
+        self.flush()
+
+
+def apply_event(game: GameState, event: list):
+    """Make a recorded change to the game, as the room made it."""
+    kind, *args = event
+    if kind == "input":
+        pid, direction, seq = args
+        if pid in game.players:
+            game.queue_input(pid, direction, seq)
+    elif kind == "join":
+        pid, name, color, head_avatar, custom_head_id = args
+        game.players[pid] = PlayerState(pid=pid, name=name, color=color, head_avatar=head_avatar,
+                                        custom_head_id=custom_head_id)
+    elif kind == "leave":
+        game.remove_player(args[0])
+    elif kind == "lobby":
+        game.move_to_lobby(args[0])
+    elif kind == "hold":
+        game.held_players.add(args[0])
+    elif kind == "resume":
+        game.held_players.discard(args[0])
+    elif kind == "pause":
+        pid = args[0]
+        if pid in game.paused_players:
+            game.paused_players.discard(pid)
+        else:
+            game.paused_players.add(pid)
+    else:
+        raise ValueError(f"unknown recording event {kind!r}")
+
+
+def load_game(header: dict, game: Optional[GameState] = None) -> GameState:
+    """The game as it was when the recording started, with its seed; ``start_game`` is next."""
+    if header.get("version") != RECORDING_VERSION:
+        raise ValueError(f"unsupported recording version {header.get('version')!r}")
+    if game is None:
+        game = GameState()
+    game.rng.seed(header["seed"])
+    game.game_options.update(header["options"])
+    game.set_grid_size(*header["options"]["grid_size"])
+    for entry in header["players"]:
+        fields = dict(entry, location=PlayerLocation(entry["location"]))
+        game.players[entry["pid"]] = PlayerState(**fields)
+    game.held_players.update(header["held_players"])
+    game.paused_players.update(header["paused_players"])
+    return game
+
+
+def list_recordings(directory: str) -> list[dict]:
+    """Name and size of each recording in ``directory``, oldest first."""
+    entries = [e for e in os.scandir(directory) if RECORDING_NAME_PATTERN.match(e.name)]
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    return [{"name": e.name, "bytes": e.stat().st_size} for e in entries]
+
+
+def read_recording(path: str) -> tuple[dict, Iterator]:
+    """The header and an iterator over the lines after it, decoded."""
+    f = gzip.open(path, "rt")
+    header = json.loads(f.readline())
+
+    def lines():
+        with f:
+            try:
+                for line in f:
+                    yield json.loads(line)
+            except EOFError:
+                pass  # the last batch was cut short, by a crash say
+    return header, lines()
@@ -0,0 +1,84 @@
+"""Re-running recorded matches, flat out or to spectators in game time."""
+
+import asyncio
+import json
+from typing import Optional
+
+from .connection_manager import ConnectionManager, StateEncoder, build_level_msg
+from .constants import MINIMAP_INTERVAL, REPLAY_MAX_GAP
+from .interest import ViewStreams, build_minimap_msg
+from .recording import apply_event, fingerprint, load_game, read_recording
+
+# player id of the sockets watching a replay; never one of the game's players
+REPLAY_VIEWER = "replay"
+
+
+class Replay:
+    """A recorded match re-run in a fresh ``GameState``, one tick per ``step``.
+
+    The recording's fingerprints are checked as they come up: ``diverged_at``
+    is the tick after which the replay first failed to match, and from then
+    on it is no longer the recorded match. ``ended`` says whether the
+    recording's end was reached, rather than it stopping short.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header, self._lines = read_recording(path)
+        self.game = load_game(self.header)
+        self.game.start_game()
+        self.ticks = 0
+        self.now: Optional[float] = None
+        self.checked = 0
+        self.diverged_at: Optional[int] = None
+        self.ended = False
+
+    def step(self) -> bool:
+        """Apply the next tick's events and run it; False once there are no ticks left."""
+        game = self.game
+        for line in self._lines:
+            if type(line) is list:
+                now = self.now = line[0]
+                for event in line[1:]:
+                    apply_event(game, event)
+                game.tick(now)
+                self.ticks += 1
+                return True
+            self._check(line)
+        return False
+
+    def _check(self, line: dict):
+        if "end" in line:
+            self.ended = True
+            for event in line.get("events", ()):
+                apply_event(self.game, event)
+        expected = line.get("fingerprint")
+        if expected is not None:
+            self.checked += 1
+            if self.diverged_at is None and fingerprint(self.game) != expected:
+                self.diverged_at = self.ticks
+
+
+async def play(replay: Replay, manager: ConnectionManager, speed: float = 1.0):
+    """Send a replay to ``manager``'s sockets as a game in progress, paced by the recorded clock."""
+    game = replay.game
+    grid = game.grid
+    encoder = StateEncoder()
+    views = ViewStreams()
+    level = game.level
+    await manager.broadcast(build_level_msg("game_in_progress", level, grid.width, grid.height))
+    last = None
+    while replay.step():
+        if last is not None:
+            await asyncio.sleep(min(max(replay.now - last, 0.0), REPLAY_MAX_GAP) / speed)
+        last = replay.now
+        if game.level != level:
+            level = game.level
+            await manager.broadcast(build_level_msg("level_change", level, grid.width, grid.height))
+        if game.chunks is None:
+            await manager.broadcast_state(encoder.encode(game))
+        else:
+            await manager.broadcast_state(views.encode(game, [REPLAY_VIEWER])[REPLAY_VIEWER])
+            if views.seq % MINIMAP_INTERVAL == 1:
+                await manager.broadcast_state(build_minimap_msg(game))
+    await manager.broadcast(json.dumps({"type": "game_end", "final_scores": game.final_scores()}))
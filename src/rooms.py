@@ -0,0 +1,368 @@
+"""Game rooms — independent matches hosted in one server process."""
+
+import asyncio
+import json
+import re
+import secrets
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from fastapi import WebSocket
+
+from . import metrics
+from .compression import Deflater
+from .connection_manager import ConnectionManager, StateEncoder, build_level_msg, build_lobby_msg
+from .constants import FRAME_TIME_HISTORY, MINIMAP_INTERVAL, RESUME_GRACE, TICK_RATE
+from .game import GameState
+from .interest import ViewStreams, build_minimap_msg
+from .recording import MatchRecorder
+from .scheduler import TickScheduler, TickStats
+from .sessions import Session, StateHistory
+from .wire import Frame
+
+ROOM_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+
+class Room:
+    """One match: its game state, connected sockets and tick task.
+
+    The tick task only exists while a game is running, and while a human is
+    paused it waits on an event instead of polling, so idle and paused rooms
+    cost nothing on the event loop. Code that pauses, unpauses or ends the
+    game calls ``wake`` so the task re-checks.
+
+    On the default board every socket gets the same state frames. On bigger
+    boards (``game.chunks`` is set) each gets its own window of the board
+    from ``views``, and a minimap every ``MINIMAP_INTERVAL`` ticks.
+
+    Every joined socket has a ``Session``. A held session keeps the room
+    alive, and its player in the game, until it is resumed or expires.
+
+    With a ``record_dir``, every match is recorded there: ``start_game``
+    seeds the game's rng, and whatever changes the game between ticks goes
+    through ``record`` as well.
+    """
+
+    def __init__(self, room_id: str, deflater: Optional[Deflater] = None,
+                 record_dir: Optional[str] = None):
+        self.room_id = room_id
+        self.record_dir = record_dir
+        self.recorder: Optional[MatchRecorder] = None
+        self.game = GameState()
+        self.manager = ConnectionManager(deflater)
+        self.state_encoder = StateEncoder()
+        self.views = ViewStreams()
+        self.minimap: Optional[Frame] = None
+        self.sessions: dict[str, Session] = {}  # by token
+        # The session playing each player; an older one for the same id no longer owns it
+        self.player_sessions: dict[str, Session] = {}
+        # Recent shared state frames, for resumes on the default board
+        self.history = StateHistory()
+        self.scheduler = TickScheduler(TICK_RATE)
+        self.tick_stats = TickStats()
+        # (seq, wall-clock time the tick began) of recent state frames, for load tests
+        self.frame_times: deque[tuple[int, float]] = deque(maxlen=FRAME_TIME_HISTORY)
+        self.occupants = 0  # open sockets, joined or not
+        self.empty_since: Optional[float] = time.monotonic()
+        self._prev_level = self.game.level
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def is_empty(self) -> bool:
+        return self.occupants == 0 and not self.sessions
+
+    @property
+    def ticking(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enter(self):
+        self.occupants += 1
+        self.empty_since = None
+
+    def leave(self):
+        self.occupants -= 1
+        if self.occupants <= 0:
+            self.occupants = 0
+            self.empty_since = time.monotonic()
+
+    def start_game(self):
+        """Start the match and its tick task, and its recording if the room records."""
+        game = self.game
+        if self.record_dir is not None:
+            seed = secrets.randbits(32)
+            game.rng.seed(seed)
+            self.recorder = MatchRecorder.start(self.record_dir, self.room_id, game, seed)
+        game.start_game()
+        self.start_ticking()
+
+    def record(self, kind: str, *args):
+        """Note a change made to the game between ticks, when the match is being recorded."""
+        if self.recorder is not None:
+            self.recorder.event(kind, *args)
+
+    def _finish_recording(self):
+        if self.recorder is not None:
+            self.recorder.close(self.game)
+            self.recorder = None
+
+    def start_ticking(self):
+        """Start the tick task for a game that has just started."""
+        if self.ticking:
+            return
+        self.state_encoder.reset()
+        self.views.reset()
+        self.minimap = None
+        self.history.clear()
+        self.scheduler.reset()
+        self._prev_level = self.game.level
+        self._task = asyncio.create_task(self._tick_loop())
+
+    def stop_ticking(self):
+        self._finish_recording()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def keyframe(self, player_id: str) -> Frame:
+        """Current full state for one player's socket, for joins and resyncs."""
+        if self.game.chunks is None:
+            return self.state_encoder.keyframe(self.game)
+        return self.views.keyframe(self.game, player_id)
+
+    def level_msg(self, msg_type: str) -> Frame:
+        """``build_level_msg`` for the game's current level and board size."""
+        game = self.game
+        return build_level_msg(msg_type, game.level, game.grid.width, game.grid.height)
+
+    def open_session(self, player_id: str, ws: WebSocket) -> Session:
+        session = Session(player_id, ws)
+        self.sessions[session.token] = session
+        self.player_sessions[player_id] = session
+        return session
+
+    def owns(self, session: Session) -> bool:
+        """Is ``session`` still the one playing its player?"""
+        return self.player_sessions.get(session.player_id) is session
+
+    def close_session(self, session: Session):
+        self.sessions.pop(session.token, None)
+        if self.owns(session):
+            del self.player_sessions[session.player_id]
+        if session.expiry is not None:
+            session.expiry.cancel()
+            session.expiry = None
+
+    def hold(self, session: Session, expire: Callable[[], Awaitable[None]]):
+        """Keep a dropped player in the game for ``RESUME_GRACE`` seconds, then await ``expire``."""
+        session.ws = None
+        self.game.held_players.add(session.player_id)
+        self.record("hold", session.player_id)
+        session.expiry = asyncio.create_task(self._expire(session, expire))
+
+    async def _expire(self, session: Session, expire: Callable[[], Awaitable[None]]):
+        await asyncio.sleep(RESUME_GRACE)
+        session.expiry = None
+        if not self.owns(session):
+            # Another socket has the player now; only the stale session goes
+            self.close_session(session)
+            return
+        self.close_session(session)
+        self.game.held_players.discard(session.player_id)
+        metrics.held_expired.inc()
+        await expire()
+
+    def resume(self, session: Session, ws: WebSocket):
+        """Hand a session's player to a new socket, whether the old one was held or not."""
+        if session.expiry is not None:
+            session.expiry.cancel()
+            session.expiry = None
+        session.ws = ws
+        self.game.held_players.discard(session.player_id)
+        self.record("resume", session.player_id)
+
+    def catch_up(self, player_id: str, seq: Optional[int]) -> list[Frame]:
+        """State frames that bring a resumed client from ``seq`` to the current tick.
+
+        On bigger boards, or after a gap longer than ``history`` covers, that
+        is a keyframe.
+        """
+        if self.game.chunks is None and seq is not None:
+            frames = self.history.since(seq)
+            if frames is not None:
+                keyframe = bool(frames) and frames[0].data["type"] == "state"
+                metrics.resumes.inc("keyframe" if keyframe else "deltas")
+                return frames
+        metrics.resumes.inc("keyframe")
+        return [self.keyframe(player_id)]
+
+    def wake(self):
+        """Make a parked tick task re-check whether the game is paused or over."""
+        self._wakeup.set()
+
+    async def _tick_loop(self):
+        game = self.game
+        try:
+            while game.started:
+                if game.any_paused_human_players():
+                    # Parked until someone unpauses, leaves or ends the game; the
+                    # schedule restarts from the wake-up so no catch-up burst follows
+                    self.scheduler.reset()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                self.scheduler.set_rate(game.game_options.get("tick_rate", TICK_RATE))
+                due = await self.scheduler.wait()
+                for _ in range(due):
+                    if not game.started or game.any_paused_human_players():
+                        break
+                    await self.run_tick()
+        finally:
+            self._finish_recording()
+
+    async def run_tick(self):
+        """Advance the game one tick and broadcast it."""
+        game = self.game
+        tick_at = time.time()
+        decisions = game.ai.decisions
+        started = time.perf_counter()
+        now = game.clock()
+        game.tick(now)
+        if game.input_latencies:
+            self.tick_stats.record_inputs(game.input_latencies)
+            for latency in game.input_latencies:
+                metrics.input_latency.observe(latency)
+
+        t = time.perf_counter()
+        level_msg = None
+        if game.level != self._prev_level:
+            level_msg = self.level_msg("level_change")
+            self._prev_level = game.level
+        minimap = None
+        if game.chunks is None:
+            state_msg = self.state_encoder.encode(game)
+            self.manager.prepare(state_msg)
+            self.history.record(state_msg)
+            seq = state_msg.data["seq"]
+        else:
+            pids = [conn.player_id for conn in self.manager.connections.values()]
+            state_msgs = self.views.encode(game, pids)
+            self.manager.prepare_each(state_msgs)
+            seq = self.views.seq
+            if self.minimap is None or seq % MINIMAP_INTERVAL == 0:
+                minimap = self.minimap = build_minimap_msg(game)
+                self.manager.prepare(minimap)
+        self.frame_times.append((seq, tick_at))
+        serialize_time = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if level_msg is not None:
+            await self.manager.broadcast(level_msg)
+        if game.chunks is None:
+            await self.manager.broadcast_state(state_msg)
+        else:
+            await self.manager.send_states(state_msgs)
+            if minimap is not None:
+                await self.manager.broadcast_state(minimap)
+        broadcast_time = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if self.recorder is not None:
+            self.recorder.tick(now, game)
+        record_time = time.perf_counter() - t
+
+        # Auto-end game when no active human players remain
+        if game.started and not game.has_active_players:
+            await self.end_game()
+
+        phases = dict(game.phase_times, serialize=serialize_time, broadcast=broadcast_time,
+                      record=record_time)
+        total = time.perf_counter() - started
+        self.tick_stats.record(phases, total, self.scheduler.interval)
+        observe = metrics.tick_seconds.observe
+        for phase, seconds in phases.items():
+            observe(seconds, phase)
+        observe(total, "total")
+        if total > self.scheduler.interval:
+            metrics.tick_overruns.inc()
+        if game.ai.decisions != decisions:
+            metrics.ai_decisions.inc(amount=game.ai.decisions - decisions)
+
+    async def end_game(self):
+        """Finish the match: send final scores and move everyone back to the lobby."""
+        final_scores = self.game.final_scores()
+        self._finish_recording()
+        self.game.reset()
+        self._prev_level = self.game.level
+        self.wake()
+        await self.manager.broadcast(json.dumps({"type": "game_end", "final_scores": final_scores}))
+        await self.manager.broadcast(build_lobby_msg(self.game))
+
+    def summary(self) -> dict:
+        players = self.game.players.values()
+        return {
+            "room_id": self.room_id,
+            "players": sum(1 for p in players if not p.is_ai),
+            "bots": sum(1 for p in players if p.is_ai),
+            "started": self.game.started,
+            "level": self.game.level,
+            "tick_rate": self.game.game_options.get("tick_rate", TICK_RATE),
+        }
+
+
+class RoomRegistry:
+    """Creates, looks up and cleans up rooms."""
+
+    def __init__(self, idle_timeout: float, deflater: Optional[Deflater] = None,
+                 record_dir: Optional[str] = None):
+        self.idle_timeout = idle_timeout
+        self.deflater = deflater
+        self.record_dir = record_dir
+        self.rooms: dict[str, Room] = {}
+
+    def create(self, room_id: Optional[str] = None) -> Room:
+        self.prune()
+        if room_id is None:
+            room_id = secrets.token_urlsafe(4)
+            while room_id in self.rooms:
+                room_id = secrets.token_urlsafe(4)
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = Room(room_id, self.deflater, self.record_dir)
+        return room
+
+    def get(self, room_id: str) -> Optional[Room]:
+        return self.rooms.get(room_id)
+
+    def get_or_create(self, room_id: str) -> Room:
+        return self.rooms.get(room_id) or self.create(room_id)
+
+    def discard_if_empty(self, room: Room):
+        """Drop a room as soon as its last socket has left."""
+        if room.is_empty and self.rooms.get(room.room_id) is room:
+            self._close(room)
+
+    def prune(self):
+        """Drop rooms that were created but never joined within the idle timeout."""
+        now = time.monotonic()
+        for room in list(self.rooms.values()):
+            if (room.is_empty and room.empty_since is not None
+                    and now - room.empty_since > self.idle_timeout):
+                self._close(room)
+
+    def _close(self, room: Room):
+        room.stop_ticking()
+        metrics.retire_messages(room.manager.counters.types)
+        del self.rooms[room.room_id]
+
+    def summaries(self) -> list[dict]:
+        self.prune()
+        return [room.summary() for room in self.rooms.values()]
+
+    def stop_all(self):
+        for room in self.rooms.values():
+            room.stop_ticking()
+            for session in list(room.sessions.values()):
+                room.close_session(session)
@@ -0,0 +1,343 @@
+"""Front-end router that shards rooms across local worker processes.
+
+Each worker is a normal ``src.main`` server listening on a Unix domain socket.
+The router serves the static client itself and forwards every room-scoped
+request to the worker that owns the room, chosen by hashing the room id, so
+no shared state or external service is needed.
+
+Run with ``python -m src.router`` (``WORKERS`` sets the process count).
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import zlib
+
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+from websockets.exceptions import ConnectionClosed
+
+try:
+    from websockets.asyncio.client import unix_connect
+except ImportError:  # websockets < 13
+    from websockets.client import unix_connect
+
+from . import metrics
+from .constants import DEFAULT_ROOM
+from .rooms import ROOM_ID_PATTERN
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Close codes that only report what happened and can't be sent in a close frame
+UNSENDABLE_CLOSE_CODES = (1005, 1006, 1015)
+
+
+def forwarded_close_code(code: Optional[int]) -> int:
+    """The close code to pass on to the other side of the proxy.
+
+    Workers hold a player whose socket closed with anything but 1000/1001,
+    so a connection that ended abnormally must not be passed on as clean.
+    """
+    if code is None or code in UNSENDABLE_CLOSE_CODES:
+        return 1011
+    return code
+
+
+class Worker:
+    """One ``src.main`` server process listening on a Unix socket."""
+
+    def __init__(self, index: int, socket_path: str):
+        self.index = index
+        self.socket_path = socket_path
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        env = dict(os.environ, WORKER_ID=str(self.index))
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--uds", self.socket_path,
+             "--log-level", "warning",
+             # The router talks to workers over a local socket; compressing that hop only costs CPU
+             "--ws-per-message-deflate", "false"],
+            cwd=ROOT_DIR, env=env,
+        )
+
+    def stop(self):
+        if self.alive:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def request(self, method: str, target: str) -> tuple[int, dict, bytes]:
+        """Minimal HTTP/1.1 request over the worker's Unix socket."""
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            writer.write(
+                f"{method} {target} HTTP/1.1\r\nHost: worker\r\nContent-Length: 0\r\n"
+                f"Connection: close\r\n\r\n".encode()
+            )
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = raw.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return status, headers, body
+
+    async def get_json(self, target: str):
+        status, _, body = await self.request("GET", target)
+        if status != 200:
+            raise RuntimeError(f"worker {self.index}: GET {target} -> {status}")
+        return json.loads(body)
+
+
+class WorkerPool:
+    """Starts, supervises and routes to a fixed set of workers."""
+
+    def __init__(self, count: int, socket_dir: str):
+        tag = f"snake-{os.getpid()}"
+        self.workers = [Worker(i, os.path.join(socket_dir, f"{tag}-{i}.sock"))
+                        for i in range(count)]
+
+    def owner(self, room_id: str) -> Worker:
+        """Stable room placement: the same room id always maps to the same worker."""
+        return self.workers[zlib.crc32(room_id.encode()) % len(self.workers)]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    async def supervise(self, interval: float = 1.0):
+        """Restart workers that exit. Their rooms are lost, new ones land there again."""
+        while True:
+            await asyncio.sleep(interval)
+            for worker in self.workers:
+                if not worker.alive:
+                    worker.restarts += 1
+                    worker.start()
+
+    async def stats(self) -> list[dict]:
+        async def one(worker: Worker) -> dict:
+            data = {
+                "worker": worker.index,
+                "pid": worker.process.pid if worker.process else None,
+                "alive": worker.alive,
+                "restarts": worker.restarts,
+            }
+            try:
+                rooms = (await worker.get_json("/rooms"))["rooms"]
+                ticks = await worker.get_json("/debug/tick")
+            except (OSError, RuntimeError, ValueError):
+                data["reachable"] = False
+                return data
+            data.update({
+                "reachable": True,
+                "rooms": len(rooms),
+                "running_rooms": sum(1 for r in rooms if r["started"]),
+                "players": sum(r["players"] for r in rooms),
+                "bots": sum(r["bots"] for r in rooms),
+                # Summed across rooms; above 1.0 the worker can't keep up with its tick budgets
+                "budget_used": round(sum(t["budget_used"] for t in ticks.values()), 4),
+            })
+            return data
+
+        return list(await asyncio.gather(*(one(w) for w in self.workers)))
+
+
+pool = WorkerPool(
+    count=max(1, int(os.getenv("WORKERS", str(os.cpu_count() or 1)))),
+    socket_dir=os.getenv("SOCKET_DIR", tempfile.gettempdir()),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool.start()
+    supervisor = asyncio.create_task(pool.supervise())
+    yield
+    supervisor.cancel()
+    pool.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/static", StaticFiles(directory=os.path.join(ROOT_DIR, "static")), name="static")
+
+
+@app.get("/")
+async def serve_index():
+    return FileResponse(os.path.join(ROOT_DIR, "index.html"), media_type="text/html")
+
+
+@app.get("/assets/heads/{asset_id}")
+async def serve_custom_head(asset_id: str):
+    # Heads are stored by whichever worker the uploader joined; ask each in turn
+    for worker in pool.workers:
+        try:
+            status, headers, body = await worker.request("GET", f"/assets/heads/{asset_id}")
+        except OSError:
+            continue
+        if status == 200:
+            passthrough = ("content-type", "cache-control", "etag", "x-content-type-options",
+                           "content-security-policy")
+            return Response(content=body,
+                            headers={k: headers[k] for k in passthrough if k in headers})
+    return Response(status_code=404)
+
+
+@app.get("/rooms")
+async def list_rooms():
+    rooms = []
+    for worker in pool.workers:
+        try:
+            for room in (await worker.get_json("/rooms"))["rooms"]:
+                room["worker"] = worker.index
+                rooms.append(room)
+        except (OSError, RuntimeError, ValueError):
+            continue
+    return {"rooms": rooms}
+
+
+@app.post("/rooms")
+async def create_room():
+    room_id = secrets.token_urlsafe(4)
+    worker = pool.owner(room_id)
+    status, _, body = await worker.request("POST", f"/rooms?room_id={room_id}")
+    if status != 200:
+        return Response(status_code=502)
+    room = json.loads(body)
+    room["worker"] = worker.index
+    return room
+
+
+@app.get("/recordings")
+async def list_recordings():
+    # Workers inherit RECORD_DIR, so they all list the same directory; ask until one answers
+    for worker in pool.workers:
+        try:
+            return await worker.get_json("/recordings")
+        except (OSError, RuntimeError, ValueError):
+            continue
+    return Response(status_code=502)
+
+
+@app.get("/workers")
+async def list_workers():
+    """Room placement and load per worker process."""
+    return {"workers": await pool.stats()}
+
+
+@app.get("/metrics")
+async def serve_metrics():
+    """Every worker's metrics, each sample labelled with its ``worker``."""
+    async def one(worker: Worker) -> Optional[str]:
+        try:
+            status, _, body = await worker.request("GET", "/metrics")
+        except OSError:
+            return None
+        return body.decode() if status == 200 else None
+
+    texts = await asyncio.gather(*(one(w) for w in pool.workers))
+    merged = metrics.merge({str(w.index): text for w, text in zip(pool.workers, texts)
+                            if text is not None})
+    return PlainTextResponse(merged, media_type="text/plain; version=0.0.4")
+
+
+@app.websocket("/ws")
+async def websocket_proxy(ws: WebSocket):
+    replay = ws.query_params.get("replay")
+    if replay is not None:
+        # Any worker can play a recording, since they all read the same RECORD_DIR
+        worker = pool.owner(replay)
+    else:
+        room_id = ws.query_params.get("room") or DEFAULT_ROOM
+        if not ROOM_ID_PATTERN.match(room_id):
+            await ws.close(code=1008)
+            return
+        worker = pool.owner(room_id)
+    try:
+        # The whole query goes through: room, or replay and speed
+        upstream = await unix_connect(worker.socket_path, f"ws://worker/ws?{ws.url.query}",
+                                      compression=None)
+    except OSError:
+        await ws.close(code=1013)
+        return
+    await ws.accept()
+
+    async def client_to_worker() -> Optional[int]:
+        """Forward the client's messages; its close code once it closes."""
+        try:
+            while True:
+                message = await ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    return message.get("code")
+                if message.get("text") is not None:
+                    await upstream.send(message["text"])
+                elif message.get("bytes") is not None:
+                    await upstream.send(message["bytes"])
+        except WebSocketDisconnect as exc:
+            return exc.code
+
+    async def worker_to_client():
+        try:
+            async for message in upstream:
+                if isinstance(message, bytes):
+                    await ws.send_bytes(message)
+                else:
+                    await ws.send_text(message)
+        except (ConnectionClosed, WebSocketDisconnect):
+            pass
+
+    from_client = asyncio.create_task(client_to_worker())
+    tasks = [from_client, asyncio.create_task(worker_to_client())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Each side gets the other's close code, so the worker can tell a
+        # dropped client (whose player it holds for a resume) from one that left
+        client_code = None
+        if from_client.done() and not from_client.cancelled() and from_client.exception() is None:
+            client_code = from_client.result()
+        await upstream.close(code=forwarded_close_code(client_code))
+        try:
+            await ws.close(code=forwarded_close_code(upstream.close_code))
+        except (RuntimeError, WebSocketDisconnect):
+            pass  # already closed by the client
+
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.getenv("PORT", "8765"))
+    host = os.getenv("HOST", "0.0.0.0")
+    print(f"Snake router starting on http://{host}:{port} with {len(pool.workers)} workers")
+    ws_deflate = os.getenv("WS_PER_MESSAGE_DEFLATE", "1") != "0"
+    uvicorn.run(app, host=host, port=port, ws_per_message_deflate=ws_deflate)
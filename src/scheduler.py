@@ -0,0 +1,112 @@
+"""Fixed-timestep tick scheduling and tick-budget statistics."""
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from .constants import MAX_CATCHUP_TICKS
+
+TICK_PHASES = ("ai", "move", "serialize", "broadcast", "record")
+
+
+class TickScheduler:
+    """Schedules ticks against absolute deadlines on the monotonic clock.
+
+    Time spent ticking does not push later ticks back. When the loop falls
+    behind, up to ``max_catchup`` missed ticks are run back to back; anything
+    beyond that is skipped and the schedule is re-anchored to now.
+    """
+
+    def __init__(self, tick_rate: float, max_catchup: int = MAX_CATCHUP_TICKS):
+        self.interval = 1 / tick_rate
+        self.max_catchup = max_catchup
+        self.next_deadline: Optional[float] = None
+        self.late = 0  # times the loop woke up one or more ticks behind
+        self.skipped = 0  # ticks dropped instead of caught up
+
+    def set_rate(self, tick_rate: float):
+        interval = 1 / tick_rate
+        if interval != self.interval:
+            self.interval = interval
+            self.next_deadline = None
+
+    def reset(self):
+        """Forget the schedule, e.g. after a pause, so no catch-up burst follows."""
+        self.next_deadline = None
+
+    async def wait(self) -> int:
+        """Sleep until the next deadline and return how many ticks are due."""
+        now = time.monotonic()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        delay = self.next_deadline - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+            now = time.monotonic()
+
+        due = 1 + int((now - self.next_deadline) / self.interval)
+        if due > 1:
+            self.late += 1
+        if due > 1 + self.max_catchup:
+            self.skipped += due - 1 - self.max_catchup
+            due = 1 + self.max_catchup
+            self.next_deadline = now - (due - 1) * self.interval
+        self.next_deadline += due * self.interval
+        return due
+
+
+def _summary(values) -> dict:
+    ordered = sorted(values)
+    n = len(ordered)
+    return {
+        "avg_ms": round(sum(ordered) / n, 3) if n else 0.0,
+        "p50_ms": round(ordered[n // 2], 3) if n else 0.0,
+        "p95_ms": round(ordered[min(n - 1, int(n * 0.95))], 3) if n else 0.0,
+        "max_ms": round(ordered[-1], 3) if n else 0.0,
+    }
+
+
+class TickStats:
+    """Rolling per-phase tick timings measured against the tick budget.
+
+    Also how long recent moves waited in players' input queues, which is
+    what the tick rate costs in responsiveness.
+    """
+
+    def __init__(self, window: int = 200):
+        self.samples = {phase: deque(maxlen=window) for phase in TICK_PHASES + ("total",)}
+        self.input_latency: deque[float] = deque(maxlen=window)
+        self.ticks = 0
+        self.overruns = 0
+        self.budget_ms = 0.0
+
+    def record(self, phases: dict[str, float], total: float, budget: float):
+        """Record one tick; ``phases``, ``total`` and ``budget`` are in seconds."""
+        self.ticks += 1
+        self.budget_ms = budget * 1000
+        for phase in TICK_PHASES:
+            self.samples[phase].append(phases.get(phase, 0.0) * 1000)
+        self.samples["total"].append(total * 1000)
+        if total > budget:
+            self.overruns += 1
+
+    def record_inputs(self, latencies: list[float]):
+        """Record the queue wait, in seconds, of each move a tick applied."""
+        self.input_latency.extend(latency * 1000 for latency in latencies)
+
+    def snapshot(self, scheduler: Optional[TickScheduler] = None) -> dict:
+        phases = {phase: _summary(values) for phase, values in self.samples.items()}
+        data = {
+            "ticks": self.ticks,
+            "budget_ms": round(self.budget_ms, 3),
+            "budget_used": (round(phases["total"]["avg_ms"] / self.budget_ms, 4)
+                            if self.budget_ms else 0.0),
+            "overruns": self.overruns,
+            "phases": phases,
+            "input_latency": _summary(self.input_latency),
+        }
+        if scheduler is not None:
+            data["late"] = scheduler.late
+            data["skipped"] = scheduler.skipped
+        return data
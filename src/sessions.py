@@ -0,0 +1,65 @@
+"""Reconnect sessions: a token per joined socket, and recent state frames to catch up from.
+
+A player whose socket drops without a clean close is held for
+``RESUME_GRACE`` seconds instead of being removed: their snake stays on the
+board, frozen, and a new socket that sends ``resume`` with the session
+token takes the player over. It is sent the state frames it missed from a
+``StateHistory`` rather than the whole join handshake.
+"""
+
+import asyncio
+import secrets
+from collections import deque
+from typing import Optional
+
+from fastapi import WebSocket
+
+from .constants import RESUME_HISTORY
+from .wire import Frame
+
+
+class Session:
+    """Ties a resumable player to the socket currently playing them."""
+
+    __slots__ = ("token", "player_id", "ws", "expiry")
+
+    def __init__(self, player_id: str, ws: WebSocket):
+        self.token = secrets.token_urlsafe(16)
+        self.player_id = player_id
+        self.ws: Optional[WebSocket] = ws
+        # While held: the task that removes the player when the grace window ends
+        self.expiry: Optional[asyncio.Task] = None
+
+    @property
+    def held(self) -> bool:
+        return self.expiry is not None
+
+
+class StateHistory:
+    """The last ``size`` state frames sent to every socket, oldest first."""
+
+    def __init__(self, size: int = RESUME_HISTORY):
+        self.frames: deque[Frame] = deque(maxlen=size)
+
+    def clear(self):
+        self.frames.clear()
+
+    def record(self, frame: Frame):
+        self.frames.append(frame)
+
+    def since(self, seq: int) -> Optional[list[Frame]]:
+        """Frames that bring a client that applied ``seq`` up to date; None if it needs a keyframe.
+
+        Starts at the newest keyframe after ``seq`` when there is one, since
+        nothing before it is needed.
+        """
+        frames = self.frames
+        if frames and frames[-1].data["seq"] == seq:
+            return []
+        missed = [frame for frame in frames if frame.data["seq"] > seq]
+        for i in range(len(missed) - 1, -1, -1):
+            if missed[i].data["type"] == "state":
+                return missed[i:]
+        if missed and missed[0].data["seq"] == seq + 1:
+            return missed
+        return None
@@ -0,0 +1,221 @@
+"""Binary encoding for state, level and minimap frames.
+
+A binary frame is one WebSocket binary message: a message type byte, the grid
+width as a varint, then the rest of the message as a tagged value. Integers
+are varints, dict keys used by state messages are a single byte, and lists of
+``[x, y]`` cells are packed as varint cell ids ``y * width + x``. Decoding a
+frame gives back the same object the JSON form parses to; the browser decoder
+is ``static/js/wire.js`` and must stay in step with the tables below.
+"""
+
+import json
+import struct
+from typing import Optional
+
+# Message types that have a binary form, by type byte
+MSG_TYPES = ("state", "state_delta", "game_start", "game_in_progress", "level_change", "minimap")
+MSG_TYPE_IDS = {name: i for i, name in enumerate(MSG_TYPES)}
+
+# Dict keys sent as a single index; anything else is written inline
+KEYS = (
+    "seq", "players", "food", "level", "food_eaten", "food_target",
+    "level_changing", "level_change_at", "eaten_events", "paused_players",
+    "spectator_count", "name", "color", "head_avatar", "custom_head_id",
+    "score", "lives", "alive", "game_over", "direction", "is_ai", "segments",
+    "head", "pop", "joined", "left", "food_add", "food_remove", "walls", "grid",
+    "view", "length", "tick", "input_seq",
+)
+KEY_IDS = {key: i for i, key in enumerate(KEYS)}
+
+T_NULL, T_FALSE, T_TRUE, T_UINT, T_NEG, T_FLOAT, T_STR, T_LIST, T_DICT, T_CELLS = range(10)
+
+_float = struct.Struct("<d")
+
+
+def _varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _key(out: bytearray, key: str):
+    i = KEY_IDS.get(key)
+    if i is not None:
+        _varint(out, i << 1)
+    else:
+        raw = key.encode()
+        _varint(out, (len(raw) << 1) | 1)
+        out += raw
+
+
+def _is_cells(value) -> bool:
+    first = value[0]
+    return (type(first) in (list, tuple) and len(first) == 2
+            and type(first[0]) is int and type(first[1]) is int)
+
+
+def _value(out: bytearray, value, width: int):
+    kind = type(value)
+    if kind is int:
+        if value >= 0:
+            out.append(T_UINT)
+            _varint(out, value)
+        else:
+            out.append(T_NEG)
+            _varint(out, -value)
+    elif kind is str:
+        raw = value.encode()
+        out.append(T_STR)
+        _varint(out, len(raw))
+        out += raw
+    elif kind is list or kind is tuple:
+        if value and _is_cells(value):
+            out.append(T_CELLS)
+            _varint(out, len(value))
+            for x, y in value:
+                cell = y * width + x
+                if cell < 0x80:
+                    out.append(cell)
+                else:
+                    _varint(out, cell)
+        else:
+            out.append(T_LIST)
+            _varint(out, len(value))
+            for item in value:
+                _value(out, item, width)
+    elif kind is dict:
+        out.append(T_DICT)
+        _varint(out, len(value))
+        for key, item in value.items():
+            _key(out, key)
+            _value(out, item, width)
+    elif value is None:
+        out.append(T_NULL)
+    elif kind is bool:
+        out.append(T_TRUE if value else T_FALSE)
+    elif kind is float:
+        out.append(T_FLOAT)
+        out += _float.pack(value)
+    else:
+        raise TypeError(f"cannot encode {kind.__name__}")
+
+
+def encode_frame(data: dict, width: int) -> bytes:
+    """Encode a message dict with a ``type`` from ``MSG_TYPES``."""
+    out = bytearray((MSG_TYPE_IDS[data["type"]],))
+    _varint(out, width)
+    out.append(T_DICT)
+    _varint(out, len(data) - 1)
+    for key, item in data.items():
+        if key != "type":
+            _key(out, key)
+            _value(out, item, width)
+    return bytes(out)
+
+
+class _Reader:
+    __slots__ = ("buf", "pos", "width")
+
+    def __init__(self, buf: bytes):
+        self.buf = buf
+        self.pos = 0
+        self.width = 0
+
+    def varint(self) -> int:
+        buf = self.buf
+        result = shift = 0
+        while True:
+            b = buf[self.pos]
+            self.pos += 1
+            result |= (b & 0x7F) << shift
+            if b < 0x80:
+                return result
+            shift += 7
+
+    def text(self, n: int) -> str:
+        start = self.pos
+        self.pos += n
+        return self.buf[start:self.pos].decode()
+
+    def key(self) -> str:
+        n = self.varint()
+        return self.text(n >> 1) if n & 1 else KEYS[n >> 1]
+
+    def value(self):
+        tag = self.buf[self.pos]
+        self.pos += 1
+        if tag == T_UINT:
+            return self.varint()
+        if tag == T_NEG:
+            return -self.varint()
+        if tag == T_STR:
+            return self.text(self.varint())
+        if tag == T_CELLS:
+            w = self.width
+            return [[c % w, c // w] for c in (self.varint() for _ in range(self.varint()))]
+        if tag == T_LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == T_DICT:
+            n = self.varint()
+            result = {}
+            for _ in range(n):
+                key = self.key()
+                result[key] = self.value()
+            return result
+        if tag == T_NULL:
+            return None
+        if tag == T_FALSE:
+            return False
+        if tag == T_TRUE:
+            return True
+        if tag == T_FLOAT:
+            start = self.pos
+            self.pos += 8
+            return _float.unpack_from(self.buf, start)[0]
+        raise ValueError(f"unknown tag {tag}")
+
+
+def decode_frame(frame: bytes) -> dict:
+    """Inverse of ``encode_frame``; used by benchmarks and test clients."""
+    reader = _Reader(frame)
+    reader.pos = 1
+    reader.width = reader.varint()
+    data = {"type": MSG_TYPES[frame[0]]}
+    data.update(reader.value())
+    return data
+
+
+class Frame:
+    """A server message that can go out as JSON text or as a binary frame.
+
+    Each form is built on first use and then shared by every connection that
+    wants it, so a room only pays for the encodings its clients asked for.
+    """
+
+    __slots__ = ("data", "width", "_text", "_binary")
+
+    def __init__(self, data: dict, width: int):
+        self.data = data
+        self.width = width
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    def prepare(self, text: bool = True, binary: bool = True):
+        """Build the requested encodings now rather than on first send."""
+        if text and self._text is None:
+            self._text = json.dumps(self.data)
+        if binary and self._binary is None:
+            self._binary = encode_frame(self.data, self.width)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.data)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = encode_frame(self.data, self.width)
+        return self._binary
@@ -1,11 +1,29 @@
 // Game constants
 export let CELL = 20;
-export const GRID_W = 40;
-export const GRID_H = 30;
+// Board size of the current game (from game_start); boards bigger than the
+// viewport scroll with the player
+export let GRID_W = 40;
+export let GRID_H = 30;
+export const VIEWPORT_W = 40;
+export const VIEWPORT_H = 30;
+export let VIEW_W = GRID_W;
+export let VIEW_H = GRID_H;
 
 export function setCell(value) { CELL = value; }
-export function canvasW() { return CELL * GRID_W; }
-export function canvasH() { return CELL * GRID_H; }
+export function setGrid(w, h) {
+  GRID_W = w;
+  GRID_H = h;
+  VIEW_W = Math.min(w, VIEWPORT_W);
+  VIEW_H = Math.min(h, VIEWPORT_H);
+}
+export function scrolls() { return GRID_W > VIEW_W || GRID_H > VIEW_H; }
+export function canvasW() { return CELL * VIEW_W; }
+export function canvasH() { return CELL * VIEW_H; }
+
+// Moves, as the server applies them (src/constants.py); used to predict the local snake
+export const DIRECTIONS = { up: [0, -1], down: [0, 1], left: [-1, 0], right: [1, 0] };
+export const OPPOSITES = { up: 'down', down: 'up', left: 'right', right: 'left' };
+export const INPUT_QUEUE_LIMIT = 3;
 
 export const NEON_COLORS = [
   "#ff00ff", "#00ffff", "#ff3366", "#33ff66",
@@ -93,6 +93,9 @@ const gameContainer = document.getElementById('game-container');
 const nameInput = document.getElementById('name-input');
 const readyBtn = document.getElementById('ready-btn');
 
+// Prefill the room code from a shared ?room= link
+document.getElementById('room-input').value = new URLSearchParams(location.search).get('room') || '';
+
 // Initialize pickers
 buildPickers();
 
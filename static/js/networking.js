@@ -1,47 +1,102 @@
 // WebSocket networking and message handling
 import { state, resizeCanvas } from './state.js';
+import { setGrid } from './constants.js';
 import { updateLobby, syncOptions, handlePauseState, showGameEndOverlay } from './ui.js';
 import { renderWalls, startGame, processEatenEvents, playDeathSound, processDeathEvent, startFireworks, stopFireworks } from './rendering.js';
+import { decodeMessage, canInflate } from './wire.js';
+
+// A dropped socket retries this often, about as long as the server holds the player
+const RESUME_ATTEMPTS = 5;
+const RESUME_DELAY_MS = 2000;
 
 export function connect(nameInput, joinScreen, lobbyScreen, gameContainer, readyBtn) {
   const name = nameInput.value.trim() || 'Player';
-  const proto = location.protocol === 'https:' ? 'wss:' : 'ws:';
-  state.ws = new WebSocket(`${proto}//${location.host}/ws`);
-
-  state.ws.onopen = () => {
-    const joinMsg = {
-      type: 'join',
-      name,
-      color: state.selectedColor,
-    };
+  const room = document.getElementById('room-input').value.trim();
+  const page = new URLSearchParams(location.search);
+  // ?replay=<recording> in the page URL watches a recorded match instead of joining a room
+  const replay = page.get('replay');
+  let query = room ? `?room=${encodeURIComponent(room)}` : '';
+  if (replay) query = `?replay=${encodeURIComponent(replay)}&speed=${encodeURIComponent(page.get('speed') || '1')}`;
+  // Binary state frames unless ?encoding=json is in the page URL
+  const encoding = new URLSearchParams(location.search).get('encoding') === 'json' ? 'json' : 'binary';
+  // Only used if the server has WS_COMPRESSION enabled
+  const compression = canInflate ? 'deflate' : 'none';
+  // ?predict=off in the page URL draws the local snake only where the server has it
+  state.predict = page.get('predict') !== 'off';
+  const ui = { joinScreen, lobbyScreen, gameContainer, readyBtn };
 
+  const join = () => {
+    const msg = { type: 'join', name, color: state.selectedColor, encoding, compression };
     if (state.customHeadData) {
-      joinMsg.custom_head = state.customHeadData;
-      joinMsg.head_avatar = null;
+      msg.custom_head = state.customHeadData;
+      msg.head_avatar = null;
     } else {
-      joinMsg.head_avatar = state.selectedAvatar;
+      msg.head_avatar = state.selectedAvatar;
     }
+    return msg;
+  };
+  // Picks up the same player, and the state stream from the last tick applied
+  const resume = () => ({
+    type: 'resume',
+    session: state.session,
+    last_seq: state.currState ? state.currState.seq : null,
+    level: state.currState ? state.currState.level : null,
+    encoding,
+    compression,
+  });
 
-    state.ws.send(JSON.stringify(joinMsg));
+  state.session = null;
+  openSocket(query, { join, resume }, ui, 0);
+}
+
+// ``attempt`` counts reconnects since a socket last opened; the first socket joins, the rest resume
+function openSocket(query, hello, ui, attempt) {
+  const proto = location.protocol === 'https:' ? 'wss:' : 'ws:';
+  const ws = new WebSocket(`${proto}//${location.host}/ws${query}`);
+  ws.binaryType = 'arraybuffer';
+  state.ws = ws;
+  state.awaitingKeyframe = false;
+
+  ws.onopen = () => {
+    attempt = 0;
+    ws.send(JSON.stringify(state.session ? hello.resume() : hello.join()));
   };
 
-  state.ws.onmessage = (e) => {
-    const msg = JSON.parse(e.data);
-    handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn);
+  // Inflating is async, so chain decodes to keep messages in arrival order
+  let inbox = Promise.resolve();
+  ws.onmessage = (e) => {
+    inbox = inbox
+      .then(() => decodeMessage(e.data))
+      .then((msg) => {
+        if (msg.type === 'resume_failed') {
+          // Held too long, or the server restarted: join again as a new player
+          state.session = null;
+          ws.send(JSON.stringify(hello.join()));
+          return;
+        }
+        handleMessage(msg, ui.joinScreen, ui.lobbyScreen, ui.gameContainer, ui.readyBtn);
+      })
+      .catch((err) => console.error('Bad message from server', err));
   };
 
-  state.ws.onclose = () => {
+  ws.onclose = () => {
+    if (state.ws !== ws) return;
+    if (state.session && attempt < RESUME_ATTEMPTS) {
+      setTimeout(() => openSocket(query, hello, ui, attempt + 1), attempt ? RESUME_DELAY_MS : 0);
+      return;
+    }
+    state.session = null;
     setTimeout(() => {
-      joinScreen.style.display = 'block';
-      lobbyScreen.style.display = 'none';
-      gameContainer.style.display = 'none';
+      ui.joinScreen.style.display = 'block';
+      ui.lobbyScreen.style.display = 'none';
+      ui.gameContainer.style.display = 'none';
       state.myId = null;
       state.currState = null;
       state.prevState = null;
       state.isReady = false;
       state.customHeadData = null;
-      readyBtn.classList.remove('is-ready');
-      readyBtn.textContent = 'READY';
+      ui.readyBtn.classList.remove('is-ready');
+      ui.readyBtn.textContent = 'READY';
     }, 500);
   };
 }
@@ -50,17 +105,39 @@ function handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn) {
   switch (msg.type) {
     case 'welcome':
       state.myId = msg.player_id;
+      state.roomId = msg.room_id;
+      state.session = msg.session;
+      // A resumed player carries on wherever the client already is
+      if (msg.resumed) break;
+      // A new player's moves are numbered from scratch
+      state.inputSeq = 0;
+      state.pendingInputs = [];
+      if (msg.replay) {
+        state.isSpectating = true;
+        document.getElementById('lobby-room').textContent = `REPLAY: ${msg.replay}`;
+        joinScreen.style.display = 'none';
+        break;
+      }
+      // Make the URL shareable so friends land in the same room
+      const params = new URLSearchParams(location.search);
+      params.set('room', msg.room_id);
+      history.replaceState(null, '', `?${params}`);
+      document.getElementById('lobby-room').textContent = `ROOM: ${msg.room_id}`;
       joinScreen.style.display = 'none';
       lobbyScreen.style.display = 'block';
       break;
 
     case 'lobby_state':
+      state.roster = Object.fromEntries(msg.players.map(p => [p.pid, p]));
+      state.tickMs = 1000 / msg.game_options.tick_rate;
       updateLobby(msg.players, msg.game_options);
       break;
 
     case 'game_start':
       stopFireworks();
+      setGrid(...msg.grid);
       state.walls = msg.walls;
+      state.minimap = null;
       state.myLocation = 'playing';
       state.myGameOver = false;
       state.isSpectating = false;
@@ -80,7 +157,9 @@ function handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn) {
       // Late joiner - spectate existing game
       state.isSpectating = true;
       state.myLocation = 'spectating';
+      setGrid(...msg.grid);
       state.walls = msg.walls;
+      state.minimap = null;
       lobbyScreen.style.display = 'none';
       gameContainer.style.display = 'flex';
       resizeCanvas();
@@ -89,47 +168,17 @@ function handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn) {
       break;
 
     case 'state':
-      state.prevState = state.currState;
-      state.currState = msg;
-      state.lastStateTime = performance.now();
-      processEatenEvents(msg.eaten_events || []);
-
-      // Check for player deaths (any player, not just local)
-      const prevPlayers = state.prevState?.players || {};
-      for (const [pid, p] of Object.entries(msg.players)) {
-        const prev = prevPlayers[pid];
-        // Player was alive, now dead = just died
-        // Use PREV state's segments because server clears them on death
-        if (prev && prev.alive && !p.alive && prev.segments.length > 0) {
-          const head = prev.segments[0];
-          playDeathSound();
-          processDeathEvent(pid, head[0], head[1], prev.color);
-        }
-      }
-      // Also detect players who vanished from state entirely (permanent death)
-      for (const [pid, prev] of Object.entries(prevPlayers)) {
-        if (prev.alive && prev.segments.length > 0 && !msg.players[pid]) {
-          const head = prev.segments[0];
-          playDeathSound();
-          processDeathEvent(pid, head[0], head[1], prev.color);
-        }
-      }
+      state.awaitingKeyframe = false;
+      applyState(msg);
+      break;
 
-      // Local player death handling for UI
-      const me = state.myId && msg.players[state.myId];
-      state.wasAlive = me ? me.alive : true;
-      // If local player is in the state but game_over, they're now spectating
-      if (me && me.game_over && state.myLocation === 'playing') {
-        state.myLocation = 'spectating';
-        state.isSpectating = true;
-        state.myGameOver = true;
-      }
-      // If local player vanished from state while playing — permanent elimination
-      if (state.myLocation === 'playing' && !me && state.myId) {
-        state.myLocation = 'spectating';
-        state.isSpectating = true;
-        state.myGameOver = true;
+    case 'state_delta':
+      // Deltas only apply on top of the previous tick; otherwise ask for a keyframe
+      if (!state.currState || msg.seq !== state.currState.seq + 1) {
+        requestResync();
+        break;
       }
+      applyState(applyDelta(state.currState, msg));
       break;
 
     case 'level_change':
@@ -137,6 +186,10 @@ function handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn) {
       renderWalls();
       break;
 
+    case 'minimap':
+      state.minimap = msg.players;
+      break;
+
     case 'pause_state':
       handlePauseState(new Set(msg.paused_players || []));
       break;
@@ -147,6 +200,7 @@ function handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn) {
       lobbyScreen.style.display = 'block';
       state.currState = null;
       state.prevState = null;
+      state.pendingInputs = [];
       state.isReady = false;
       state.iAmPaused = false;
       state.pausedPlayers.clear();
@@ -169,6 +223,7 @@ function handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn) {
       lobbyScreen.style.display = 'block';
       state.currState = null;
       state.prevState = null;
+      state.pendingInputs = [];
       state.isReady = false;
       state.iAmPaused = false;
       state.pausedPlayers.clear();
@@ -209,6 +264,102 @@ function handleMessage(msg, joinScreen, lobbyScreen, gameContainer, readyBtn) {
   }
 }
 
+// Shared handling for a full state, whether received as a keyframe or rebuilt from a delta
+function applyState(msg) {
+  state.prevState = state.currState;
+  state.currState = msg;
+  state.lastStateTime = performance.now();
+  processEatenEvents(msg.eaten_events || []);
+
+  // Check for player deaths (any player, not just local)
+  const prevPlayers = state.prevState?.players || {};
+  for (const [pid, p] of Object.entries(msg.players)) {
+    const prev = prevPlayers[pid];
+    // Player was alive, now dead = just died
+    // Use PREV state's segments because server clears them on death
+    if (prev && prev.alive && !p.alive && prev.segments.length > 0) {
+      const head = prev.segments[0];
+      playDeathSound();
+      processDeathEvent(pid, head[0], head[1], prev.color);
+    }
+  }
+  // Also detect players who vanished from state entirely (permanent death).
+  // On a scrolling board snakes also leave the view by moving out of it, but
+  // then their head left it first
+  for (const [pid, prev] of Object.entries(prevPlayers)) {
+    if (prev.alive && prev.segments.length > 0 && !msg.players[pid]) {
+      const head = prev.segments[0];
+      if (msg.view && !inView(msg.view, head)) continue;
+      playDeathSound();
+      processDeathEvent(pid, head[0], head[1], prev.color);
+    }
+  }
+
+  // Local player death handling for UI
+  const me = state.myId && msg.players[state.myId];
+  state.wasAlive = me ? me.alive : true;
+  // Reconcile: moves the server has dealt with are in this state now; the
+  // rest are predicted again on top of it
+  if (me && state.pendingInputs.length > 0) {
+    state.pendingInputs = state.pendingInputs.filter(({ seq }) => seq > me.input_seq);
+  }
+  // If local player is in the state but game_over, they're now spectating
+  if (me && me.game_over && state.myLocation === 'playing') {
+    state.myLocation = 'spectating';
+    state.isSpectating = true;
+    state.myGameOver = true;
+  }
+  // If local player vanished from state while playing — permanent elimination
+  if (state.myLocation === 'playing' && !me && state.myId) {
+    state.myLocation = 'spectating';
+    state.isSpectating = true;
+    state.myGameOver = true;
+  }
+}
+
+function inView([x0, y0, x1, y1], [x, y]) {
+  return x >= x0 && x < x1 && y >= y0 && y < y1;
+}
+
+// Rebuild a full state object from the previous one plus a state_delta
+function applyDelta(base, delta) {
+  const left = new Set(delta.left || []);
+  const changes = delta.players || {};
+  const players = {};
+  for (const [pid, p] of Object.entries(base.players)) {
+    if (left.has(pid)) continue;
+    const change = changes[pid];
+    if (!change) {
+      players[pid] = p;
+      continue;
+    }
+    const { head, pop, ...fields } = change;
+    const next = { ...p, ...fields };
+    if (head) {
+      next.segments = [head, ...p.segments.slice(0, p.segments.length - pop)];
+    }
+    players[pid] = next;
+  }
+  Object.assign(players, delta.joined || {});
+
+  const removed = new Set((delta.food_remove || []).map(([x, y]) => `${x},${y}`));
+  const food = base.food.filter(([x, y]) => !removed.has(`${x},${y}`)).concat(delta.food_add || []);
+
+  const next = { ...base, type: 'state', seq: delta.seq, players, food, eaten_events: delta.eaten_events || [] };
+  for (const key of ['tick', 'level', 'food_eaten', 'food_target', 'level_changing', 'level_change_at', 'paused_players', 'spectator_count']) {
+    if (key in delta) next[key] = delta[key];
+  }
+  return next;
+}
+
+function requestResync() {
+  if (state.awaitingKeyframe) return;
+  state.awaitingKeyframe = true;
+  if (state.ws && state.ws.readyState === WebSocket.OPEN) {
+    state.ws.send(JSON.stringify({ type: 'resync' }));
+  }
+}
+
 export function sendGameOptions(partial) {
   if (state.ws && state.ws.readyState === WebSocket.OPEN) {
     state.ws.send(JSON.stringify({ type: 'game_options', ...partial }));
@@ -225,7 +376,10 @@ export function sendInput(direction) {
   // Don't send input if this player is paused
   if (state.iAmPaused) return;
   if (state.ws && state.ws.readyState === WebSocket.OPEN) {
-    state.ws.send(JSON.stringify({ type: 'input', direction }));
+    // Numbered, so states can say which moves they include (input_seq)
+    const seq = ++state.inputSeq;
+    state.ws.send(JSON.stringify({ type: 'input', direction, seq }));
+    if (state.predict) state.pendingInputs.push({ seq, direction });
   }
 }
 
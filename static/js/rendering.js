@@ -1,18 +1,26 @@
 // Canvas rendering, particles, and drawing
 import { state, canvas, ctx, wallCanvas, wallCtx } from './state.js';
-import { CELL, HEAD_AVATARS, canvasW, canvasH } from './constants.js';
+import {
+  CELL, HEAD_AVATARS, GRID_W, GRID_H, VIEW_W, VIEW_H, canvasW, canvasH, scrolls,
+  DIRECTIONS, OPPOSITES, INPUT_QUEUE_LIMIT,
+} from './constants.js';
 import { playEatSound, playDeathSound } from './audio.js';
 import { updateHUD } from './ui.js';
 import { settings } from './effects-settings.js';
 
 // Custom head image cache
-const customHeadImages = new Map();  // player_id -> HTMLImageElement
+const customHeadImages = new Map();  // asset id -> HTMLImageElement
 
-export function preloadCustomHeadImage(playerId, dataUrl) {
-  if (customHeadImages.has(playerId)) return customHeadImages.get(playerId);
+// Custom heads are content-addressed on the server; only the id is sent per tick
+export function customHeadUrl(assetId) {
+  return `/assets/heads/${encodeURIComponent(assetId)}`;
+}
+
+export function preloadCustomHeadImage(assetId) {
+  if (customHeadImages.has(assetId)) return customHeadImages.get(assetId);
   const img = new Image();
-  img.src = dataUrl;
-  customHeadImages.set(playerId, img);
+  img.src = customHeadUrl(assetId);
+  customHeadImages.set(assetId, img);
   return img;
 }
 
@@ -21,22 +29,92 @@ export function clearCustomHeadCache() {
 }
 
 // ── Wall Rendering (offscreen) ───────────────────────
+// The offscreen canvas holds the walls from the cell at wallOrigin on; on a
+// scrolling board it is redrawn whenever the camera crosses into another cell
+let wallCells = new Set();
+let wallCellsFor = null;
+let wallOrigin = null;
+
 export function renderWalls() {
-  wallCtx.clearRect(0, 0, canvasW(), canvasH());
+  drawWallsFrom(Math.floor(state.camera.x), Math.floor(state.camera.y));
+}
+
+function drawWallsFrom(ox, oy) {
+  if (wallCellsFor !== state.walls) {
+    wallCells = new Set(state.walls.map(([x, y]) => y * GRID_W + x));
+    wallCellsFor = state.walls;
+  }
+  wallOrigin = { x: ox, y: oy };
+  const shown = [];
+  for (let y = oy; y <= oy + VIEW_H && y < GRID_H; y++) {
+    for (let x = ox; x <= ox + VIEW_W && x < GRID_W; x++) {
+      if (wallCells.has(y * GRID_W + x)) shown.push([x - ox, y - oy]);
+    }
+  }
+  wallCtx.clearRect(0, 0, wallCanvas.width, wallCanvas.height);
   wallCtx.shadowColor = '#4444aa';
   wallCtx.shadowBlur = 8;
   wallCtx.fillStyle = '#2a2a4a';
-  for (const [x, y] of state.walls) {
+  for (const [x, y] of shown) {
     wallCtx.fillRect(x * CELL, y * CELL, CELL, CELL);
   }
   wallCtx.shadowBlur = 0;
   wallCtx.strokeStyle = '#3a3a6a';
   wallCtx.lineWidth = 0.5;
-  for (const [x, y] of state.walls) {
+  for (const [x, y] of shown) {
     wallCtx.strokeRect(x * CELL + 0.5, y * CELL + 0.5, CELL - 1, CELL - 1);
   }
 }
 
+// ── Camera ───────────────────────────────────────────
+// Follows the local snake's head as drawn, or the middle of the view the
+// server sends when there is no snake to follow
+function updateCamera(t) {
+  const camera = state.camera;
+  if (!scrolls() || !state.currState) {
+    camera.x = 0;
+    camera.y = 0;
+    return;
+  }
+  let focus = null;
+  const me = state.currState.players[state.myId];
+  if (me && me.alive && me.segments.length > 0) {
+    focus = snakeSegments(state.myId, me, state.prevState?.players?.[state.myId], t)[0];
+  } else if (state.currState.view) {
+    const [x0, y0, x1, y1] = state.currState.view;
+    focus = [(x0 + x1) / 2 - 0.5, (y0 + y1) / 2 - 0.5];
+  }
+  if (!focus) return;
+  camera.x = Math.max(0, Math.min(GRID_W - VIEW_W, focus[0] + 0.5 - VIEW_W / 2));
+  camera.y = Math.max(0, Math.min(GRID_H - VIEW_H, focus[1] + 0.5 - VIEW_H / 2));
+}
+
+// ── Minimap ──────────────────────────────────────────
+// Whole board in the corner: every snake's head from the minimap message,
+// and the part of the board on screen
+function drawMinimap() {
+  if (!scrolls()) return;
+  const scale = Math.min(160 / GRID_W, 120 / GRID_H);
+  const w = GRID_W * scale;
+  const h = GRID_H * scale;
+  const left = canvasW() - w - 8;
+  const top = 8;
+  ctx.fillStyle = 'rgba(0,0,0,0.6)';
+  ctx.fillRect(left, top, w, h);
+  ctx.strokeStyle = '#3a3a6a';
+  ctx.lineWidth = 1;
+  ctx.strokeRect(left + 0.5, top + 0.5, w - 1, h - 1);
+  ctx.strokeStyle = 'rgba(255,255,255,0.5)';
+  ctx.strokeRect(left + state.camera.x * scale, top + state.camera.y * scale, VIEW_W * scale, VIEW_H * scale);
+  for (const [pid, m] of Object.entries(state.minimap || {})) {
+    if (!m.head) continue;
+    const color = state.roster[pid]?.color || state.currState?.players?.[pid]?.color || '#ffffff';
+    const size = pid === state.myId ? 5 : 3;
+    ctx.fillStyle = pid === state.myId ? '#ffffff' : color;
+    ctx.fillRect(left + m.head[0] * scale - size / 2, top + m.head[1] * scale - size / 2, size, size);
+  }
+}
+
 // ── Screen Shake ─────────────────────────────────────
 state.screenShake = { active: false, intensity: 0, endTime: 0 };
 
@@ -314,6 +392,52 @@ function interpolateSegments(prevSegs, currSegs, t) {
   return result;
 }
 
+// ── Prediction ───────────────────────────────────────
+// The local snake is drawn a tick ahead of the latest state, heading where
+// the server's next tick will take it: its direction, or the first move
+// sent since that the server will accept (the same checks as
+// GameState.queue_input). A key press shows at once instead of a round trip
+// later. The next state usually lands where the snake was heading; when it
+// doesn't (a move dropped, a collision, food grown into) the snake is drawn
+// where the server has it, and moves not yet in that state are applied
+// again on top of it.
+function predictedDirection(me) {
+  let ahead = me.direction;
+  let next = null;
+  let queued = 0;
+  for (const { direction } of state.pendingInputs) {
+    if (direction === ahead || queued >= INPUT_QUEUE_LIMIT) continue;
+    if (OPPOSITES[direction] === ahead && me.segments.length > 1) continue;
+    next = next || direction;
+    ahead = direction;
+    queued++;
+  }
+  return next || me.direction;
+}
+
+// The body after the next tick, or null when the server won't move it or it would die
+function predictSegments(me, curr) {
+  if (curr.level_changing || (curr.paused_players && curr.paused_players.length > 0)) return null;
+  const segs = me.segments;
+  const [dx, dy] = DIRECTIONS[predictedDirection(me)];
+  const x = segs[0][0] + dx;
+  const y = segs[0][1] + dy;
+  if (x < 0 || y < 0 || x >= GRID_W || y >= GRID_H || wallCells.has(y * GRID_W + x)) return null;
+  const grows = curr.food.some(([fx, fy]) => fx === x && fy === y);
+  const body = grows ? segs : segs.slice(0, -1);
+  if (body.some(([sx, sy]) => sx === x && sy === y)) return null;
+  return [[x, y], ...body];
+}
+
+// Where a snake is drawn this frame: between its last two states, or for
+// the local snake with prediction on, between the latest and the next
+function snakeSegments(pid, p, prev, t) {
+  if (pid === state.myId && state.predict) {
+    return interpolateSegments(p.segments, predictSegments(p, state.currState) || p.segments, t);
+  }
+  return interpolateSegments(prev && prev.alive ? prev.segments : null, p.segments, t);
+}
+
 // ── Drawing ──────────────────────────────────────────
 let lastDraw = performance.now();
 
@@ -323,6 +447,15 @@ function drawLoop(now) {
   state.animFrame++;
   updateParticles(dt);
 
+  const elapsed = now - state.lastStateTime;
+  const t = Math.min(elapsed / state.tickMs, 1);
+
+  updateCamera(t);
+  const cam = state.camera;
+  const ox = Math.floor(cam.x);
+  const oy = Math.floor(cam.y);
+  if (!wallOrigin || wallOrigin.x !== ox || wallOrigin.y !== oy) drawWallsFrom(ox, oy);
+
   // Apply screen shake before clearing
   const shake = applyScreenShake();
   ctx.save();
@@ -333,26 +466,28 @@ function drawLoop(now) {
   ctx.fillStyle = '#0a0a0a';
   ctx.fillRect(0, 0, canvasW(), canvasH());
 
+  // Everything below is drawn in board pixels, offset by the camera
+  ctx.translate(-cam.x * CELL, -cam.y * CELL);
+
   ctx.strokeStyle = '#151515';
   ctx.lineWidth = 0.5;
-  for (let x = 0; x <= canvasW(); x += CELL) {
-    ctx.beginPath(); ctx.moveTo(x, 0); ctx.lineTo(x, canvasH()); ctx.stroke();
+  const right = (ox + VIEW_W + 1) * CELL;
+  const bottom = (oy + VIEW_H + 1) * CELL;
+  for (let x = ox * CELL; x <= right; x += CELL) {
+    ctx.beginPath(); ctx.moveTo(x, oy * CELL); ctx.lineTo(x, bottom); ctx.stroke();
   }
-  for (let y = 0; y <= canvasH(); y += CELL) {
-    ctx.beginPath(); ctx.moveTo(0, y); ctx.lineTo(canvasW(), y); ctx.stroke();
+  for (let y = oy * CELL; y <= bottom; y += CELL) {
+    ctx.beginPath(); ctx.moveTo(ox * CELL, y); ctx.lineTo(right, y); ctx.stroke();
   }
 
-  ctx.drawImage(wallCanvas, 0, 0);
+  ctx.drawImage(wallCanvas, ox * CELL, oy * CELL);
 
   if (!state.currState) {
+    ctx.restore();
     requestAnimationFrame(drawLoop);
     return;
   }
 
-  const tickMs = 100;
-  const elapsed = now - state.lastStateTime;
-  const t = Math.min(elapsed / tickMs, 1);
-
   // Food
   const pulse = settings.foodPulse.enabled
     ? 0.7 + 0.3 * settings.foodPulse.intensity * Math.sin(now / settings.foodPulse.speed)
@@ -377,9 +512,7 @@ function drawLoop(now) {
   for (const [pid, p] of Object.entries(players)) {
     if (!p.alive || !p.segments || p.segments.length === 0) continue;
 
-    const prev = prevPlayers[pid];
-    const prevSegs = prev && prev.alive ? prev.segments : null;
-    const segs = interpolateSegments(prevSegs, p.segments, t);
+    const segs = snakeSegments(pid, p, prevPlayers[pid], t);
 
     ctx.shadowColor = p.color;
     const glowMult = settings.glow.enabled ? settings.glow.intensity : 0;
@@ -411,9 +544,9 @@ function drawLoop(now) {
         const headSize = Math.round(baseSize * avatarScale);
         const radius = headSize / 2;
 
-        if (p.custom_head) {
+        if (p.custom_head_id) {
           // Draw custom head image
-          const img = preloadCustomHeadImage(pid, p.custom_head);
+          const img = preloadCustomHeadImage(p.custom_head_id);
           if (img.complete) {
             ctx.save();
             ctx.beginPath();
@@ -457,6 +590,8 @@ function drawLoop(now) {
 
   ctx.restore();
 
+  drawMinimap();
+
   requestAnimationFrame(drawLoop);
 }
 
@@ -479,8 +614,9 @@ let fireworkInterval = null;
 export function startFireworks() {
   if (fireworkInterval) return;
   fireworkInterval = setInterval(() => {
-    const cx = Math.random() * canvasW();
-    const cy = Math.random() * (canvasH() * 0.67) + 50;
+    // Particles live in board pixels; keep the show on screen
+    const cx = state.camera.x * CELL + Math.random() * canvasW();
+    const cy = state.camera.y * CELL + Math.random() * (canvasH() * 0.67) + 50;
     const color = FIREWORK_COLORS[Math.floor(Math.random() * FIREWORK_COLORS.length)];
     const count = 40 + Math.floor(Math.random() * 20);
     for (let i = 0; i < count; i++) {
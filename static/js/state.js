@@ -1,13 +1,20 @@
 // Global state management
-import { setCell, canvasW, canvasH, GRID_W, GRID_H } from './constants.js';
+import { setCell, canvasW, canvasH, VIEW_W, VIEW_H } from './constants.js';
 
 export const state = {
   ws: null,
+  session: null,  // token that lets a reconnecting socket resume this player
   myId: null,
+  roomId: null,
   walls: [],
   prevState: null,
   currState: null,
+  awaitingKeyframe: false,  // Sent 'resync', ignoring deltas until a full state arrives
   lastStateTime: 0,
+  tickMs: 100,   // server tick interval, from the room's tick_rate
+  predict: true, // draw the local snake a tick ahead, with moves the server hasn't applied yet
+  inputSeq: 0,   // number of the last move sent
+  pendingInputs: [],  // moves sent but not yet in a state, as { seq, direction }
   particles: [],
   animFrame: 0,
   wasAlive: true,
@@ -20,13 +27,16 @@ export const state = {
   myLocation: 'lobby',  // 'lobby', 'playing', 'spectating'
   myGameOver: false,
   finalScores: null,
+  roster: {},    // pid -> lobby entry (name, color, avatar) of everyone in the room
+  minimap: null, // pid -> head, length and legend fields, on boards bigger than the viewport
+  camera: { x: 0, y: 0 },  // top-left board cell shown, fractional while scrolling
 };
 
 // Canvas references
 export const canvas = document.getElementById('game');
 export const ctx = canvas.getContext('2d');
 
-// Offscreen wall canvas
+// Offscreen wall canvas; one cell larger than the view so it can scroll by part of a cell
 export const wallCanvas = document.createElement('canvas');
 wallCanvas.width = 800;
 wallCanvas.height = 600;
@@ -39,19 +49,19 @@ export function resizeCanvas() {
   const availW = window.innerWidth - sidebar - 40;
   const availH = window.innerHeight - vPad;
 
-  // Fit 4:3 (GRID_W x GRID_H) into available area
+  // Fit 4:3 (VIEW_W x VIEW_H) into available area
   let fitW = availW;
-  let fitH = fitW * (GRID_H / GRID_W);
+  let fitH = fitW * (VIEW_H / VIEW_W);
   if (fitH > availH) {
     fitH = availH;
-    fitW = fitH * (GRID_W / GRID_H);
+    fitW = fitH * (VIEW_W / VIEW_H);
   }
 
-  const cell = Math.max(10, Math.floor(fitW / GRID_W));
+  const cell = Math.max(10, Math.floor(fitW / VIEW_W));
   setCell(cell);
 
   canvas.width = canvasW();
   canvas.height = canvasH();
-  wallCanvas.width = canvasW();
-  wallCanvas.height = canvasH();
+  wallCanvas.width = canvasW() + cell;
+  wallCanvas.height = canvasH() + cell;
 }
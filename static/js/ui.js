@@ -2,7 +2,7 @@
 import { state } from './state.js';
 import { NEON_COLORS, HEAD_AVATARS } from './constants.js';
 import { sendGameOptions, sendReady, sendAddAI, sendRemoveAI, sendReturnToLobby, sendPause, sendInput } from './networking.js';
-import { stopFireworks } from './rendering.js';
+import { stopFireworks, customHeadUrl } from './rendering.js';
 import { settings, saveSettings, resetSettings } from './effects-settings.js';
 import { playMusic, pauseMusic, setMusicVolume, updateMusicMasterVolume } from './audio.js';
 import { ImageProcessor, CropTool } from './image-processor.js';
@@ -52,8 +52,8 @@ export function updateLobby(players, gameOptions) {
 
   container.innerHTML = humanPlayers.map(p => {
     let avatarHtml;
-    if (p.custom_head) {
-      avatarHtml = `<img src="${esc(p.custom_head)}" style="width:${imageSize}px;height:${imageSize}px;border-radius:50%;" alt="">`;
+    if (p.custom_head_id) {
+      avatarHtml = `<img src="${esc(customHeadUrl(p.custom_head_id))}" style="width:${imageSize}px;height:${imageSize}px;border-radius:50%;" alt="">`;
     } else {
       const emoji = HEAD_AVATARS[p.head_avatar] || HEAD_AVATARS.angel;
       avatarHtml = `<span style="font-size:${emojiSize}em">${emoji}</span>`;
@@ -168,6 +168,14 @@ const TICK_RATE_OPTIONS = [
   { label: 'Ludicrous', rate: 20 }
 ];
 
+// Boards bigger than the classic one scroll with the player and show a minimap
+const ARENA_OPTIONS = [
+  { label: 'Classic', size: [40, 30] },
+  { label: 'Large', size: [80, 60] },
+  { label: 'Huge', size: [160, 120] },
+  { label: 'Giant', size: [400, 300] },
+];
+
 export function setupGameOptions() {
   const optFoodAdvance = document.getElementById('opt-food-advance');
   const optFoodCount = document.getElementById('opt-food-count');
@@ -213,6 +221,14 @@ export function setupGameOptions() {
     document.getElementById('val-tick-rate').textContent = opt.label;
     debouncedTickRate(opt.rate);
   });
+
+  const optArena = document.getElementById('opt-arena');
+  const debouncedArena = debounce((size) => sendGameOptions({ grid_size: size }), 150);
+  optArena.addEventListener('input', () => {
+    const opt = ARENA_OPTIONS[parseInt(optArena.value, 10)];
+    document.getElementById('val-arena').textContent = opt.label;
+    debouncedArena(opt.size);
+  });
 }
 
 export function syncOptions(opts) {
@@ -255,6 +271,12 @@ export function syncOptions(opts) {
     optTickRate.value = bestIdx;
     document.getElementById('val-tick-rate').textContent = TICK_RATE_OPTIONS[bestIdx].label;
   }
+  if (opts.grid_size !== undefined) {
+    const [w, h] = opts.grid_size;
+    const idx = ARENA_OPTIONS.findIndex(opt => opt.size[0] === w && opt.size[1] === h);
+    document.getElementById('opt-arena').value = Math.max(0, idx);
+    document.getElementById('val-arena').textContent = idx >= 0 ? ARENA_OPTIONS[idx].label : `${w}\u00d7${h}`;
+  }
 }
 
 // ── HUD ──────────────────────────────────────────────
@@ -276,7 +298,7 @@ export function updateHUD(state) {
   document.getElementById('food-counter').textContent = `FOOD: ${state.food_eaten}/${state.food_target}`;
 
   const entries = document.getElementById('legend-entries');
-  const sorted = Object.entries(state.players)
+  const sorted = Object.entries(legendPlayers(state))
     .map(([id, p]) => ({ id, ...p }))
     .sort((a, b) => b.score - a.score);
 
@@ -290,8 +312,8 @@ export function updateHUD(state) {
     const cls = (isMe ? ' me' : '') + (p.game_over ? ' dead' : '');
 
     let avatarHtml;
-    if (p.custom_head) {
-      avatarHtml = `<img src="${esc(p.custom_head)}" style="width:${imageSize}px;height:${imageSize}px;border-radius:50%;" alt="">`;
+    if (p.custom_head_id) {
+      avatarHtml = `<img src="${esc(customHeadUrl(p.custom_head_id))}" style="width:${imageSize}px;height:${imageSize}px;border-radius:50%;" alt="">`;
     } else {
       const emoji = HEAD_AVATARS[p.head_avatar] || '';
       avatarHtml = `<span style="font-size:${emojiSize}em">${emoji}</span>`;
@@ -331,6 +353,19 @@ export function updateHUD(state) {
   }
 }
 
+// Everyone in the game: on a scrolling board the state only has the snakes in
+// view, so the rest come from the minimap and the lobby roster
+function legendPlayers(state) {
+  const minimap = window.gameState?.minimap;
+  if (!state.view || !minimap) return state.players;
+  const roster = window.gameState.roster || {};
+  const players = {};
+  for (const [pid, m] of Object.entries(minimap)) {
+    players[pid] = { name: '', color: '#ffffff', ...roster[pid], ...m, ...state.players[pid] };
+  }
+  return players;
+}
+
 function esc(s) {
   return s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
 }
@@ -461,7 +496,7 @@ export function handlePauseState(pausedPlayers) {
   const otherPaused = Array.from(state.pausedPlayers)
     .filter(pid => pid !== state.myId)
     .map(pid => {
-      const p = window.gameState?.currState?.players?.[pid];
+      const p = window.gameState?.currState?.players?.[pid] || window.gameState?.roster?.[pid];
       return p?.name || 'Someone';
     });
 
@@ -0,0 +1,125 @@
+// Decoder for binary state, level and minimap frames (server side: src/wire.py)
+// The tables below must match MSG_TYPES and KEYS there, and the markers
+// for deflated messages must match src/compression.py.
+
+const MSG_TYPES = ['state', 'state_delta', 'game_start', 'game_in_progress', 'level_change', 'minimap'];
+
+const KEYS = [
+  'seq', 'players', 'food', 'level', 'food_eaten', 'food_target',
+  'level_changing', 'level_change_at', 'eaten_events', 'paused_players',
+  'spectator_count', 'name', 'color', 'head_avatar', 'custom_head_id',
+  'score', 'lives', 'alive', 'game_over', 'direction', 'is_ai', 'segments',
+  'head', 'pop', 'joined', 'left', 'food_add', 'food_remove', 'walls', 'grid',
+  'view', 'length', 'tick', 'input_seq',
+];
+
+const T_NULL = 0, T_FALSE = 1, T_TRUE = 2, T_UINT = 3, T_NEG = 4;
+const T_FLOAT = 5, T_STR = 6, T_LIST = 7, T_DICT = 8, T_CELLS = 9;
+
+const COMPRESSED_TEXT = 0xfe, COMPRESSED_BINARY = 0xff;
+
+const textDecoder = new TextDecoder();
+
+export const canInflate = typeof DecompressionStream !== 'undefined';
+
+class Reader {
+  constructor(buffer) {
+    this.bytes = new Uint8Array(buffer);
+    this.view = new DataView(buffer);
+    this.pos = 0;
+    this.width = 0;
+  }
+
+  varint() {
+    let result = 0;
+    let scale = 1;
+    for (;;) {
+      const b = this.bytes[this.pos++];
+      result += (b & 0x7f) * scale;
+      if (b < 0x80) return result;
+      scale *= 128;
+    }
+  }
+
+  text(n) {
+    const s = textDecoder.decode(this.bytes.subarray(this.pos, this.pos + n));
+    this.pos += n;
+    return s;
+  }
+
+  key() {
+    const n = this.varint();
+    return n & 1 ? this.text(n >> 1) : KEYS[n >> 1];
+  }
+
+  value() {
+    const tag = this.bytes[this.pos++];
+    switch (tag) {
+      case T_UINT: return this.varint();
+      case T_NEG: return -this.varint();
+      case T_STR: return this.text(this.varint());
+      case T_CELLS: {
+        const n = this.varint();
+        const w = this.width;
+        const cells = new Array(n);
+        for (let i = 0; i < n; i++) {
+          const c = this.varint();
+          cells[i] = [c % w, Math.floor(c / w)];
+        }
+        return cells;
+      }
+      case T_LIST: {
+        const n = this.varint();
+        const items = new Array(n);
+        for (let i = 0; i < n; i++) items[i] = this.value();
+        return items;
+      }
+      case T_DICT: {
+        const n = this.varint();
+        const obj = {};
+        for (let i = 0; i < n; i++) {
+          const key = this.key();
+          obj[key] = this.value();
+        }
+        return obj;
+      }
+      case T_NULL: return null;
+      case T_FALSE: return false;
+      case T_TRUE: return true;
+      case T_FLOAT: {
+        const v = this.view.getFloat64(this.pos, true);
+        this.pos += 8;
+        return v;
+      }
+      default:
+        throw new Error(`unknown tag ${tag}`);
+    }
+  }
+}
+
+// Decode an ArrayBuffer into the same object JSON.parse gives for the text form
+export function decodeFrame(buffer) {
+  const reader = new Reader(buffer);
+  const type = MSG_TYPES[reader.bytes[0]];
+  reader.pos = 1;
+  reader.width = reader.varint();
+  return { type, ...reader.value() };
+}
+
+async function inflate(bytes) {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate-raw'));
+  return new Response(stream).arrayBuffer();
+}
+
+// Decode any server message: JSON text, a binary frame, or either one deflated
+export async function decodeMessage(data) {
+  if (typeof data === 'string') return JSON.parse(data);
+  const marker = new Uint8Array(data, 0, 1)[0];
+  if (marker === COMPRESSED_TEXT) {
+    return JSON.parse(textDecoder.decode(await inflate(new Uint8Array(data, 1))));
+  }
+  if (marker === COMPRESSED_BINARY) {
+    return decodeFrame(await inflate(new Uint8Array(data, 1)));
+  }
+  return decodeFrame(data);
+}
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import random
+
+from benchmarks.headless import SimClock
+from src.ai import AIEngine
+from src.connection_manager import ConnectionManager, StateEncoder, build_state_msg
+from src.game import GameState
+from src.models import PlayerLocation, PlayerState
+
+
+class StalledSocket:
+    """A socket whose sends never return, like a client that stopped reading."""
+
+    def __init__(self):
+        self.close_code = None
+
+    async def send_text(self, text):
+        await asyncio.Event().wait()
+
+    async def send_bytes(self, data):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def test_stalled_send_is_disconnected():
+    async def run():
+        manager = ConnectionManager()
+        ws = StalledSocket()
+        conn = manager.connect(ws, "p1")
+        conn.max_queue = 4
+        conn.slow_timeout = 0.05
+        await manager.broadcast('{"type": "lobby_state"}')
+        await asyncio.sleep(0)  # the writer takes it and blocks in send
+        for _ in range(conn.max_queue + 1):  # the last one finds the queue full
+            await manager.broadcast_state('{"type": "state"}')
+        await asyncio.sleep(conn.slow_timeout * 2)
+        await manager.broadcast_state('{"type": "state"}')
+        await asyncio.sleep(0.01)
+        return manager, ws, conn
+
+    manager, ws, conn = asyncio.run(run())
+    assert conn.closed
+    assert ws.close_code == 1013
+    assert ws not in manager.connections
+
+
+def apply_delta(base: dict, delta: dict) -> dict:
+    """The full state a client rebuilds from ``base`` and a ``state_delta``, as in networking.js."""
+    players = {}
+    changes = delta.get("players", {})
+    for pid, p in base["players"].items():
+        if pid in delta.get("left", []):
+            continue
+        change = dict(changes.get(pid, {}))
+        head = change.pop("head", None)
+        pop = change.pop("pop", 0)
+        p = dict(p, **change)
+        if head is not None:
+            p["segments"] = [head] + p["segments"][:len(p["segments"]) - pop]
+        players[pid] = p
+    players.update(delta.get("joined", {}))
+    removed = delta.get("food_remove", [])
+    food = [f for f in base["food"] if f not in removed] + delta.get("food_add", [])
+    state = dict(base, seq=delta["seq"], players=players, food=food,
+                 eaten_events=delta.get("eaten_events", []))
+    for key in ("tick", "level", "food_eaten", "food_target", "level_changing",
+                "level_change_at", "paused_players", "spectator_count"):
+        if key in delta:
+            state[key] = delta[key]
+    return state
+
+
+def comparable(state: dict) -> dict:
+    return dict(state, food=sorted(state["food"]), paused_players=sorted(state["paused_players"]))
+
+
+def test_deltas_rebuild_the_full_state():
+    clock = SimClock()
+    game = GameState(rng=random.Random(3), clock=clock)
+    game.game_options.update(food_to_advance=4, lives=10 ** 9)
+    p = PlayerState(pid="p0", name="a", color="#ff00ff", location=PlayerLocation.PLAYING)
+    game.players[p.pid] = p
+    for _ in range(6):
+        game.add_ai()
+    for p in game.players.values():
+        p.location = PlayerLocation.PLAYING
+    game.start_game()
+    steering = AIEngine(random.Random(4))
+    encoder = StateEncoder(keyframe_interval=40)
+    interval = 1.0 / game.game_options["tick_rate"]
+
+    state = None
+    levels = set()
+    respawned = False
+    for _ in range(1500):
+        humans = [p for p in game.players.values() if p.alive and not p.is_ai]
+        for p, direction in zip(humans, steering.decide(game, humans)):
+            game.queue_input(p.pid, direction)
+        game.tick()
+        clock.advance(interval)
+        frame = encoder.encode(game)
+        data = json.loads(frame.text)
+        if data["type"] == "state":
+            state = data
+        else:
+            state = apply_delta(state, data)
+            respawned = respawned or any("segments" in c for c in data.get("players", {}).values())
+        expected = json.loads(build_state_msg(game, encoder.seq).text)
+        assert comparable(state) == comparable(expected)
+        levels.add(game.level)
+    assert respawned  # some snake died or came back between keyframes
+    assert len(levels) > 1
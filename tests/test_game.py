@@ -0,0 +1,131 @@
+import random
+from collections import Counter
+
+from benchmarks.headless import SimClock
+from src.connection_manager import build_state_msg
+from src.constants import INPUT_QUEUE_LIMIT
+from src.game import GameState
+from src.models import PlayerLocation, PlayerState
+
+
+def playing_game() -> tuple[GameState, PlayerState]:
+    """A started game with one player heading right from the middle of the board."""
+    game = GameState(rng=random.Random(0))
+    p = PlayerState(pid="p1", name="a", color="#ff00ff", location=PlayerLocation.PLAYING)
+    game.players[p.pid] = p
+    game.start_game()
+    cell = game.grid.cell
+    game.set_body(p, [cell(20, 15), cell(19, 15), cell(18, 15)])
+    p.direction = p.next_direction = "right"
+    return game, p
+
+
+def assert_free_cells_match_the_board(game: GameState):
+    grid = game.grid
+    size = grid.width * grid.height
+    segments = Counter(c for p in game.players.values() for c in p.segments)
+    assert list(grid.snakes) == [segments[c] for c in range(size)]
+    assert [c for c in range(size) if grid.food[c]] == sorted(game.food)
+    free = grid.free
+    assert sorted(free.cells) == [
+        c for c in range(size) if not (grid.walls[c] or grid.snakes[c] or grid.food[c])
+    ]
+    assert all(free._pos[c] == i for i, c in enumerate(free.cells))
+    assert sum(pos >= 0 for pos in free._pos) == len(free)
+
+
+def test_free_cells_follow_moves_growth_deaths_and_resizes():
+    clock = SimClock()
+    game = GameState(rng=random.Random(2), clock=clock)
+    game.game_options.update(food_to_advance=6, lives=10 ** 9)
+    for _ in range(8):
+        game.add_ai()
+    for p in game.players.values():
+        p.location = PlayerLocation.PLAYING
+    for size in ((40, 30), (60, 40)):
+        game.reset()
+        game.set_grid_size(*size)
+        assert_free_cells_match_the_board(game)
+        game.start_game()
+        levels = {game.level}
+        lengths = deaths = respawns = 0
+        for _ in range(400):
+            before = {pid: (p.alive, len(p.segments)) for pid, p in game.players.items()}
+            game.tick()
+            clock.advance(0.1)
+            for pid, p in game.players.items():
+                was_alive, length = before[pid]
+                deaths += was_alive and not p.alive
+                respawns += p.alive and not was_alive
+                lengths += len(p.segments) > length > 0
+            levels.add(game.level)
+            assert_free_cells_match_the_board(game)
+        assert deaths and respawns and lengths and len(levels) > 1
+
+
+def test_food_distances_follow_board_size():
+    game = GameState()
+    game.food = [500]
+    assert len(game.food_distances()) == game.grid.width * game.grid.height
+    game.set_grid_size(60, 40)
+    game.food = [500]  # same level and food cells, different board
+    assert len(game.food_distances()) == 60 * 40
+
+
+def test_moves_are_checked_against_the_last_queued_one():
+    game, p = playing_game()
+    assert game.queue_input("p1", "up")
+    assert not game.queue_input("p1", "up")  # a repeat of the queued move
+    assert not game.queue_input("p1", "down")  # reverses the queued move
+    assert game.queue_input("p1", "left")  # reverses the snake, but not the queued move
+    game.tick()
+    assert p.direction == "up"
+    game.tick()
+    assert p.direction == "left"
+    assert p.alive
+
+
+def test_moves_past_the_queue_limit_are_dropped():
+    game, p = playing_game()
+    turns = ["up", "right"] * INPUT_QUEUE_LIMIT
+    for direction in turns[:INPUT_QUEUE_LIMIT]:
+        assert game.queue_input("p1", direction)
+    assert not game.queue_input("p1", turns[INPUT_QUEUE_LIMIT])
+    assert [d for d, _, _ in p.inputs] == turns[:INPUT_QUEUE_LIMIT]
+
+
+def test_dropped_move_is_acknowledged_after_the_moves_before_it():
+    game, p = playing_game()
+    assert game.queue_input("p1", "up", seq=1)
+    assert not game.queue_input("p1", "up", seq=2)  # dropped behind move 1
+    assert p.input_seq == 0
+    game.tick()
+    assert p.input_seq == 2
+    assert build_state_msg(game).data["players"]["p1"]["input_seq"] == 2
+
+    # With nothing queued ahead of it, a dropped move is acknowledged at once
+    assert not game.queue_input("p1", "up", seq=3)
+    assert p.input_seq == 3
+
+
+def test_move_dropped_from_a_full_queue_is_acknowledged_with_the_last_one():
+    game, p = playing_game()
+    turns = ["up", "right"] * INPUT_QUEUE_LIMIT
+    for seq, direction in enumerate(turns[:INPUT_QUEUE_LIMIT], 1):
+        assert game.queue_input("p1", direction, seq=seq)
+    dropped = INPUT_QUEUE_LIMIT + 1
+    assert not game.queue_input("p1", turns[INPUT_QUEUE_LIMIT], seq=dropped)
+    for _ in range(INPUT_QUEUE_LIMIT - 1):
+        game.tick()
+        assert p.input_seq < dropped
+    game.tick()
+    assert p.input_seq == dropped
+
+
+def test_moves_forgotten_on_a_reset_are_acknowledged():
+    game, p = playing_game()
+    game.queue_input("p1", "up", seq=1)
+    game.queue_input("p1", "right", seq=2)
+    game.reset()
+    assert not p.inputs
+    assert p.input_seq == 2
@@ -0,0 +1,21 @@
+import random
+
+from src.game import GameState
+from src.pathfinding import distance_field, update_distance_field
+
+
+def test_update_distance_field_matches_rebuild():
+    game = GameState()
+    game.set_grid_size(60, 40)
+    game.load_walls(6)
+    grid = game.grid
+    rng = random.Random(5)
+    open_cells = [c for c in range(60 * 40) if not grid.walls[c]]
+    food = set(rng.sample(open_cells, 5))
+    dist = distance_field(grid, food)
+    for _ in range(300):
+        removed = set(rng.sample(sorted(food), rng.randint(0, min(3, len(food)))))
+        added = set(rng.sample(open_cells, rng.randint(0, 3))) - food
+        update_distance_field(grid, dist, added, removed)
+        food = (food - removed) | added
+        assert dist == distance_field(grid, food)
@@ -0,0 +1,46 @@
+import random
+
+from benchmarks.headless import SimClock
+from src import recording
+from src.game import GameState
+from src.models import PlayerLocation, PlayerState
+from src.recording import MatchRecorder
+from src.replay import Replay
+
+
+def test_replay_starts_with_the_held_and_paused_players(tmp_path):
+    clock = SimClock()
+    game = GameState(rng=random.Random(0), clock=clock)
+    for pid in ("p1", "p2"):
+        game.players[pid] = PlayerState(pid=pid, name=pid, color="#ff00ff",
+                                        location=PlayerLocation.PLAYING)
+    for _ in range(3):
+        game.add_ai()
+    for p in game.players.values():
+        p.location = PlayerLocation.PLAYING
+    game.held_players.add("p1")  # dropped in the lobby, waiting to be resumed
+    game.paused_players.add("p2")
+
+    path = str(tmp_path / "match.rec.gz")
+    game.rng.seed(7)
+    recorder = MatchRecorder(path, game, 7, "r", flush_ticks=10)
+    game.start_game()
+    for i in range(60):
+        if i == 30:
+            game.paused_players.discard("p2")
+            recorder.event("pause", "p2")
+        game.tick()
+        recorder.tick(clock(), game)
+        clock.advance(0.1)
+    recorder.close(game)
+    recording._writer.submit(lambda: None).result()  # wait for the writes
+
+    replay = Replay(path)
+    assert replay.game.held_players == {"p1"}
+    assert replay.game.paused_players == {"p2"}
+    while replay.step():
+        pass
+    assert replay.ended
+    assert replay.checked >= 6
+    assert replay.diverged_at is None
+    assert replay.game.paused_players == set()
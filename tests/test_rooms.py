@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from src import main, rooms
+from src.models import PlayerState
+from src.rooms import Room
+
+
+def test_expiry_leaves_a_new_owner_alone(monkeypatch):
+    monkeypatch.setattr(rooms, "RESUME_GRACE", 0.01)
+    expired = []
+
+    async def run():
+        room = Room("r")
+        room.game.players["p1"] = PlayerState(pid="p1", name="a", color="#ff00ff")
+        held = room.open_session("p1", object())
+
+        async def expire():
+            expired.append(held.player_id)
+
+        room.hold(held, expire)
+        # A new connection that got the same player id takes the player over
+        room.game.remove_player("p1")
+        room.game.players["p1"] = PlayerState(pid="p1", name="b", color="#ff00ff")
+        fresh = room.open_session("p1", object())
+        await asyncio.sleep(0.05)
+        return room, held, fresh
+
+    room, held, fresh = asyncio.run(run())
+    assert expired == []
+    assert room.game.players["p1"].name == "b"
+    assert held.token not in room.sessions
+    assert room.owns(fresh)
+
+
+def test_dropped_players_keep_their_ids_to_themselves():
+    with TestClient(main.app) as client:
+        ids = []
+        for _ in range(100):
+            with client.websocket_connect("/ws?room=ids") as ws:
+                ws.send_text(json.dumps({"type": "join", "name": "a"}))
+                ids.append(json.loads(ws.receive_text())["player_id"])
+                ws.close(code=1006)  # dropped: the player is held
+        game = main.rooms.rooms["ids"].game
+        assert len(set(ids)) == len(ids)
+        assert set(game.players) == set(ids)
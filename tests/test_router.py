@@ -0,0 +1,65 @@
+import json
+import os
+import time
+
+import pytest
+
+os.environ["WORKERS"] = "1"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.websockets import WebSocketDisconnect  # noqa: E402
+
+from src import router  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    router.pool.workers[0].socket_path = str(tmp_path_factory.mktemp("sock") / "worker.sock")
+    # Workers take their environment from the router when they start
+    os.environ["RECORD_DIR"] = str(tmp_path_factory.mktemp("recordings"))
+    with TestClient(router.app) as client:
+        deadline = time.monotonic() + 15
+        while not os.path.exists(router.pool.workers[0].socket_path):
+            assert time.monotonic() < deadline, "worker did not start"
+            time.sleep(0.1)
+        yield client
+    del os.environ["RECORD_DIR"]
+
+
+def join_and_close(client, room, code):
+    """Join ``room``, then close the socket with ``code``; the welcome message."""
+    with client.websocket_connect(f"/ws?room={room}") as ws:
+        ws.send_text(json.dumps({"type": "join", "name": "a"}))
+        welcome = json.loads(ws.receive_text())
+        ws.close(code=code)
+    return welcome
+
+
+def test_resume_after_drop(client):
+    welcome = join_and_close(client, "resume", 1006)  # dropped, not closed by the client
+
+    with client.websocket_connect("/ws?room=resume") as ws2:
+        ws2.send_text(json.dumps({"type": "resume", "session": welcome["session"],
+                                  "last_seq": None}))
+        resumed = json.loads(ws2.receive_text())
+    assert resumed["type"] == "welcome"
+    assert resumed["resumed"]
+    assert resumed["player_id"] == welcome["player_id"]
+
+
+def test_clean_close_leaves(client):
+    welcome = join_and_close(client, "leave", 1000)
+
+    with client.websocket_connect("/ws?room=leave") as ws2:
+        ws2.send_text(json.dumps({"type": "resume", "session": welcome["session"],
+                                  "last_seq": None}))
+        assert json.loads(ws2.receive_text())["type"] == "resume_failed"
+
+
+def test_replay_goes_to_a_worker(client):
+    assert client.get("/recordings").json() == {"recordings": []}
+    # Not a room: the worker looks for the recording and closes when it isn't there
+    with client.websocket_connect("/ws?replay=main-20261017-101500-1a2b3c4d.rec.gz&speed=2") as ws:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_text()
+    assert exc.value.code == 1011
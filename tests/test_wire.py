@@ -0,0 +1,57 @@
+import json
+import random
+
+from benchmarks.headless import SimClock
+from src.connection_manager import StateEncoder, build_level_msg
+from src.constants import TOTAL_LEVELS
+from src.game import GameState
+from src.interest import build_minimap_msg
+from src.models import PlayerLocation, PlayerState
+from src.wire import Frame, decode_frame
+
+
+def assert_round_trip(frame: Frame):
+    assert decode_frame(frame.binary) == json.loads(frame.text)
+
+
+def test_state_frames_decode_like_their_json():
+    clock = SimClock()
+    game = GameState(rng=random.Random(1), clock=clock)
+    game.game_options.update(food_to_advance=4, lives=10 ** 9)
+    p = PlayerState(pid="p0", name="Ünïcode 🐍", color="#ff00ff", location=PlayerLocation.PLAYING)
+    game.players[p.pid] = p
+    for _ in range(6):
+        game.add_ai()
+    for p in game.players.values():
+        p.location = PlayerLocation.PLAYING
+    game.start_game()
+    encoder = StateEncoder(keyframe_interval=40)
+    interval = 1.0 / game.game_options["tick_rate"]
+    types = set()
+    for _ in range(600):
+        game.tick()
+        clock.advance(interval)
+        frame = encoder.encode(game)
+        types.add(frame.data["type"])
+        assert_round_trip(frame)
+    assert_round_trip(build_minimap_msg(game))
+    assert types == {"state", "state_delta"}
+
+
+def test_level_frames_decode_like_their_json():
+    for level in range(1, TOTAL_LEVELS + 1):
+        for msg_type in ("game_start", "game_in_progress", "level_change"):
+            assert_round_trip(build_level_msg(msg_type, level))
+            assert_round_trip(build_level_msg(msg_type, level, 60, 40))
+
+
+def test_values_outside_the_tables_round_trip():
+    data = {
+        "type": "state_delta",
+        "seq": 2 ** 40,
+        "unknown_key": [-1, -300, 0.5, None, True, False, "text", {"nested": []}],
+        "players": {"p1": {"head": [3, 4], "pop": 0, "score": -5}},
+        "food_add": [[0, 0], [39, 29]],
+        "level_change_at": 1712345678.25,
+    }
+    assert_round_trip(Frame(data, 40))